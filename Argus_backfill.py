@@ -0,0 +1,183 @@
+import argparse
+import contextlib
+import glob
+import io
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from Argus_common import OUTPUT_FORMATS
+from Argus_store import STORE_FILE
+from Argus_watch import describe_workbook, is_workbook, parse_issue, save_issue
+import Argus_runner
+
+# ======================================
+# Настройки путей и параметров
+# ======================================
+# Перепрогон архива выпусков (например, после исправления парсера). Книги разбираются
+# в пуле процессов, а результаты сохраняются в основном процессе по порядку дат выпуска:
+# хранилище SQLite пишет один процесс, а проверка цен и индекс судов видят историю
+# в том порядке, в каком выходили выпуски.
+OUTPUT_DIR = 'backfill'
+CHECKPOINT_FILE = 'argus_backfill.json'
+DATE_FORMAT = "%d.%m.%Y"
+
+# ======================================
+# Список книг архива
+# ======================================
+def collect_workbooks(patterns):
+    # {дата выпуска: [книги]} по возрастанию дат; книги без даты в имени — в конце
+    groups = {}
+    for pattern in patterns:
+        for path in glob.glob(pattern, recursive=True):
+            if is_workbook(os.path.basename(path)) and os.path.isfile(path):
+                groups.setdefault(describe_workbook(path)[2], set()).add(os.path.abspath(path))
+
+    def date_key(publish_date):
+        try:
+            return 0, datetime.strptime(publish_date, DATE_FORMAT)
+        except ValueError:
+            return 1, datetime.max
+
+    return {date: sorted(groups[date]) for date in sorted(groups, key=date_key)}
+
+
+def file_signature(path):
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime]
+
+# ======================================
+# Контрольная точка
+# ======================================
+# {"parser_version": ..., "done": {путь: [размер, mtime]}}. Книга считается готовой,
+# только если не изменилась с прошлого прогона и разобрана той же версией парсеров:
+# после исправления парсера (новая PARSER_VERSION) архив перепрогоняется целиком.
+def load_checkpoint(path):
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, encoding="utf-8") as f:
+            checkpoint = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"[WARNING] Контрольная точка '{path}' не прочитана, начинаем заново: {e}")
+        return {}
+    if checkpoint.get("parser_version") != Argus_runner.PARSER_VERSION:
+        print("[INFO] Версия парсеров изменилась с прошлого прогона — архив разбирается заново")
+        return {}
+    return checkpoint.get("done", {})
+
+
+def save_checkpoint(path, done):
+    # Через временный файл: прерывание во время записи не портит контрольную точку
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"parser_version": Argus_runner.PARSER_VERSION, "done": done}, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+# ======================================
+# Разбор книги в процессе-воркере
+# ======================================
+def parse_in_worker(file_path, use_cache, auto):
+    # Вывод парсеров собирается в строку: из нескольких процессов он перемешался бы
+    log = io.StringIO()
+    with contextlib.redirect_stdout(log):
+        try:
+            results = parse_issue(file_path, use_cache, auto)
+        except Exception as e:
+            print(f"[ERROR] Ошибка при обработке {file_path}: {e}")
+            results = None
+    return results, log.getvalue()
+
+
+def format_duration(seconds):
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}"
+
+# ======================================
+# Перепрогон архива
+# ======================================
+def backfill(patterns, output_dir=OUTPUT_DIR, formats=("xlsx",), store=STORE_FILE, workers=None,
+             checkpoint_file=CHECKPOINT_FILE, use_cache=True, auto=False, verbose=False):
+    groups = collect_workbooks(patterns)
+    done = load_checkpoint(checkpoint_file)
+    pending = [(date, path) for date, paths in groups.items() for path in paths
+               if done.get(path) != file_signature(path)]
+    total = sum(len(paths) for paths in groups.values())
+    print(f"[INFO] Книг в архиве: {total}, выпусков: {len(groups)}, "
+          f"уже разобрано: {total - len(pending)}, осталось: {len(pending)}")
+    if not pending:
+        return
+
+    started = time.perf_counter()
+    records = failed = empty = 0
+    executor = ProcessPoolExecutor(max_workers=workers)
+    try:
+        # map отдаёт результаты в порядке книг, поэтому сохранение идёт по датам выпуска,
+        # пока воркеры уже разбирают следующие книги
+        parsed = executor.map(parse_in_worker, [path for _, path in pending],
+                              [use_cache] * len(pending), [auto] * len(pending))
+        for number, ((date, path), (results, log)) in enumerate(zip(pending, parsed), 1):
+            for line in log.splitlines():
+                if verbose or line.startswith("[ERROR]"):
+                    print(line)
+            # В контрольную точку попадают только книги с записями: неоткрывшаяся книга
+            # и книга, где не нашлось ни одной таблицы, разбираются при следующем запуске
+            book_records = sum(len(table) for table in results.values()) if results is not None else 0
+            if results is None:
+                failed += 1
+            elif not book_records:
+                empty += 1
+                print(f"[WARNING] {os.path.basename(path)}: ни одной записи, книга не отмечена как готовая")
+            else:
+                save_issue(path, results, output_dir, formats, store)
+                records += book_records
+                done[path] = file_signature(path)
+                save_checkpoint(checkpoint_file, done)
+
+            elapsed = time.perf_counter() - started
+            rate = number / elapsed
+            print(f"[INFO] [{number}/{len(pending)}] {date} {os.path.basename(path)} — "
+                  f"{rate * 60:.1f} книг/мин, осталось ~{format_duration((len(pending) - number) / rate)}")
+    except KeyboardInterrupt:
+        print(f"[INFO] Прервано. Готовые книги записаны в '{checkpoint_file}', повторный запуск продолжит с места остановки")
+        executor.shutdown(wait=False, cancel_futures=True)
+        return
+    executor.shutdown()
+
+    elapsed = time.perf_counter() - started
+    print(f"[INFO] Готово: книг {len(pending) - failed - empty}, записей {records}, время {format_duration(elapsed)}"
+          + (f", с ошибками: {failed}" if failed else "")
+          + (f", без записей: {empty}" if empty else "")
+          + (" (будут повторены при следующем запуске)" if failed or empty else ""))
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Перепрогон архива книг Argus с контрольными точками")
+    arg_parser.add_argument("patterns", nargs="+",
+                            help="шаблоны путей к книгам, например 'archive/**/*.xlsx'")
+    arg_parser.add_argument("--output-dir", default=OUTPUT_DIR,
+                            help=f"папка для результатов по каждой книге (по умолчанию {OUTPUT_DIR})")
+    arg_parser.add_argument("--format", dest="formats", nargs="+", choices=OUTPUT_FORMATS, default=["xlsx"],
+                            help="форматы итогового файла (по умолчанию xlsx)")
+    arg_parser.add_argument("--store", default=STORE_FILE,
+                            help=f"историческое хранилище SQLite (по умолчанию {STORE_FILE})")
+    arg_parser.add_argument("--workers", type=int, default=None,
+                            help="число процессов-воркеров (по умолчанию — по числу ядер)")
+    arg_parser.add_argument("--checkpoint", default=CHECKPOINT_FILE,
+                            help=f"файл контрольной точки (по умолчанию {CHECKPOINT_FILE})")
+    arg_parser.add_argument("--restart", action="store_true",
+                            help="не учитывать контрольную точку и разобрать весь архив")
+    arg_parser.add_argument("--no-cache", action="store_true",
+                            help="разобрать книги заново, не используя кэш результатов")
+    arg_parser.add_argument("--auto", action="store_true",
+                            help="искать все известные таблицы вместо списков из FILES раннера")
+    arg_parser.add_argument("--verbose", action="store_true", help="показывать вывод парсеров по каждой книге")
+    args = arg_parser.parse_args()
+
+    if args.restart and os.path.exists(args.checkpoint):
+        os.remove(args.checkpoint)
+    backfill(args.patterns, args.output_dir, args.formats, args.store, args.workers, args.checkpoint,
+             not args.no_cache, args.auto, args.verbose)
@@ -0,0 +1,687 @@
+import argparse
+import contextlib
+import importlib
+import io
+import json
+import os
+import platform
+import random
+import re
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from multiprocessing import get_context
+
+from openpyxl import Workbook
+
+try:
+    import resource  # нет на Windows — тогда пиковая память не измеряется
+except ImportError:
+    resource = None
+
+# ======================================
+# Настройки генерации
+# ======================================
+# Книги повторяют состав FILES раннера: одна книга на продукт, каждая таблица на своём
+# листе (парсеры line-up читают таблицу до конца листа или до строки Copyright).
+BENCH_DATE = "2025-07-03"
+ROWS_PER_TABLE = 200
+SEED = 12345
+
+WORKBOOK_TABLES = {
+    "Ammonia": ["Indian imports", "Spot Sales", "Ammonia freight rates"],
+    "Nitrogen": ["Argus Urea Spot Deals Selection", "Argus Ammonium Sulphate Spot Deals Selection",
+                 "Dry bulk fertilizer freight assessments"],
+    "NPKs": ["Recent spot sales", "Indian NPK arrivals", "Urea freight",
+             "Latest African NPK tender", "Indian NPK, NPS tenders", "phosphate tenders"],
+    "Phosphates": ["Selected Spot Sales", "Phosphate freigh"],
+    "Potash": ["India MOP vessel line-up", "Brazil Potash line-up", "Potash freight"],
+}
+
+COMPANIES = ["Yara", "Ameropa", "Koch", "OCP", "Ma'aden", "Sabic", "EuroChem", "Uralkali", "Trammo",
+             "Helm", "Midgulf", "IFFCO", "RCF", "Chambal", "Fertiglobe", "Belaruskali", "Nutrien", "K+S"]
+COUNTRIES = ["Saudi Arabia", "Qatar", "Egypt", "Russia", "Morocco", "Oman", "China", "Indonesia",
+             "Algeria", "Nigeria", "Canada", "Jordan", "Israel", "Lithuania"]
+PORTS = ["Kandla", "Paradip", "Vizag", "Tuticorin", "Mundra", "Kakinada", "Haldia", "Paranagua",
+         "Santos", "Rio Grande", "Yuzhny", "Ust-Luga", "Jorf Lasfar", "Ruwais"]
+VESSELS = ["Gas Phoenix", "Navigator Aurora", "Ocean Star", "Bulk Trader", "Clipper Neptun",
+           "Golden Ray", "Sea Eagle", "Atlantic Dawn", "Pacific Grace", "Nord Venus"]
+GRADES = ["Granular", "Prilled", "DAP", "MAP", "NPK 10-26-26", "NPS 20-20-0-13", "Standard MOP", "Granular MOP"]
+MONTHS = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+FULL_MONTHS = ["January", "February", "March", "April", "May", "June", "July", "August",
+               "September", "October", "November", "December"]
+INCOTERMS = ["fob", "cfr", "cif", "FOB", "CFR", "fca"]
+
+# ======================================
+# Грязные значения ячеек, как в реальных выпусках
+# ======================================
+def messy(rng, text):
+    # Лишние пробелы по краям и двойные пробелы внутри
+    if rng.random() < 0.2:
+        text = f"  {text} "
+    if rng.random() < 0.1:
+        text = text.replace(" ", "  ", 1)
+    return text
+
+
+def shipment_text(rng):
+    month = rng.choice(MONTHS + FULL_MONTHS)
+    kind = rng.random()
+    if kind < 0.25:
+        return f"{rng.choice(['mid', 'early', 'end'])}-{month}"
+    if kind < 0.5:
+        day = rng.randint(1, 20)
+        return f"{day}-{day + rng.randint(1, 8)} {month}"
+    if kind < 0.7:
+        return f"{rng.randint(1, 28)} {month}"
+    if kind < 0.8:
+        return "TBC"
+    return month
+
+
+def price_text(rng, base, incoterm=True):
+    low = base + rng.randint(-20, 20)
+    kind = rng.random()
+    if kind < 0.5:
+        price = f"{low}-{low + rng.randint(2, 15)}"
+    elif kind < 0.8:
+        price = str(low)
+    elif kind < 0.9:
+        price = f"${low:,}–{low + 5:,}"
+    else:
+        price = rng.choice(["", "n/a", "undisclosed"])
+    if incoterm and price and rng.random() < 0.9:
+        price = f"{price} {rng.choice(INCOTERMS)}"
+    return price
+
+
+def volume_text(rng, thousands=False):
+    kind = rng.random()
+    if thousands:
+        if kind < 0.6:
+            return str(rng.choice([5, 10, 15, 20, 25, 30, 35, 40]))
+        if kind < 0.85:
+            low = rng.choice([20, 25, 30])
+            return f"{low}-{low + 5}"
+        return rng.choice(["", "n/a", "TBC"])
+    if kind < 0.85:
+        return f"{rng.randint(5, 60) * 1000:,}"
+    return rng.choice(["", "tbc", "c.25,000"])
+
+# ======================================
+# Таблицы: строки листа от названия таблицы до строки Copyright
+# ======================================
+def copyright_row():
+    return ["Copyright © 2025 Argus Media group"]
+
+
+def indian_imports(rng, rows):
+    out = [["Indian imports"], ["Seller", "Buyer", "Vessel", "Volume/Origin", "Arrival/Port", "Price $/t"]]
+    for _ in range(rows):
+        if rng.random() < 0.05:
+            out.append([])
+        out.append([
+            messy(rng, rng.choice(COMPANIES)), rng.choice(COMPANIES), rng.choice(VESSELS),
+            f"{volume_text(rng)} {rng.choice(COUNTRIES)}",
+            f"{shipment_text(rng)} {rng.choice(PORTS)}", price_text(rng, 400, incoterm=False),
+        ])
+    return out + [copyright_row()]
+
+
+def spot_sales(rng, rows):
+    out = [["Spot Sales"], ["Shipment", "Seller", "Buyer", "Destination", "Tonnes", "Price", "Origin"]]
+    for _ in range(rows):
+        out.append([
+            shipment_text(rng) if rng.random() < 0.95 else "Jul", rng.choice(COMPANIES), rng.choice(COMPANIES),
+            rng.choice(COUNTRIES), volume_text(rng), price_text(rng, 420), rng.choice(COUNTRIES),
+        ])
+    return out + [copyright_row()]
+
+
+def spot_deals_selection(title):
+    def build(rng, rows):
+        out = [[title], ["Grade", "Origin", "Supplier", "Buyer", "Destination", "Volume t", "Price $/t", "Shipment"]]
+        for _ in range(rows):
+            if rng.random() < 0.05:
+                out.append([])
+            out.append([
+                rng.choice(["Granular", "Prilled", "Standard", "Crystal"]), rng.choice(COUNTRIES),
+                rng.choice(COMPANIES), rng.choice(COMPANIES), rng.choice(COUNTRIES), volume_text(rng),
+                price_text(rng, 380), shipment_text(rng),
+            ])
+        return out + [copyright_row()]
+    return build
+
+
+def recent_spot_sales(rng, rows):
+    out = [["Recent spot sales"],
+           ["Supplier", "Origin", "Buyer", "Destination", "Product", "Volume '000t", "Price", "Basis", "", "Shipment"]]
+    for _ in range(rows):
+        kind = rng.random()
+        if kind < 0.7:
+            volume = str(rng.randint(5, 50))
+        elif kind < 0.85:
+            volume = f"{rng.randint(2, 3)}x{rng.choice([10, 25])}"
+        else:
+            volume = f"{rng.randint(10, 30)}+{rng.randint(5, 20)}"
+        out.append([
+            messy(rng, rng.choice(COMPANIES)), rng.choice(COUNTRIES), rng.choice(COMPANIES), rng.choice(COUNTRIES),
+            rng.choice(GRADES), volume, price_text(rng, 350, incoterm=False), rng.choice(INCOTERMS), "",
+            rng.choice(FULL_MONTHS + MONTHS + ["TBC"]),
+        ])
+    return out + [copyright_row()]
+
+
+def indian_npk_arrivals(rng, rows):
+    out = [["Indian NPK arrivals"], ["Supplier", "Buyer", "Vessel", "Grade", "Volume/Loading", "Port", "Arrival"]]
+    for n in range(rows):
+        out.append([
+            rng.choice(COMPANIES), rng.choice(COMPANIES), rng.choice(VESSELS), rng.choice(GRADES),
+            f"{volume_text(rng)} {rng.choice(PORTS)}", rng.choice(PORTS), shipment_text(rng),
+        ])
+        if n % 25 == 24:
+            out.append(["Total", "", "", "", f"{rng.randint(100, 900) * 1000:,}"])
+    return out + [["Grand total", "", "", "", f"{rng.randint(1000, 9000) * 1000:,}"]]
+
+
+def selected_spot_sales(rng, rows):
+    out = [["Selected spot sales"],
+           ["Origin", "Seller", "Buyer", "Destination", "Volume ('000t)", "Price", "Delivery period"]]
+    for _ in range(rows):
+        out.append([
+            rng.choice(COUNTRIES), rng.choice(COMPANIES), rng.choice(COMPANIES), rng.choice(COUNTRIES),
+            f"{rng.randint(5, 60)} {rng.choice(['DAP', 'MAP', 'TSP', 'TBC'])}", price_text(rng, 600),
+            rng.choice(FULL_MONTHS + ["Jul-Aug", "TBC"]),
+        ])
+    return out + [copyright_row()]
+
+
+def india_mop_lineup(rng, rows):
+    out = [["India MOP vessel line-up"], ["Seller/Buyer", "Vessel", "Tonnes", "Load port", "Discharge port", "Arrival"]]
+    for _ in range(rows):
+        out.append([
+            f"{rng.choice(COMPANIES)}/{rng.choice(COMPANIES)}", rng.choice(VESSELS), volume_text(rng) or "30,000",
+            rng.choice(PORTS), rng.choice(PORTS), shipment_text(rng),
+        ])
+    return out + [copyright_row()]
+
+
+def brazil_potash_lineup(rng, rows):
+    out = [["Brazil potash line-up"],
+           ["Port", "Vessel", "Charterer", "Origin", "Product", "Volume t", "Receiver", "ETA", "ETB"]]
+    for _ in range(rows):
+        out.append([
+            rng.choice(PORTS[8:11]), rng.choice(VESSELS), rng.choice(COMPANIES), rng.choice(COUNTRIES),
+            rng.choice(["MOP", "Granular MOP", ""]), volume_text(rng), rng.choice(COMPANIES),
+            f"{rng.randint(1, 28)} {rng.choice(MONTHS)}", f"{rng.randint(1, 28)} {rng.choice(MONTHS)}",
+        ])
+    return out + [[], [], [], copyright_row()]
+
+
+def ammonia_freight_rates(rng, rows):
+    out = [["Ammonia freight rates", "", "$/t"], ["Route", "Volume t", "Rate change"]]
+    for _ in range(rows):
+        low = rng.choice([15, 20, 23, 25, 35])
+        out.append([
+            f"{rng.choice(PORTS)} to {rng.choice(PORTS)}",
+            # Пустой объём три строки подряд — конец таблицы, поэтому здесь без "n/a"
+            rng.choice([f"{low},000", f"{low}-{low + 5}", f"{low} 000"]),
+            rng.choice(["+2", "-1", "nc", "n/a", "+0.5"]),
+        ])
+    return out + [[], [], [], copyright_row()]
+
+
+def freight_assessments(title, header):
+    def build(rng, rows):
+        out = [[title], header]
+        combined = len(header) == 4
+        for _ in range(rows):
+            rate = rng.randint(15, 60)
+            row = [rng.choice(PORTS), rng.choice(COUNTRIES), volume_text(rng, thousands=True)]
+            if combined:
+                row.append(rng.choice([f"{rate}-{rate + 3}", str(rate), "n/a"]))
+            else:
+                row += [str(rate), rng.choice([str(rate + 3), f"{rate + 3}.5", "n/a"])]
+            out.append(row)
+        return out + [[], [], [], copyright_row()]
+    return build
+
+
+def latest_african_npk_tender(rng, rows):
+    out = [["Latest African NPK tender"],
+           ["Country/Holder", "Product", "Vol '000t", "Issue date", "Closing date", "Status"]]
+    for _ in range(rows):
+        out.append([
+            f"{rng.choice(COUNTRIES)}/{rng.choice(COMPANIES)}", rng.choice(GRADES), volume_text(rng, thousands=True),
+            f"{rng.randint(1, 28)} {rng.choice(MONTHS)}", f"{rng.choice(MONTHS)} {rng.randint(1, 28)}",
+            rng.choice(["Open", "Closed", "Awarded", "Scrapped"]),
+        ])
+    return out + [[], [], [], copyright_row()]
+
+
+def indian_npk_nps_tenders(rng, rows):
+    out = [["Indian NPK, NPS tenders"],
+           ["Holder", "Product", "Vol '000t", "Issue date", "Closing date", "Shipment", "Status"]]
+    for _ in range(rows):
+        out.append([
+            rng.choice(COMPANIES), rng.choice(GRADES), volume_text(rng, thousands=True),
+            f"{rng.randint(1, 28)} {rng.choice(MONTHS)}", f"{rng.randint(1, 28)} {rng.choice(MONTHS)} 2025",
+            rng.choice(FULL_MONTHS), rng.choice(["Open", "Closed", "Awarded"]),
+        ])
+    return out + [[], [], [], copyright_row()]
+
+
+def phosphate_tenders(rng, rows):
+    out = [["Phosphate tenders"], ["Holder/Country", "Product", "Vol '000t", "Closing date", "Shipment", "Status"]]
+    for _ in range(rows):
+        out.append([
+            f"{rng.choice(COMPANIES)}/{rng.choice(COUNTRIES)}", rng.choice(["DAP", "MAP", "TSP"]),
+            volume_text(rng, thousands=True), f"{rng.randint(1, 28)} {rng.choice(MONTHS)}",
+            f"by {rng.randint(1, 28)} {rng.choice(FULL_MONTHS)}", rng.choice(["Open", "Closed", "Awarded"]),
+        ])
+    return out + [[], [], [], copyright_row()]
+
+
+TABLE_BUILDERS = {
+    "Indian imports": indian_imports,
+    "Spot Sales": spot_sales,
+    "Argus Urea Spot Deals Selection": spot_deals_selection("Argus urea spot deals selection"),
+    "Argus Ammonium Sulphate Spot Deals Selection": spot_deals_selection("Argus ammonium sulphate spot deals selection"),
+    "Recent spot sales": recent_spot_sales,
+    "Indian NPK arrivals": indian_npk_arrivals,
+    "Selected Spot Sales": selected_spot_sales,
+    "India MOP vessel line-up": india_mop_lineup,
+    "Brazil Potash line-up": brazil_potash_lineup,
+    "Ammonia freight rates": ammonia_freight_rates,
+    "Dry bulk fertilizer freight assessments": freight_assessments(
+        "Dry bulk fertilizer freight assessments",
+        ["Loading", "Destination", "Volume ooot", "Rate ($/t) low", "Rate ($/t) high"]),
+    "Urea freight": freight_assessments(
+        "Urea freight", ["Loading", "Destination", "Tonnage '000t", "Low", "High"]),
+    "Phosphate freigh": freight_assessments(
+        "Phosphate freight", ["Loading", "Destination", "Tonnage '000t", "Rate ($/t) Low/High"]),
+    "Potash freight": freight_assessments(
+        "Potash freight", ["Loading", "Destination", "MOP ooot", "Rate ($/t)"]),
+    "Latest African NPK tender": latest_african_npk_tender,
+    "Indian NPK, NPS tenders": indian_npk_nps_tenders,
+    "phosphate tenders": phosphate_tenders,
+}
+
+# ======================================
+# Генерация книг
+# ======================================
+def workbook_name(product, date=BENCH_DATE):
+    return f"Argus {product} _ Russia version ({date}).xlsx"
+
+
+def generate_workbooks(output_dir, rows=ROWS_PER_TABLE, seed=SEED):
+    # Возвращает [{"path", "tables", "rows": {таблица: строк данных}}] — в формате FILES
+    rng = random.Random(seed)
+    os.makedirs(output_dir, exist_ok=True)
+    files = []
+    for product, tables in WORKBOOK_TABLES.items():
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet("Summary")
+        sheet.append([f"Argus {product}"])
+        sheet.append([f"Issue {BENCH_DATE}"])
+        for table in tables:
+            sheet = workbook.create_sheet(table[:31].replace("/", "-"))
+            for row in TABLE_BUILDERS[table](rng, rows):
+                sheet.append(row)
+        path = os.path.join(output_dir, workbook_name(product))
+        workbook.save(path)
+        files.append({"path": path, "tables": tables, "rows": {table: rows for table in tables}})
+    return files
+
+# ======================================
+# Замеры: каждый случай в отдельном процессе, чтобы пиковая память не смешивалась
+# ======================================
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux отдаёт килобайты, macOS — байты
+    return round(peak / (1 << 20 if sys.platform == "darwin" else 1 << 10), 1)
+
+
+# Парсеры импортируют pandas и openpyxl лениво; в процессе замера они загружаются заранее,
+# иначе первый парсер, которому они нужны, платил бы за импорт временем и памятью
+PRELOAD_MODULES = ("pandas", "openpyxl")
+
+
+def preload_modules():
+    for module_name in PRELOAD_MODULES:
+        importlib.import_module(module_name)
+
+
+def parser_module(table):
+    import Argus_runner
+    for module in Argus_runner.PARSERS:
+        if table in module.TABLE_ANCHORS:
+            return module
+    raise KeyError(table)
+
+
+def measure_parser(file_path, table):
+    # Только сам парсер: лист уже загружен, таблица найдена
+    from Argus_common import open_workbook, iter_sheet_grids, RecordTable
+    preload_modules()
+    module = parser_module(table)
+    records = RecordTable()
+    with contextlib.redirect_stdout(io.StringIO()):
+        workbook = open_workbook(file_path)
+        sheets = list(iter_sheet_grids(workbook, file_path, {table: module.TABLE_ANCHORS[table]}, module.STREAMING))
+        workbook.close()
+        started = time.perf_counter()
+        for grid, table_index in sheets:
+            module.process_file(grid, file_path, [table], records, table_index)
+        seconds = time.perf_counter() - started
+    return {"records": len(records), "seconds": seconds, "peak_rss_mb": peak_rss_mb()}
+
+
+def measure_workbook(file_path, tables):
+    # Вся книга: открытие, поиск таблиц, чтение листов и все парсеры, без кэша
+    import Argus_runner
+    preload_modules()
+    with contextlib.redirect_stdout(io.StringIO()):
+        started = time.perf_counter()
+        file_results = Argus_runner.parse_workbook(file_path, tables)
+        seconds = time.perf_counter() - started
+    records = sum(len(records) for records in (file_results or {}).values())
+    return {"records": records, "seconds": seconds, "peak_rss_mb": peak_rss_mb()}
+
+
+def run_isolated(function, *args):
+    with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as executor:
+        return executor.submit(function, *args).result()
+
+
+def best_of(repeat, function, *args):
+    # Время — лучший из повторов; память — максимум
+    runs = [run_isolated(function, *args) for _ in range(repeat)]
+    best = min(runs, key=lambda run: run["seconds"])
+    peaks = [run["peak_rss_mb"] for run in runs if run["peak_rss_mb"] is not None]
+    return dict(best, peak_rss_mb=max(peaks) if peaks else None)
+
+
+def with_rate(result, input_rows):
+    seconds = result["seconds"]
+    return dict(result, input_rows=input_rows, seconds=round(seconds, 6),
+                rows_per_sec=round(input_rows / seconds, 1) if seconds > 0 else None)
+
+
+# ======================================
+# Объёмы-выражения: разбор без eval против прежнего пути через eval
+# ======================================
+VOLUME_SAMPLES = 100000
+
+
+def eval_volume(volume):
+    # Прежний код parse_recent_spot_sales — эталон для сравнения
+    try:
+        vol_expr = re.sub(r'[хХxX*×]', '*', volume.replace(',', ''))
+        vol_expr = re.sub(r'[:÷]', '/', vol_expr)
+        if re.search(r'[\+\-\*/]', vol_expr):
+            return int(eval(vol_expr))
+        vol_num = re.search(r'(\d+)', vol_expr)
+        return int(vol_num.group(1)) if vol_num else None
+    except Exception:
+        return None
+
+
+def volume_samples(rng, count=VOLUME_SAMPLES):
+    samples = []
+    for _ in range(count):
+        kind = rng.random()
+        if kind < 0.5:
+            samples.append(str(rng.randint(5, 60)))
+        elif kind < 0.7:
+            samples.append(f"{rng.randint(2, 4)}{rng.choice(['x', 'X', '×', ' x '])}{rng.choice([10, 25, 30])}")
+        elif kind < 0.8:
+            samples.append(f"{rng.choice([30, 50, 60])}{rng.choice([':', '÷'])}{rng.randint(2, 3)}")
+        elif kind < 0.9:
+            samples.append(f"{rng.randint(10, 30)}+{rng.randint(5, 20)}")
+        else:
+            samples.append(rng.choice(["TBC", "c.25", "25,000", "approx 30"]))
+    return samples
+
+
+def benchmark_volume_expressions(seed=SEED, count=VOLUME_SAMPLES):
+    from Argus_common import volume_amount
+    samples = volume_samples(random.Random(seed), count)
+
+    started = time.perf_counter()
+    expected = [eval_volume(sample) for sample in samples]
+    eval_seconds = time.perf_counter() - started
+
+    volume_amount.cache_clear()
+    started = time.perf_counter()
+    parsed = [volume_amount(sample) for sample in samples]
+    parser_seconds = time.perf_counter() - started
+
+    # Без кэша: каждая строка разбирается заново
+    parse_uncached = volume_amount.__wrapped__
+    started = time.perf_counter()
+    for sample in samples:
+        parse_uncached(sample)
+    uncached_seconds = time.perf_counter() - started
+
+    return {
+        "samples": count,
+        "distinct": len(set(samples)),
+        "mismatches": sum(a != b for a, b in zip(expected, parsed)),
+        "eval_seconds": round(eval_seconds, 6),
+        "parser_seconds": round(parser_seconds, 6),
+        "parser_uncached_seconds": round(uncached_seconds, 6),
+        "speedup": round(eval_seconds / parser_seconds, 1) if parser_seconds > 0 else None,
+    }
+
+
+# ======================================
+# Регулярные выражения: реестр Argus_patterns против строковых шаблонов
+# ======================================
+REGEX_SAMPLES = 50000
+
+
+def inline_row_patterns(date_str, price_str):
+    # Прежний вид вызовов: строковый шаблон на каждый вызов, день и месяц — через f-строку
+    date_lower = date_str.lower()
+    day_match = re.search(r'\b(\d{1,2})\b', date_str)
+    re.search(r'\bmid\b|\bme?i?d\b', date_lower)
+    re.search(r'\bend\b|\ben?d\b', date_lower)
+    month_match = re.search(
+        r'\b(jan|january|feb|february|mar|march|apr|april|may|jun|june|'
+        r'jul|july|aug|august|sep|september|oct|october|nov|november|dec|december)\b',
+        date_lower
+    )
+    re.search(r'\b(20\d{2})\b', date_str)
+    if day_match and month_match:
+        month_abbr = month_match.group(1)[:3].capitalize()
+        re.search(rf'\b{day_match.group(1)}\s+{month_abbr}\b', date_str, re.IGNORECASE)
+    price_clean = re.sub(r'\s+', ' ', price_str).strip()
+    re.search(r'(fob|cfr|cif|fca|dap|cpt|c\w+?r|rail|exw|ddp|dpu|d\w+?p|f\w+?t|c\w+?y)', price_clean, re.IGNORECASE)
+    return re.findall(r'\b\d+\b', re.sub(r'[\s,\–\-–]', ' ', price_clean))
+
+
+def registry_row_patterns(date_str, price_str):
+    from Argus_patterns import (
+        DAY_RE, MID_RE, END_RE, MONTH_RE, YEAR_RE, WHITESPACE_RE, INCOTERM_RE, INTEGER_RE, PRICE_SEPARATORS_RE
+    )
+    from Argus_tender import has_day_month
+    date_lower = date_str.lower()
+    day_match = DAY_RE.search(date_str)
+    MID_RE.search(date_lower)
+    END_RE.search(date_lower)
+    month_match = MONTH_RE.search(date_lower)
+    YEAR_RE.search(date_str)
+    if day_match and month_match:
+        has_day_month(date_str, day_match.group(1), month_match.group(1)[:3].capitalize())
+    price_clean = WHITESPACE_RE.sub(' ', price_str).strip()
+    INCOTERM_RE.search(price_clean)
+    return INTEGER_RE.findall(PRICE_SEPARATORS_RE.sub(' ', price_clean))
+
+
+def benchmark_regex_registry(seed=SEED, count=REGEX_SAMPLES):
+    rng = random.Random(seed)
+    samples = [(shipment_text(rng), price_text(rng, rng.randint(200, 600))) for _ in range(count)]
+    registry_row_patterns(*samples[0])  # импорт модулей не входит в замер
+
+    started = time.perf_counter()
+    expected = [inline_row_patterns(date_str, price_str) for date_str, price_str in samples]
+    inline_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    result = [registry_row_patterns(date_str, price_str) for date_str, price_str in samples]
+    registry_seconds = time.perf_counter() - started
+
+    return {
+        "rows": count,
+        "mismatches": sum(a != b for a, b in zip(expected, result)),
+        "inline_us_per_row": round(inline_seconds / count * 1e6, 3),
+        "registry_us_per_row": round(registry_seconds / count * 1e6, 3),
+        "speedup": round(inline_seconds / registry_seconds, 2) if registry_seconds > 0 else None,
+    }
+
+
+# ======================================
+# Indian imports: колонка "дата + порт" целиком против разбора по строкам
+# ======================================
+DATE_PORT_TABLES = 500
+
+
+def row_date_port(date_port, report_date):
+    # Прежний код parse_indian_imports (по строке за раз) — эталон для сравнения
+    from Argus_lineup_date import parse_date
+    from Argus_patterns import PORT_DATE_PARTS_RE, EDGE_DASHES_RE, DIGITS_RE
+    date_str = parse_date(date_port, report_date=report_date)
+    discharge_port = ""
+    if date_port:
+        discharge_port = PORT_DATE_PARTS_RE.sub('', date_port).strip()
+        discharge_port = EDGE_DASHES_RE.sub('', discharge_port).strip()
+        discharge_port = DIGITS_RE.sub('', discharge_port).strip()
+        discharge_port = discharge_port.lstrip('-').strip()
+    return date_str, discharge_port
+
+
+def benchmark_date_port_split(seed=SEED, tables=DATE_PORT_TABLES, rows=ROWS_PER_TABLE):
+    from Argus_lineup_date import configure_date_cache, split_date_port_column
+    rng = random.Random(seed)
+    report_date = datetime.strptime(BENCH_DATE, "%Y-%m-%d")
+    samples = [[f"{messy(rng, shipment_text(rng))} {rng.choice(PORTS)}" for _ in range(rows)] for _ in range(tables)]
+    # Кэш дат сбрасывается перед каждым замером: оба пути начинают с пустого кэша
+    with contextlib.redirect_stdout(io.StringIO()):
+        configure_date_cache()
+        started = time.perf_counter()
+        expected = [[row_date_port(cell, report_date) for cell in table] for table in samples]
+        row_seconds = time.perf_counter() - started
+
+        configure_date_cache()
+        started = time.perf_counter()
+        result = [split_date_port_column(table, report_date) for table in samples]
+        column_seconds = time.perf_counter() - started
+
+    return {
+        "tables": tables,
+        "rows": tables * rows,
+        "mismatches": sum(a != b for table, split in zip(expected, result) for a, b in zip(table, split)),
+        "row_us_per_row": round(row_seconds / (tables * rows) * 1e6, 3),
+        "column_us_per_row": round(column_seconds / (tables * rows) * 1e6, 3),
+        "speedup": round(row_seconds / column_seconds, 2) if column_seconds > 0 else None,
+    }
+
+
+# ======================================
+# Цены: колонка целиком против process_prices по строкам
+# ======================================
+PRICE_TABLES = 500
+# Числа длиннее int64 — в ячейку иногда попадает склейка нескольких цен или мусор из
+# выгрузки; process_prices разбирает их как есть, колоночный путь обязан совпадать
+OVERSIZED_PRICES = ["99999999999999999999", "410-99999999999999999999 fob", "123456789012345678901234567890"]
+
+
+def benchmark_price_column(seed=SEED, tables=PRICE_TABLES, rows=ROWS_PER_TABLE):
+    from Argus_lineup_date import process_prices, process_price_column
+    rng = random.Random(seed)
+    samples = [[messy(rng, price_text(rng, rng.randint(200, 600))) for _ in range(rows)] for _ in range(tables)]
+    for table in samples:
+        table[rng.randrange(rows)] = rng.choice(OVERSIZED_PRICES)
+
+    started = time.perf_counter()
+    expected = [[process_prices(price) for price in table] for table in samples]
+    row_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    result = [process_price_column(table) for table in samples]
+    column_seconds = time.perf_counter() - started
+
+    return {
+        "tables": tables,
+        "rows": tables * rows,
+        "mismatches": sum(a != b for table, column in zip(expected, result) for a, b in zip(table, column)),
+        "row_us_per_row": round(row_seconds / (tables * rows) * 1e6, 3),
+        "column_us_per_row": round(column_seconds / (tables * rows) * 1e6, 3),
+        "speedup": round(row_seconds / column_seconds, 2) if column_seconds > 0 else None,
+    }
+
+
+def run_benchmark(files, repeat=1):
+    parsers = []
+    workbooks = []
+    for file_info in files:
+        for table in file_info["tables"]:
+            result = best_of(repeat, measure_parser, file_info["path"], table)
+            parsers.append(dict(table=table, module=parser_module(table).__name__,
+                                **with_rate(result, file_info["rows"][table])))
+            print(f"[BENCH] {table}: {parsers[-1]['rows_per_sec']} строк/с", file=sys.stderr)
+        result = best_of(repeat, measure_workbook, file_info["path"], file_info["tables"])
+        workbooks.append(dict(file=os.path.basename(file_info["path"]),
+                              **with_rate(result, sum(file_info["rows"].values()))))
+
+    total_rows = sum(workbook["input_rows"] for workbook in workbooks)
+    total_seconds = sum(workbook["seconds"] for workbook in workbooks)
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": repeat,
+        "parsers": parsers,
+        "workbooks": workbooks,
+        "end_to_end": {
+            "input_rows": total_rows,
+            "records": sum(workbook["records"] for workbook in workbooks),
+            "seconds": round(total_seconds, 6),
+            "rows_per_sec": round(total_rows / total_seconds, 1) if total_seconds > 0 else None,
+            "peak_rss_mb": max((w["peak_rss_mb"] for w in workbooks if w["peak_rss_mb"] is not None), default=None),
+        },
+    }
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Бенчмарк парсеров на синтетических книгах Argus")
+    arg_parser.add_argument("--rows", type=int, default=ROWS_PER_TABLE,
+                            help=f"строк данных в каждой таблице (по умолчанию {ROWS_PER_TABLE})")
+    arg_parser.add_argument("--seed", type=int, default=SEED, help="зерно генератора (по умолчанию %(default)s)")
+    arg_parser.add_argument("--repeat", type=int, default=1,
+                            help="повторов каждого замера, берётся лучшее время (по умолчанию 1)")
+    arg_parser.add_argument("--workdir", default=None,
+                            help="папка для сгенерированных книг (по умолчанию временная)")
+    arg_parser.add_argument("--output", default=None, help="файл для JSON-отчёта (по умолчанию stdout)")
+    args = arg_parser.parse_args()
+
+    with contextlib.ExitStack() as stack:
+        workdir = args.workdir or stack.enter_context(tempfile.TemporaryDirectory(prefix="argus_bench_"))
+        bench_files = generate_workbooks(workdir, args.rows, args.seed)
+        report = dict(rows_per_table=args.rows, seed=args.seed, **run_benchmark(bench_files, args.repeat))
+    report["volume_expressions"] = benchmark_volume_expressions(args.seed)
+    report["regex_registry"] = benchmark_regex_registry(args.seed)
+    report["date_port_split"] = benchmark_date_port_split(args.seed, rows=args.rows)
+    report["price_column"] = benchmark_price_column(args.seed, rows=args.rows)
+
+    report_json = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(report_json + "\n")
+    else:
+        print(report_json)
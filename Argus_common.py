@@ -0,0 +1,951 @@
+import re
+import os
+import math
+import json
+import hashlib
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from functools import lru_cache
+from operator import itemgetter
+
+# pandas и openpyxl импортируются внутри функций, которым они нужны: их загрузка занимает
+# большую часть запуска, а разбор якорей, кэш и статистика без них обходятся.
+# Сами парсеры тоже можно импортировать как библиотеку (конвейер — в main()).
+
+# ======================================
+# Якоря таблиц: условие, по которому строка считается заголовком таблицы
+# ======================================
+# Каждый якорь — функция от ячеек строки листа (строки без пробелов по краям,
+# None для пустых ячеек), возвращающая True на строке-заголовке.
+
+def first_cell_anchor(pattern, flags=0):
+    regex = re.compile(pattern, flags)
+
+    def matches(cells):
+        return cells[0] is not None and regex.search(cells[0]) is not None
+    return matches
+
+
+def any_cell_anchor(pattern, flags=0):
+    regex = re.compile(pattern, flags)
+
+    def matches(cells):
+        return any(cell is not None and regex.search(cell) for cell in cells)
+    return matches
+
+
+def row_text_anchor(pattern, flags=0):
+    regex = re.compile(pattern, flags)
+
+    def matches(cells):
+        return regex.search(' '.join(cell for cell in cells if cell is not None)) is not None
+    return matches
+
+
+def header_anchor(*column_texts):
+    # Строка шапки: i-я ячейка содержит i-й текст (например, Seller/Buyer | Vessel | Tonnes)
+    def matches(cells):
+        return all(
+            i < len(cells) and cells[i] is not None and text in cells[i]
+            for i, text in enumerate(column_texts)
+        )
+    return matches
+
+# ======================================
+# Лист книги в виде массива строк
+# ======================================
+# Строки храним кортежами уже очищенных строк (str(...).strip()), пустые ячейки — None.
+# Кортежи дополняются None до MIN_ROW_WIDTH, чтобы парсеры обращались к фиксированным
+# столбцам без проверок длины; фактическая ширина листа — в width.
+MIN_ROW_WIDTH = 16
+
+
+class SheetGrid:
+    def __init__(self, rows, width):
+        self.rows = rows
+        self.width = width
+
+    def __len__(self):
+        return len(self.rows)
+
+    def iter_rows(self, start=0, stop=None):
+        stop = len(self.rows) if stop is None else min(stop, len(self.rows))
+        for i in range(max(start, 0), stop):
+            yield i, self.rows[i]
+
+    def release_rows(self, before):
+        # Лист уже целиком в памяти — освобождать нечего
+        pass
+
+
+def load_grid(df):
+    width = df.shape[1]
+    padding = (None,) * max(MIN_ROW_WIDTH - width, 0)
+    values = df.to_numpy(dtype=object)
+    empty = df.isna().to_numpy()
+    rows = [
+        tuple(None if is_empty else str(value).strip() for value, is_empty in zip(row_values, row_empty)) + padding
+        for row_values, row_empty in zip(values, empty)
+    ]
+    return SheetGrid(rows, width)
+
+
+def read_grid(file_path, sheet_name=0):
+    import pandas as pd
+    return load_grid(pd.read_excel(file_path, sheet_name=sheet_name, header=None, engine='openpyxl'))
+
+# ======================================
+# Потоковое чтение листа (openpyxl read_only)
+# ======================================
+# Строки читаются из файла только тогда, когда их запрашивает парсер: поиск якорей
+# и разбор таблицы останавливаются на своём терминаторе, остаток листа не читается.
+# Прочитанные строки сохраняются, чтобы следующий парсер мог вернуться к ним;
+# строки выше первого найденного якоря освобождаются (release_rows).
+
+# Тексты, которые pd.read_excel по умолчанию считает пустыми ячейками
+EMPTY_CELL_TEXTS = {
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND",
+    "1.#QNAN", "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null"
+}
+
+
+def clean_cell(value):
+    # Та же очистка, что и при загрузке через pandas: пустые -> None, целые float -> int
+    if value is None:
+        return None
+    if isinstance(value, str):
+        return None if value in EMPTY_CELL_TEXTS else value.strip()
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+class StreamingSheetGrid(SheetGrid):
+    def __init__(self, worksheet):
+        self.rows = []
+        self.offset = 0  # номер строки листа, с которой начинается self.rows
+        # Ширина берётся из размеров листа, записанных в файле (весь лист ради неё не читаем).
+        # Сторонние выгрузки нередко пишут неверный тег <dimension> (часто "A1"), а openpyxl
+        # обрезает по нему строки, поэтому читаем без него (reset_dimensions, как pd.read_excel),
+        # и ширина растёт, если прочитанные строки шире тега. Если размеров нет или тег — одна
+        # ячейка, проверки ширины в парсерах не ограничиваем
+        declared_width, declared_rows = worksheet.max_column, worksheet.max_row
+        worksheet.reset_dimensions()
+        if declared_width and declared_rows and (declared_width > 1 or declared_rows > 1):
+            self.width = declared_width
+        else:
+            self.width = MIN_ROW_WIDTH
+        self.padding = max(MIN_ROW_WIDTH, self.width)
+        self.filled_width = 0  # самая правая заполненная ячейка среди прочитанных строк
+        self.source = worksheet.iter_rows(values_only=True)
+
+    def read_row(self):
+        if self.source is None:
+            return False
+        values = next(self.source, None)
+        if values is None:
+            self.source = None
+            return False
+        row = tuple(clean_cell(value) for value in values)
+        filled = len(row)
+        while filled > self.filled_width and row[filled - 1] is None:
+            filled -= 1
+        self.filled_width = max(self.filled_width, filled)
+        self.width = max(self.width, filled)
+        self.rows.append(row + (None,) * (self.padding - len(row)))
+        return True
+
+    def read_all(self):
+        # Дочитывает лист до конца; ширина — по заполненным столбцам, как у pd.read_excel
+        while self.read_row():
+            pass
+        self.width = self.filled_width
+        return self
+
+    def __len__(self):
+        while self.read_row():
+            pass
+        return self.offset + len(self.rows)
+
+    def iter_rows(self, start=0, stop=None):
+        i = max(start, self.offset)
+        while stop is None or i < stop:
+            # Строки до start тоже дочитываются: файл читается только последовательно
+            while i >= self.offset + len(self.rows):
+                if not self.read_row():
+                    return
+            yield i, self.rows[i - self.offset]
+            i += 1
+
+    def release_rows(self, before):
+        if before > self.offset:
+            del self.rows[:before - self.offset]
+            self.offset = before
+
+# ======================================
+# Все листы книги: разбираем только листы с запрошенными таблицами
+# ======================================
+def open_workbook(file_path):
+    from openpyxl import load_workbook
+    return load_workbook(file_path, read_only=True, data_only=True)
+
+
+def iter_sheet_grids(workbook, file_path, anchors, streaming=False, report_missing=True):
+    # Якоря ищутся потоково по листам по очереди; каждая таблица берётся с первого листа,
+    # где найден её якорь. Лист без якорей в память не загружается, а когда найдены
+    # все таблицы, оставшиеся листы не открываются.
+    pending = dict(anchors)
+    for worksheet in workbook.worksheets:
+        if not pending:
+            break
+        grid = StreamingSheetGrid(worksheet)
+        table_index = build_table_index(grid, pending)
+        if not table_index:
+            continue
+        for name in table_index:
+            del pending[name]
+        print(f"[INFO] Лист '{worksheet.title}': {', '.join(table_index)}")
+
+        if not streaming:
+            # Лист с таблицами дочитываем целиком из уже открытого листа: книга
+            # читается один раз, без повторного pd.read_excel
+            grid.read_all()
+        yield grid, table_index
+
+    if pending and report_missing:
+        print(f"[WARNING] Не найдены ни на одном листе: {', '.join(pending)}")
+        note_missing_tables(file_path, pending)
+
+# ======================================
+# Индекс таблиц: один проход по листу вместо поиска в каждом парсере
+# ======================================
+def build_table_index(grid, anchors):
+    table_index = {}
+    pending = dict(anchors)
+    for i, cells in grid.iter_rows():
+        if not pending:
+            break
+        # Пока ни одного якоря не найдено, строки выше текущей не нужны ни одному парсеру
+        if not table_index:
+            grid.release_rows(i)
+        for name, matches in list(pending.items()):
+            if matches(cells):
+                table_index[name] = i
+                del pending[name]
+    return table_index
+
+
+def find_table(grid, name, anchors, table_index=None):
+    # Без готового индекса (парсер вызван отдельно) ищем только свою таблицу
+    if table_index is None:
+        table_index = build_table_index(grid, {name: anchors[name]})
+    start_row = table_index.get(name, -1)
+    if start_row == -1:
+        note_not_found()
+    return start_row
+
+# ======================================
+# Колонки таблицы по строке шапки
+# ======================================
+# Парсеры freight и Brazil Potash line-up находят колонки по подстрокам в ячейках шапки
+# ("loading", "destination", "rate ($/t) low"). Шапка одной таблицы из выпуска в выпуск
+# одна и та же, поэтому раскладка строки кэшируется по её отпечатку — правилам и ячейкам,
+# — а строки данных читаются готовым itemgetter без словаря колонок и проверок длины.
+# rules: ((поле, (подстроки, ...)), ...); ячейка достаётся первому полю, чья подстрока
+# в ней есть, как в цепочке if/elif. Подстрока-кортеж совпадает, если в ячейке есть все
+# его части: ("rate", "low").
+HEADER_CACHE_SIZE = 256
+
+
+def _header_match(needles, text):
+    return any(needle in text if isinstance(needle, str) else all(part in text for part in needle)
+               for needle in needles)
+
+
+@lru_cache(maxsize=HEADER_CACHE_SIZE)
+def header_columns(rules, cells):
+    # ((поле, индекс), ...) для одной строки шапки
+    columns = {}
+    for idx, cell in enumerate(cells):
+        if cell:
+            text = cell.lower()
+            for field, needles in rules:
+                if _header_match(needles, text):
+                    columns[field] = idx
+                    break
+    return tuple(columns.items())
+
+
+@lru_cache(maxsize=HEADER_CACHE_SIZE)
+def header_fields(rules, cells):
+    # Поля, подстроки которых есть хоть в одной ячейке строки, — без распределения
+    # ячеек по полям: одна ячейка ("ETA/ETB") может закрыть несколько полей
+    texts = [cell.lower() for cell in cells if cell]
+    return frozenset(field for field, needles in rules if any(_header_match(needles, text) for text in texts))
+
+
+@lru_cache(maxsize=HEADER_CACHE_SIZE)
+def row_extractor(indices):
+    # row -> кортеж ячеек по индексам; None в indices — колонки нет, значение None
+    present = tuple(idx for idx in indices if idx is not None)
+    if len(present) == len(indices) > 1:
+        return itemgetter(*indices)
+    getter = itemgetter(*present) if present else None
+    slots = [slot for slot, idx in enumerate(indices) if idx is not None]
+
+    def extract(row):
+        values = [None] * len(indices)
+        if len(present) == 1:
+            values[slots[0]] = getter(row)
+        elif present:
+            for slot, value in zip(slots, getter(row)):
+                values[slot] = value
+        return tuple(values)
+    return extract
+
+
+class ColumnLayout:
+    def __init__(self, header_row, columns, width):
+        self.header_row = header_row  # номер строки шапки на листе
+        self.columns = columns  # {поле: индекс колонки}
+        self.width = width  # длина строк листа: колонки за ней считаются отсутствующими
+
+    def index(self, field):
+        idx = self.columns.get(field)
+        return idx if idx is not None and idx < self.width else None
+
+    def extractor(self, fields):
+        return row_extractor(tuple(self.index(field) for field in fields))
+
+
+def find_header(grid, start, stop, rules, required=None, merge_rows=True, shared_cells=False):
+    # Шапка в строках [start, stop): первая строка, после которой найдены все поля required
+    # (по умолчанию — все поля rules). merge_rows — шапка может занимать несколько строк,
+    # колонки накапливаются; иначе каждая строка проверяется сама по себе.
+    # shared_cells — для проверки шапки достаточно, чтобы подстрока поля была в какой-нибудь
+    # ячейке, даже если саму ячейку забрало другое поле; такое поле остаётся без колонки.
+    required = required or tuple(field for field, _ in rules)
+    columns = {}
+    found = set()
+    for i, row in grid.iter_rows(start, stop):
+        if not merge_rows:
+            columns = {}
+            found = set()
+        columns.update(header_columns(rules, row))
+        found.update(header_fields(rules, row) if shared_cells else columns)
+        if all(field in found for field in required):
+            return ColumnLayout(i, columns, len(row))
+    return None
+
+# ======================================
+# Автоопределение таблиц
+# ======================================
+# Вместо списка таблиц в FILES можно указать AUTO_TABLES (или не указывать "tables"):
+# тогда ищутся якоря всех известных таблиц — тем же одним проходом по листу, —
+# и парсеры запускаются только для найденных. Отсутствие какой-то таблицы в этом
+# режиме — норма, поэтому о ненайденных не предупреждаем и в статистику их не пишем.
+AUTO_TABLES = "auto"
+
+
+def file_tables(file_info, auto=False):
+    return AUTO_TABLES if auto else file_info.get("tables", AUTO_TABLES)
+
+
+def requested_anchors(tables, anchors):
+    # Якоря запрошенных таблиц; для AUTO_TABLES — все известные
+    if tables == AUTO_TABLES:
+        return dict(anchors)
+    return {name: anchors[name] for name in tables if name in anchors}
+
+# ======================================
+# Объёмы-выражения: "2x25", "30:2", "20+15"
+# ======================================
+# Разбор без eval: небольшой рекурсивный парсер арифметики (+, -, *, /, скобки,
+# унарный знак). Знаки умножения x/X/х/Х/× и деления :/÷ из выпусков Argus
+# приводятся к * и /, запятые-разделители тысяч убираются. Одинаковые строки
+# повторяются из выпуска в выпуск, поэтому результаты кэшируются.
+# Унарные знаки разбираются циклом, вложенность скобок ограничена, так что
+# мусор в ячейке ("-----1", "((((((1") не упирается в предел рекурсии.
+VOLUME_CACHE_SIZE = 4096
+VOLUME_MAX_DEPTH = 16
+VOLUME_OPERATORS = str.maketrans({'х': '*', 'Х': '*', 'x': '*', 'X': '*', '×': '*', ':': '/', '÷': '/', ',': None})
+_VOLUME_TOKEN = re.compile(r'\s*(?:(\d+(?:\.\d*)?|\.\d+)|(\S))')
+_VOLUME_OPERATOR = re.compile(r'[+\-*/]')
+_VOLUME_DIGITS = re.compile(r'\d+')
+_VOLUME_EXPRESSION = re.compile(r'\d\s*[xXхХ×*:÷+]\s*\d')
+
+
+class _VolumeExpression:
+    def __init__(self, text):
+        self.tokens = []
+        position = 0
+        text = text.rstrip()
+        while position < len(text):
+            match = _VOLUME_TOKEN.match(text, position)
+            number, symbol = match.groups()
+            self.tokens.append(float(number) if number is not None else symbol)
+            position = match.end()
+        self.position = 0
+        self.depth = 0
+
+    def peek(self):
+        return self.tokens[self.position] if self.position < len(self.tokens) else None
+
+    def take(self):
+        token = self.peek()
+        self.position += 1
+        return token
+
+    def parse(self):
+        value = self.expression()
+        if self.peek() is not None:
+            raise ValueError("лишние символы в выражении")
+        return value
+
+    def expression(self):
+        value = self.term()
+        while self.peek() in ('+', '-'):
+            value = value + self.term() if self.take() == '+' else value - self.term()
+        return value
+
+    def term(self):
+        value = self.factor()
+        while self.peek() in ('*', '/'):
+            value = value * self.factor() if self.take() == '*' else value / self.factor()
+        return value
+
+    def factor(self):
+        sign = 1.0
+        token = self.take()
+        while token in ('+', '-'):
+            if token == '-':
+                sign = -sign
+            token = self.take()
+        if token == '(':
+            if self.depth >= VOLUME_MAX_DEPTH:
+                raise ValueError("слишком глубокая вложенность скобок")
+            self.depth += 1
+            value = self.expression()
+            self.depth -= 1
+            if self.take() != ')':
+                raise ValueError("нет закрывающей скобки")
+            return sign * value
+        if isinstance(token, float):
+            return sign * token
+        raise ValueError(f"неожиданный символ: {token!r}")
+
+
+def _balanced_parentheses(text):
+    depth = 0
+    for char in text:
+        if char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+            if depth < 0:
+                return False
+    return depth == 0
+
+
+def eval_volume_expression(text):
+    # Значение выражения или None, если это не арифметика (в т.ч. деление на ноль,
+    # несбалансированные скобки и переполнение до inf)
+    if not _balanced_parentheses(text):
+        return None
+    try:
+        value = _VolumeExpression(text).parse()
+    except (ValueError, ZeroDivisionError, OverflowError, RecursionError):
+        return None
+    return value if math.isfinite(value) else None
+
+
+@lru_cache(maxsize=VOLUME_CACHE_SIZE)
+def volume_amount(volume):
+    # Объём ячейки: выражение с операторами вычисляется, иначе берётся первое число.
+    # Как и прежний путь через eval, "25-30" считается вычитанием
+    expression = volume.translate(VOLUME_OPERATORS)
+    if not _balanced_parentheses(expression):
+        return None
+    if _VOLUME_OPERATOR.search(expression):
+        value = eval_volume_expression(expression)
+        return None if value is None else int(value)
+    digits = _VOLUME_DIGITS.search(expression)
+    return int(digits.group()) if digits else None
+
+
+@lru_cache(maxsize=VOLUME_CACHE_SIZE)
+def expression_volume(volume):
+    # Для нормализаторов, которые раньше просто склеивали цифры ("2x25" -> 225): число,
+    # если в ячейке умножение/деление/сложение между числами, иначе None.
+    # Минус сюда не входит — в этих колонках "25-30" означает диапазон
+    if not _VOLUME_EXPRESSION.search(volume):
+        return None
+    return eval_volume_expression(volume.translate(VOLUME_OPERATORS))
+
+# ======================================
+# Дата отчёта: год для дат без года
+# ======================================
+# Даты в таблицах часто без года ("12 Jul", "mid-Aug"). Год берётся из даты выпуска
+# (Publish Date), а не из текущей даты: при перепрогоне архива выпуск 2023 года получает
+# даты 2023 года, а долгоживущий процесс не застревает в году своего запуска. Месяц дальше
+# чем на полгода от месяца выпуска относится к соседнему году: "Jan" в декабрьском
+# выпуске — январь следующего года, "Dec" в январском — декабрь прошлого.
+PUBLISH_DATE_FORMAT = "%d.%m.%Y"
+
+
+def report_date_of(publish_date):
+    # Дата выпуска как datetime; нераспознанная — текущая дата, как у extract_publish_date
+    try:
+        return datetime.strptime(publish_date, PUBLISH_DATE_FORMAT)
+    except (TypeError, ValueError):
+        return datetime.now()
+
+
+def report_year(month, year, report_month):
+    # Год для месяца month в выпуске year/report_month
+    if month - report_month > 6:
+        return year - 1
+    if report_month - month > 6:
+        return year + 1
+    return year
+
+# ======================================
+# Записи в колоночном виде
+# ======================================
+# Вместо списка словарей (по 9–21 ключу на строку, в основном пустые строки) записи
+# хранятся по колонкам: на строку приходится по одной ссылке в каждой колонке.
+# Парсеры по-прежнему добавляют строку словарём — он сразу раскладывается по колонкам
+# и не хранится. record_table[i] возвращает RecordRow — представление строки с тем же
+# доступом, что у словаря (record["Low"] = ...), поэтому fill_prices и проверка
+# выбросов работают без изменений. to_frame() отдаёт DataFrame прямо из колонок.
+class RecordTable:
+    def __init__(self, columns=None):
+        self.columns = {name: list(values) for name, values in (columns or {}).items()}
+        self.length = len(next(iter(self.columns.values()))) if self.columns else 0
+
+    def __len__(self):
+        return self.length
+
+    def _add_column(self, name):
+        self.columns[name] = [""] * self.length
+
+    def append(self, record):
+        for name in record.keys() - self.columns.keys():
+            self._add_column(name)
+        for name, values in self.columns.items():
+            values.append(record.get(name, ""))
+        self.length += 1
+
+    def extend(self, records):
+        if not isinstance(records, RecordTable):
+            for record in records:
+                self.append(record)
+            return
+        for name in records.columns.keys() - self.columns.keys():
+            self._add_column(name)
+        for name, values in self.columns.items():
+            values.extend(records.columns.get(name) or [""] * records.length)
+        self.length += records.length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [RecordRow(self, i) for i in range(*index.indices(self.length))]
+        if index < 0:
+            index += self.length
+        if not 0 <= index < self.length:
+            raise IndexError(index)
+        return RecordRow(self, index)
+
+    def __iter__(self):
+        for i in range(self.length):
+            yield RecordRow(self, i)
+
+    def fill(self, name, start, value):
+        # Одно значение в колонке name для строк начиная со start
+        if name not in self.columns:
+            self._add_column(name)
+        values = self.columns[name]
+        values[start:] = [value] * (self.length - start)
+
+    def to_frame(self, columns):
+        import pandas as pd
+        return pd.DataFrame(
+            {name: self.columns.get(name) or [""] * self.length for name in columns}, columns=columns
+        )
+
+
+class RecordRow:
+    __slots__ = ("table", "index")
+
+    def __init__(self, table, index):
+        self.table = table
+        self.index = index
+
+    def __getitem__(self, name):
+        return self.table.columns[name][self.index]
+
+    def __setitem__(self, name, value):
+        if name not in self.table.columns:
+            self.table._add_column(name)
+        self.table.columns[name][self.index] = value
+
+    def get(self, name, default=None):
+        values = self.table.columns.get(name)
+        return default if values is None else values[self.index]
+
+    def keys(self):
+        return self.table.columns.keys()
+
+
+def records_frame(records, columns):
+    # Итоговая таблица: из колонок RecordTable или, как раньше, из списка словарей
+    import pandas as pd
+    if isinstance(records, RecordTable):
+        return records.to_frame(columns)
+    return pd.DataFrame(records, columns=columns)
+
+
+def record_fields(records, fields):
+    # Кортежи значений полей по записям; у RecordTable — прямо по колонкам
+    if isinstance(records, RecordTable):
+        return zip(*(records.columns.get(field) or [""] * len(records) for field in fields))
+    return (tuple(record.get(field, "") for field in fields) for record in records)
+
+
+def set_record_field(records, name, values):
+    # Колонка name целиком: values — по одному значению на запись
+    if isinstance(records, RecordTable):
+        records.columns[name] = list(values)
+        return
+    for record, value in zip(records, values):
+        record[name] = value
+
+# ======================================
+# Метка таблицы и книги-источника в записях
+# ======================================
+# Каждая запись помечается названием таблицы (TABLE_FIELD) и именем книги (SOURCE_FIELD),
+# из которых она получена: по книге и дате выпуска историческое хранилище заменяет выпуск
+# целиком. В итоговые файлы поля не попадают — они собираются по columns_order.
+TABLE_FIELD = "Table"
+SOURCE_FIELD = "Source"
+
+
+def tag_records(final_data, start, table_name, source=""):
+    if isinstance(final_data, RecordTable):
+        final_data.fill(TABLE_FIELD, start, table_name)
+        final_data.fill(SOURCE_FIELD, start, source)
+        return
+    for record in final_data[start:]:
+        record[TABLE_FIELD] = table_name
+        record[SOURCE_FIELD] = source
+
+# ======================================
+# Статистика парсеров: время, строки, пропуски, ненайденные таблицы
+# ======================================
+# Каждый вызов парсера оборачивается в parser_call: он замеряет время, считает строки,
+# которые парсер прочитал с листа (через CountingGrid), и записи, которые он добавил.
+# Парсеры отмечают пропущенные строки через note_skip(причина). Всё копится в
+# PARSE_STATS текущего процесса и выводится в JSON (stats_summary) или в текстовом
+# формате Prometheus (stats_prometheus).
+PARSE_STATS = {"calls": [], "missing": []}
+_active_calls = []
+
+
+class CountingGrid:
+    # Обёртка листа: те же строки, плюс подсчёт строк, выданных парсеру
+    def __init__(self, grid, stats):
+        self.grid = grid
+        self.stats = stats
+
+    def __getattr__(self, name):
+        return getattr(self.grid, name)
+
+    def __len__(self):
+        return len(self.grid)
+
+    def iter_rows(self, start=0, stop=None):
+        for i, row in self.grid.iter_rows(start, stop):
+            self.stats["rows_scanned"] += 1
+            yield i, row
+
+
+@contextmanager
+def parser_call(table_name, file_path, grid, final_data):
+    stats = {
+        "table": table_name, "file": os.path.basename(file_path), "seconds": 0.0,
+        "rows_scanned": 0, "rows_emitted": 0, "skipped": {}, "found": True, "error": None,
+    }
+    start = len(final_data)
+    _active_calls.append(stats)
+    started = time.perf_counter()
+    try:
+        yield CountingGrid(grid, stats)
+    except Exception as e:
+        stats["error"] = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        stats["seconds"] = time.perf_counter() - started
+        stats["rows_emitted"] = len(final_data) - start
+        _active_calls.pop()
+        PARSE_STATS["calls"].append(stats)
+        tag_records(final_data, start, table_name, stats["file"])
+
+
+def note_skip(reason):
+    # Вне parser_call (парсер вызван напрямую) отметка ничего не делает
+    if _active_calls:
+        skipped = _active_calls[-1]["skipped"]
+        skipped[reason] = skipped.get(reason, 0) + 1
+
+
+def note_not_found():
+    # Парсер не нашёл свою таблицу или её шапку на листе
+    if _active_calls:
+        _active_calls[-1]["found"] = False
+
+
+def note_missing_tables(file_path, names):
+    for name in names:
+        PARSE_STATS["missing"].append({"table": name, "file": os.path.basename(file_path)})
+
+
+def _empty_total():
+    return {"calls": 0, "seconds": 0.0, "rows_scanned": 0, "rows_emitted": 0, "skipped": {}, "not_found": 0, "errors": 0}
+
+
+def reset_stats():
+    # Долгоживущий процесс (Argus_server) начинает статистику каждого запроса заново
+    PARSE_STATS["calls"].clear()
+    PARSE_STATS["missing"].clear()
+
+
+def stats_summary():
+    tables = {}
+    for call in PARSE_STATS["calls"]:
+        total = tables.setdefault(call["table"], _empty_total())
+        total["calls"] += 1
+        total["seconds"] += call["seconds"]
+        total["rows_scanned"] += call["rows_scanned"]
+        total["rows_emitted"] += call["rows_emitted"]
+        for reason, count in call["skipped"].items():
+            total["skipped"][reason] = total["skipped"].get(reason, 0) + count
+        total["not_found"] += not call["found"]
+        total["errors"] += call["error"] is not None
+    for missing in PARSE_STATS["missing"]:
+        tables.setdefault(missing["table"], _empty_total())["not_found"] += 1
+    return {"tables": tables, "calls": PARSE_STATS["calls"], "missing": PARSE_STATS["missing"]}
+
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def stats_prometheus():
+    metrics = [
+        ("argus_parser_calls_total", "counter", "Вызовы парсера", "calls"),
+        ("argus_parser_seconds_total", "counter", "Время работы парсера, с", "seconds"),
+        ("argus_parser_rows_scanned_total", "counter", "Строки листа, прочитанные парсером", "rows_scanned"),
+        ("argus_parser_rows_emitted_total", "counter", "Записи, добавленные парсером", "rows_emitted"),
+        ("argus_parser_table_not_found_total", "counter", "Таблица или её шапка не найдена", "not_found"),
+        ("argus_parser_errors_total", "counter", "Вызовы парсера, завершившиеся исключением", "errors"),
+    ]
+    tables = stats_summary()["tables"]
+    lines = []
+    for metric, kind, help_text, key in metrics:
+        lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} {kind}"]
+        for table, total in tables.items():
+            lines.append(f'{metric}{{table="{_label(table)}"}} {total[key]:g}')
+    lines += ["# HELP argus_parser_rows_skipped_total Строки, пропущенные парсером, по причинам",
+              "# TYPE argus_parser_rows_skipped_total counter"]
+    for table, total in tables.items():
+        for reason, count in total["skipped"].items():
+            lines.append(f'argus_parser_rows_skipped_total{{table="{_label(table)}",reason="{_label(reason)}"}} {count}')
+    return '\n'.join(lines) + '\n'
+
+
+STATS_FORMATS = ('json', 'prometheus')
+
+
+def write_stats(path, stats_format='json'):
+    with open(path, 'w', encoding='utf-8') as f:
+        if stats_format == 'prometheus':
+            f.write(stats_prometheus())
+        else:
+            json.dump(stats_summary(), f, ensure_ascii=False, indent=2)
+    print(f"[INFO] Статистика парсеров сохранена в '{path}'")
+
+# ======================================
+# Кэш результатов разбора на диске
+# ======================================
+# Ключ — SHA-256 содержимого книги + имя файла + версия парсера + список таблиц:
+# неизменённая книга повторно не разбирается. Имя входит в ключ, потому что из него
+# берутся Publish Date, Agency, Product и Source записей: копия книги под другим именем
+# (другой датой) разбирается заново, а не получает записи исходного выпуска. Записи хранятся в JSON, старые файлы удаляются по LRU
+# (время последнего обращения — mtime файла кэша). RecordTable пишется по колонкам
+# под ключом RECORD_TABLE_KEY и при чтении собирается обратно.
+CACHE_DIR = '.argus_cache'
+CACHE_MAX_ENTRIES = 256
+RECORD_TABLE_KEY = '__record_table__'
+
+
+def _encode_cached(value):
+    if isinstance(value, RecordTable):
+        return {RECORD_TABLE_KEY: value.columns}
+    return str(value)
+
+
+def _decode_cached(obj):
+    if RECORD_TABLE_KEY in obj:
+        return RecordTable(obj[RECORD_TABLE_KEY])
+    return obj
+
+
+def file_sha256(file_path):
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def cache_key(file_path, parser_version, tables):
+    tables = [tables] if tables == AUTO_TABLES else list(tables)
+    key_text = '\n'.join([file_sha256(file_path), os.path.basename(file_path), str(parser_version)] + tables)
+    return hashlib.sha256(key_text.encode('utf-8')).hexdigest()
+
+
+def load_cached(key, cache_dir=CACHE_DIR):
+    cache_path = os.path.join(cache_dir, key + '.json')
+    try:
+        with open(cache_path, encoding='utf-8') as f:
+            records = json.load(f, object_hook=_decode_cached)
+        os.utime(cache_path)  # отмечаем обращение для LRU
+        return records
+    except (OSError, ValueError):
+        return None
+
+
+def save_cached(key, records, cache_dir=CACHE_DIR, max_entries=CACHE_MAX_ENTRIES):
+    os.makedirs(cache_dir, exist_ok=True)
+    cache_path = os.path.join(cache_dir, key + '.json')
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(records, f, ensure_ascii=False, default=_encode_cached)
+    os.replace(tmp_path, cache_path)
+    evict_cache(cache_dir, max_entries)
+
+
+def evict_cache(cache_dir=CACHE_DIR, max_entries=CACHE_MAX_ENTRIES):
+    entries = []
+    for name in os.listdir(cache_dir):
+        if name.endswith('.json'):
+            path = os.path.join(cache_dir, name)
+            try:
+                entries.append((os.path.getmtime(path), path))
+            except OSError:
+                continue
+    entries.sort()
+    for _, path in entries[:max(len(entries) - max_entries, 0)]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass  # файл уже удалил параллельный процесс
+
+
+def cached_parse(file_path, parser_version, tables, parse, use_cache=True):
+    # parse() разбирает книгу и возвращает записи; None (книгу не удалось открыть) не кэшируется
+    if not use_cache:
+        return parse()
+    try:
+        key = cache_key(file_path, parser_version, tables)
+    except OSError:
+        return parse()
+
+    records = load_cached(key)
+    if records is not None:
+        print(f"[INFO] Результат разбора взят из кэша: {file_path}")
+        return records
+
+    records = parse()
+    if records is not None:
+        save_cached(key, records)
+    return records
+
+# ======================================
+# Запись результата: xlsx (по умолчанию), csv, parquet, feather
+# ======================================
+# В xlsx записи уходят как есть (строками) — этот файл читает коммерческий отдел.
+# В остальных форматах колонки типизируются по column_types, чтобы при загрузке
+# ничего не приходилось разбирать: 'date' — дата из ДД.ММ.ГГГГ, 'int' и 'float' — числа.
+# Пустые и нераспознанные значения становятся пропусками (NA).
+OUTPUT_FORMATS = ('xlsx', 'csv', 'parquet', 'feather')
+
+
+def typed_frame(df, column_types):
+    import pandas as pd
+    typed = df.copy()
+    for column, kind in column_types.items():
+        if column not in typed:
+            continue
+        values = typed[column].replace('', None)
+        if kind == 'date':
+            typed[column] = pd.to_datetime(values, format='%d.%m.%Y', errors='coerce')
+        elif kind == 'int':
+            numbers = pd.to_numeric(values, errors='coerce')
+            typed[column] = numbers.where(numbers % 1 == 0).astype('Int64')
+        elif kind == 'float':
+            typed[column] = pd.to_numeric(values, errors='coerce').astype('Float64')
+    return typed
+
+
+XLSX_SHEET = 'Sheet1'  # имя листа, как у DataFrame.to_excel
+
+
+def write_xlsx_rows(rows, columns, output_file):
+    # openpyxl в режиме write_only: каждая строка сразу сериализуется во временный XML листа,
+    # в памяти не держится ни DataFrame, ни ячейки книги — память не зависит от числа строк.
+    # Пустые строки записываются пустыми ячейками, как у to_excel.
+    from openpyxl import Workbook
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(XLSX_SHEET)
+    sheet.append(list(columns))
+    count = 0
+    for row in rows:
+        sheet.append([None if value == "" else value for value in row])
+        count += 1
+    workbook.save(output_file)
+    return count
+
+
+def write_records(records, columns, output_file, output_format='xlsx', column_types=None):
+    # xlsx пишется потоково прямо из записей (RecordTable или список словарей) без DataFrame;
+    # для csv/parquet/feather нужна типизация колонок, поэтому они идут через write_output
+    if output_format == 'xlsx':
+        write_xlsx_rows(record_fields(records, columns), columns, output_file)
+        return output_file
+    return write_output(records_frame(records, columns), output_file, output_format, column_types)
+
+
+def write_output(df, output_file, output_format='xlsx', column_types=None):
+    # Возвращает путь записанного файла; для не-xlsx расширение заменяется на формат
+    if output_format == 'xlsx':
+        df.to_excel(output_file, index=False)
+        return output_file
+
+    output_path = os.path.splitext(output_file)[0] + '.' + output_format
+    typed = typed_frame(df, column_types or {})
+    try:
+        if output_format == 'csv':
+            typed.to_csv(output_path, index=False)
+        elif output_format == 'parquet':
+            typed.to_parquet(output_path, index=False)
+        elif output_format == 'feather':
+            typed.to_feather(output_path)
+        else:
+            print(f"[ERROR] Неизвестный формат вывода: {output_format}")
+            return None
+    except ImportError as e:
+        print(f"[ERROR] Формат {output_format} недоступен (нужен pyarrow): {e}")
+        return None
+    return output_path
@@ -1,7 +1,19 @@
+import argparse
 import pandas as pd
 import re
 from datetime import datetime
 import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+from Argus_common import (
+    any_cell_anchor, first_cell_anchor,
+    open_workbook, iter_sheet_grids, find_table, cached_parse,
+    OUTPUT_FORMATS, write_output
+)
+from Argus_patterns import (
+    FILE_DATE_PATTERNS, DECIMAL_NUMBER_RE, NON_DIGIT_RE, THOUSANDS_DECIMAL_RE, RANGE_SEPARATOR_RE
+)
 
 # ======================================
 # Настройки путей и параметров
@@ -30,21 +42,26 @@ FILES = [
 ]
 
 final_data = []
+STREAMING = False  # True — потоковое чтение листа, см. Argus_common.iter_sheet_grids
+PARSER_VERSION = "freight_files-1"  # версия для ключа кэша: менять при изменении парсеров
+
+# ======================================
+# Якоря таблиц (строка-заголовок каждой таблицы)
+# ======================================
+TABLE_ANCHORS = {
+    "Ammonia freight rates": any_cell_anchor(r'ammonia freight rates', re.IGNORECASE),
+    "Dry bulk fertilizer freight assessments": first_cell_anchor(r'Dry bulk fertilizer freight assessments'),
+    "Urea freight": first_cell_anchor(r'Urea freight'),
+    "Phosphate freigh": first_cell_anchor(r'Phosphate freigh'),
+    "Potash freight": any_cell_anchor(r'potash freight', re.IGNORECASE),
+}
 
 # ======================================
 # Функция извлечения даты из имени файла
 # ======================================
 def extract_publish_date(filename):
-    date_patterns = [
-        # Формат с круглыми скобками: (2025-06-12)
-        (r'(\d{4}-\d{2}-\d{2})', "%Y-%m-%d"),
-        # Формат: 12-Jun-2025
-        (r'(\d{1,2}-[a-zA-Z]{3,9}-\d{4})', "%d-%b-%Y"),
-        # Формат: 12Jun2025
-        (r'(\d{1,2}[a-zA-Z]{3,9}\d{4})', "%d%b%Y")
-    ]
-    for pattern, fmt in date_patterns:
-        match = re.search(pattern, filename, re.IGNORECASE)
+    for pattern, fmt in FILE_DATE_PATTERNS:
+        match = pattern.search(filename)
         if match:
             try:
                 date_str = match.group(1)
@@ -59,13 +76,9 @@ def extract_publish_date(filename):
 # ======================================
 # Парсинг Ammonia freight rates
 # ======================================
-def parse_ammonia_freight_rates(df, final_data, agency, product, publish_date):
+def parse_ammonia_freight_rates(grid, final_data, agency, product, publish_date, table_index=None):
     print("[INFO] Начинаем парсить таблицу 'Ammonia freight rates'...")
-    start_row = -1
-    for i, row in df.iterrows():
-        if any(cell for cell in row if isinstance(cell, str) and "ammonia freight rates" in cell.lower()):
-            start_row = i
-            break
+    start_row = find_table(grid, "Ammonia freight rates", TABLE_ANCHORS, table_index)
     if start_row == -1:
         print("[ERROR] Не найдена таблица 'Ammonia freight rates'")
         return
@@ -74,12 +87,10 @@ def parse_ammonia_freight_rates(df, final_data, agency, product, publish_date):
     volume_col = -1
     rate_change_col = -1
 
-    for i in range(start_row + 1, start_row + 5):
-        if i >= len(df): break
-        row = df.iloc[i]
+    for i, row in grid.iter_rows(start_row + 1, start_row + 5):
         for col_idx, cell in enumerate(row):
-            if isinstance(cell, str):
-                cell_clean = cell.strip().lower()
+            if cell:
+                cell_clean = cell.lower()
                 if "route" in cell_clean:
                     route_col = col_idx
                 elif "volume" in cell_clean:
@@ -95,17 +106,16 @@ def parse_ammonia_freight_rates(df, final_data, agency, product, publish_date):
         return
 
     empty_rows = 0
-    for i in range(header_row + 1, len(df)):
-        row = df.iloc[i]
-        if volume_col < len(row) and (pd.isna(row[volume_col]) or str(row[volume_col]).strip() == ""):
+    for i, row in grid.iter_rows(header_row + 1):
+        if not row[volume_col]:
             empty_rows += 1
             if empty_rows >= 3: break
             continue
         empty_rows = 0
 
-        route = str(row[route_col]).strip() if route_col < len(row) and pd.notna(row[route_col]) else ""
-        volume = str(row[volume_col]).strip() if volume_col < len(row) and pd.notna(row[volume_col]) else ""
-        rate_change = str(row[rate_change_col]).strip() if rate_change_col < len(row) and pd.notna(row[rate_change_col]) else ""
+        route = row[route_col] or ""
+        volume = row[volume_col] or ""
+        rate_change = row[rate_change_col] or ""
 
         # Разделение Route на Loading / Destination
         loading = ""
@@ -124,7 +134,7 @@ def parse_ammonia_freight_rates(df, final_data, agency, product, publish_date):
             vol = str(volume).strip().replace(' ', '')
             if any(char.isdigit() for char in vol):
                 if "-" in vol:
-                    parts = re.split(r'[-–—]', vol)
+                    parts = RANGE_SEPARATOR_RE.split(vol)
                     try:
                         parts = [int(float(p)) for p in parts]
                         avg = int(sum(parts) / len(parts))
@@ -132,7 +142,7 @@ def parse_ammonia_freight_rates(df, final_data, agency, product, publish_date):
                     except ValueError:
                         pass
                 else:
-                    digits_only = re.sub(r'[^\d]', '', vol)
+                    digits_only = NON_DIGIT_RE.sub('', vol)
                     if digits_only:
                         volume_clean = digits_only
 
@@ -154,13 +164,9 @@ def parse_ammonia_freight_rates(df, final_data, agency, product, publish_date):
 # ======================================
 # Парсинг Dry bulk fertilizer freight assessments
 # ======================================
-def parse_dry_bulk_freight(df, final_data, agency, product, publish_date):
+def parse_dry_bulk_freight(grid, final_data, agency, product, publish_date, table_index=None):
     print("[INFO] Начинаем парсить Dry bulk fertilizer freight assessments...")
-    start_row = -1
-    for i, row in df.iterrows():
-        if isinstance(row[0], str) and "Dry bulk fertilizer freight assessments" in row[0]:
-            start_row = i
-            break
+    start_row = find_table(grid, "Dry bulk fertilizer freight assessments", TABLE_ANCHORS, table_index)
     if start_row == -1:
         print("[ERROR] Не найдена таблица 'Dry bulk fertilizer freight assessments'")
         return
@@ -171,12 +177,10 @@ def parse_dry_bulk_freight(df, final_data, agency, product, publish_date):
     rate_low_col = -1
     rate_high_col = -1
 
-    for i in range(start_row + 1, start_row + 4):
-        if i >= len(df): break
-        row = df.iloc[i]
+    for i, row in grid.iter_rows(start_row + 1, start_row + 4):
         for col_idx, cell in enumerate(row):
-            if isinstance(cell, str):
-                cell_clean = cell.strip().lower()
+            if cell:
+                cell_clean = cell.lower()
                 if "loading" in cell_clean:
                     loading_col = col_idx
                 elif "destination" in cell_clean:
@@ -196,19 +200,18 @@ def parse_dry_bulk_freight(df, final_data, agency, product, publish_date):
         return
 
     empty_rows = 0
-    for i in range(header_row + 1, len(df)):
-        row = df.iloc[i]
-        if destination_col < len(row) and (pd.isna(row[destination_col]) or str(row[destination_col]).strip() == ""):
+    for i, row in grid.iter_rows(header_row + 1):
+        if not row[destination_col]:
             empty_rows += 1
             if empty_rows >= 3: break
             continue
         empty_rows = 0
 
-        loading = str(row[loading_col]).strip() if loading_col < len(row) and pd.notna(row[loading_col]) else ""
-        destination = str(row[destination_col]).strip() if destination_col < len(row) and pd.notna(row[destination_col]) else ""
-        volume = str(row[volume_col]).strip() if volume_col < len(row) and pd.notna(row[volume_col]) else ""
-        rate_low = str(row[rate_low_col]).strip() if rate_low_col < len(row) and pd.notna(row[rate_low_col]) else ""
-        rate_high = str(row[rate_high_col]).strip() if rate_high_col < len(row) and pd.notna(row[rate_high_col]) else ""
+        loading = row[loading_col] or ""
+        destination = row[destination_col] or ""
+        volume = row[volume_col] or ""
+        rate_low = row[rate_low_col] or ""
+        rate_high = row[rate_high_col] or ""
 
         # Обработка Rate
         try:
@@ -226,11 +229,11 @@ def parse_dry_bulk_freight(df, final_data, agency, product, publish_date):
             vol = str(volume).strip().replace(' ', '')
             if any(char.isdigit() for char in vol):
                 vol = vol.replace(',', '.')
-                decimal_pattern = re.compile(r'^\d+[.,]\d{3}$')
+                decimal_pattern = THOUSANDS_DECIMAL_RE
                 if decimal_pattern.match(vol):
                     volume_clean = vol.replace('.', '').replace(',', '')
                 elif '-' in vol:
-                    parts = re.split(r'[-–—]', vol)
+                    parts = RANGE_SEPARATOR_RE.split(vol)
                     try:
                         parts = [int(float(p)) for p in parts]
                         avg = int(sum(parts) / len(parts))
@@ -238,7 +241,7 @@ def parse_dry_bulk_freight(df, final_data, agency, product, publish_date):
                     except ValueError:
                         pass
                 else:
-                    digits_only = re.sub(r'[^\d]', '', vol)
+                    digits_only = NON_DIGIT_RE.sub('', vol)
                     if digits_only:
                         volume_clean = digits_only + "000"
 
@@ -257,13 +260,9 @@ def parse_dry_bulk_freight(df, final_data, agency, product, publish_date):
 # ======================================
 # Парсинг Urea freight
 # ======================================
-def parse_urea_freight(df, final_data, agency, product, publish_date):
+def parse_urea_freight(grid, final_data, agency, product, publish_date, table_index=None):
     print("[INFO] Начинаем парсить таблицу 'Urea freight'...")
-    start_row = -1
-    for i, row in df.iterrows():
-        if isinstance(row[0], str) and "Urea freight" in row[0]:
-            start_row = i
-            break
+    start_row = find_table(grid, "Urea freight", TABLE_ANCHORS, table_index)
     if start_row == -1:
         print("[ERROR] Не найдена таблица 'Urea freight'")
         return
@@ -274,12 +273,10 @@ def parse_urea_freight(df, final_data, agency, product, publish_date):
     rate_low_col = -1
     rate_high_col = -1
 
-    for i in range(start_row + 1, start_row + 4):
-        if i >= len(df): break
-        row = df.iloc[i]
+    for i, row in grid.iter_rows(start_row + 1, start_row + 4):
         for col_idx, cell in enumerate(row):
-            if isinstance(cell, str):
-                cell_clean = cell.strip().lower()
+            if cell:
+                cell_clean = cell.lower()
                 if "loading" in cell_clean:
                     loading_col = col_idx
                 elif "destination" in cell_clean:
@@ -299,19 +296,18 @@ def parse_urea_freight(df, final_data, agency, product, publish_date):
         return
 
     empty_rows = 0
-    for i in range(header_row + 1, len(df)):
-        row = df.iloc[i]
-        if destination_col < len(row) and (pd.isna(row[destination_col]) or str(row[destination_col]).strip() == ""):
+    for i, row in grid.iter_rows(header_row + 1):
+        if not row[destination_col]:
             empty_rows += 1
             if empty_rows >= 3: break
             continue
         empty_rows = 0
 
-        loading = str(row[loading_col]).strip() if loading_col < len(row) and pd.notna(row[loading_col]) else ""
-        destination = str(row[destination_col]).strip() if destination_col < len(row) and pd.notna(row[destination_col]) else ""
-        tonnage = str(row[tonnage_col]).strip() if tonnage_col < len(row) and pd.notna(row[tonnage_col]) else ""
-        rate_low = str(row[rate_low_col]).strip() if rate_low_col < len(row) and pd.notna(row[rate_low_col]) else ""
-        rate_high = str(row[rate_high_col]).strip() if rate_high_col < len(row) and pd.notna(row[rate_high_col]) else ""
+        loading = row[loading_col] or ""
+        destination = row[destination_col] or ""
+        tonnage = row[tonnage_col] or ""
+        rate_low = row[rate_low_col] or ""
+        rate_high = row[rate_high_col] or ""
 
         # Volume
         volume_clean = ""
@@ -319,11 +315,11 @@ def parse_urea_freight(df, final_data, agency, product, publish_date):
             vol = str(tonnage).strip().replace(' ', '')
             if any(char.isdigit() for char in vol):
                 vol = vol.replace(',', '.')
-                decimal_pattern = re.compile(r'^\d+[.,]\d{3}$')
+                decimal_pattern = THOUSANDS_DECIMAL_RE
                 if decimal_pattern.match(vol):
                     volume_clean = vol.replace('.', '').replace(',', '')
                 elif '-' in vol:
-                    parts = re.split(r'[-–—]', vol)
+                    parts = RANGE_SEPARATOR_RE.split(vol)
                     try:
                         parts = [int(float(p)) for p in parts]
                         avg = int(sum(parts) / len(parts))
@@ -331,7 +327,7 @@ def parse_urea_freight(df, final_data, agency, product, publish_date):
                     except ValueError:
                         pass
                 else:
-                    digits_only = re.sub(r'[^\d]', '', vol)
+                    digits_only = NON_DIGIT_RE.sub('', vol)
                     if digits_only:
                         volume_clean = digits_only + "000"
 
@@ -360,13 +356,9 @@ def parse_urea_freight(df, final_data, agency, product, publish_date):
 # ======================================
 # Парсинг Phosphate freight
 # ======================================
-def parse_phosphate_freight(df, final_data, agency, product, publish_date):
+def parse_phosphate_freight(grid, final_data, agency, product, publish_date, table_index=None):
     print("[INFO] Начинаем парсить таблицу 'Phosphate freigh'...")
-    start_row = -1
-    for i, row in df.iterrows():
-        if isinstance(row[0], str) and "Phosphate freigh" in row[0]:
-            start_row = i
-            break
+    start_row = find_table(grid, "Phosphate freigh", TABLE_ANCHORS, table_index)
     if start_row == -1:
         print("[ERROR] Не найдена таблица 'Phosphate freigh'")
         return
@@ -377,12 +369,10 @@ def parse_phosphate_freight(df, final_data, agency, product, publish_date):
     rate_combined_col = -1
 
     found = False
-    for i in range(start_row + 1, start_row + 4):
-        if i >= len(df): break
-        row = df.iloc[i]
+    for i, row in grid.iter_rows(start_row + 1, start_row + 4):
         for col_idx, cell in enumerate(row):
-            if isinstance(cell, str):
-                cell_clean = cell.strip().lower()
+            if cell:
+                cell_clean = cell.lower()
                 if "loading" in cell_clean:
                     loading_col = col_idx
                 elif "destination" in cell_clean:
@@ -401,18 +391,17 @@ def parse_phosphate_freight(df, final_data, agency, product, publish_date):
         return
 
     empty_rows = 0
-    for i in range(header_row + 1, len(df)):
-        row = df.iloc[i]
-        if destination_col < len(row) and (pd.isna(row[destination_col]) or str(row[destination_col]).strip() == ""):
+    for i, row in grid.iter_rows(header_row + 1):
+        if not row[destination_col]:
             empty_rows += 1
             if empty_rows >= 3: break
             continue
         empty_rows = 0
 
-        loading = str(row[loading_col]).strip() if loading_col < len(row) and pd.notna(row[loading_col]) else ""
-        destination = str(row[destination_col]).strip() if destination_col < len(row) and pd.notna(row[destination_col]) else ""
-        tonnage = str(row[tonnage_col]).strip() if tonnage_col < len(row) and pd.notna(row[tonnage_col]) else ""
-        rate_combined = str(row[rate_combined_col]).strip() if rate_combined_col < len(row) and pd.notna(row[rate_combined_col]) else ""
+        loading = row[loading_col] or ""
+        destination = row[destination_col] or ""
+        tonnage = row[tonnage_col] or ""
+        rate_combined = row[rate_combined_col] or ""
 
         # Volume
         volume_clean = ""
@@ -420,11 +409,11 @@ def parse_phosphate_freight(df, final_data, agency, product, publish_date):
             vol = str(tonnage).strip().replace(' ', '')
             if any(char.isdigit() for char in vol):
                 vol = vol.replace(',', '.')
-                decimal_pattern = re.compile(r'^\d+[.,]\d{3}$')
+                decimal_pattern = THOUSANDS_DECIMAL_RE
                 if decimal_pattern.match(vol):
                     volume_clean = vol.replace('.', '').replace(',', '')
                 elif '-' in vol:
-                    parts = re.split(r'[-–—]', vol)
+                    parts = RANGE_SEPARATOR_RE.split(vol)
                     try:
                         parts = [int(float(p)) for p in parts]
                         avg = int(sum(parts) / len(parts))
@@ -432,7 +421,7 @@ def parse_phosphate_freight(df, final_data, agency, product, publish_date):
                     except ValueError:
                         pass
                 else:
-                    digits_only = re.sub(r'[^\d]', '', vol)
+                    digits_only = NON_DIGIT_RE.sub('', vol)
                     if digits_only:
                         volume_clean = digits_only + "000"
 
@@ -440,7 +429,7 @@ def parse_phosphate_freight(df, final_data, agency, product, publish_date):
         rate_low_clean = ""
         rate_high_clean = ""
         if rate_combined:
-            rates = re.findall(r'(\d+\.?\d*)', rate_combined)
+            rates = DECIMAL_NUMBER_RE.findall(rate_combined)
             if len(rates) >= 2:
                 try:
                     rate_low_clean = float(rates[0])
@@ -469,13 +458,9 @@ def parse_phosphate_freight(df, final_data, agency, product, publish_date):
 # ======================================
 # Парсинг Potash freight
 # ======================================
-def parse_potash_freight(df, final_data, agency, product, publish_date):
+def parse_potash_freight(grid, final_data, agency, product, publish_date, table_index=None):
     print("[INFO] Начинаем парсить таблицу 'Potash freight'...")
-    start_row = -1
-    for i, row in df.iterrows():
-        if any(cell for cell in row if isinstance(cell, str) and "potash freight" in cell.lower()):
-            start_row = i
-            break
+    start_row = find_table(grid, "Potash freight", TABLE_ANCHORS, table_index)
     if start_row == -1:
         print("[ERROR] Не найдена таблица 'Potash freight'")
         return
@@ -486,12 +471,10 @@ def parse_potash_freight(df, final_data, agency, product, publish_date):
     rate_col = -1
 
     found = False
-    for i in range(start_row + 1, start_row + 5):
-        if i >= len(df): break
-        row = df.iloc[i]
+    for i, row in grid.iter_rows(start_row + 1, start_row + 5):
         for col_idx, cell in enumerate(row):
-            if isinstance(cell, str):
-                cell_clean = cell.strip().lower()
+            if cell:
+                cell_clean = cell.lower()
                 if "loading" in cell_clean:
                     loading_col = col_idx
                 elif "destination" in cell_clean:
@@ -510,18 +493,17 @@ def parse_potash_freight(df, final_data, agency, product, publish_date):
         return
 
     empty_rows = 0
-    for i in range(header_row + 1, len(df)):
-        row = df.iloc[i]
-        if destination_col < len(row) and (pd.isna(row[destination_col]) or str(row[destination_col]).strip() == ""):
+    for i, row in grid.iter_rows(header_row + 1):
+        if not row[destination_col]:
             empty_rows += 1
             if empty_rows >= 3: break
             continue
         empty_rows = 0
 
-        loading = str(row[loading_col]).strip() if loading_col < len(row) and pd.notna(row[loading_col]) else ""
-        destination = str(row[destination_col]).strip() if destination_col < len(row) and pd.notna(row[destination_col]) else ""
-        mop_volume = str(row[volume_col]).strip() if volume_col < len(row) and pd.notna(row[volume_col]) else ""
-        rate_value = str(row[rate_col]).strip() if rate_col < len(row) and pd.notna(row[rate_col]) else ""
+        loading = row[loading_col] or ""
+        destination = row[destination_col] or ""
+        mop_volume = row[volume_col] or ""
+        rate_value = (row[rate_col] or "") if rate_col < len(row) else ""
 
         # Volume
         volume_clean = ""
@@ -529,7 +511,7 @@ def parse_potash_freight(df, final_data, agency, product, publish_date):
             vol = mop_volume.replace(" ", "")
             if any(char.isdigit() for char in vol):
                 if "-" in vol:
-                    parts = re.split(r'[-–—]', vol)
+                    parts = RANGE_SEPARATOR_RE.split(vol)
                     try:
                         parts = [int(float(p)) for p in parts]
                         avg = int(sum(parts) / len(parts))
@@ -537,7 +519,7 @@ def parse_potash_freight(df, final_data, agency, product, publish_date):
                     except ValueError:
                         pass
                 else:
-                    digits_only = re.sub(r'[^\d]', '', vol)
+                    digits_only = NON_DIGIT_RE.sub('', vol)
                     if digits_only:
                         volume_clean = digits_only + "000"
 
@@ -545,7 +527,7 @@ def parse_potash_freight(df, final_data, agency, product, publish_date):
         rate_low_clean = ""
         rate_high_clean = ""
         if rate_value:
-            rates = re.findall(r'(\d+\.?\d*)', rate_value)
+            rates = DECIMAL_NUMBER_RE.findall(rate_value)
             if len(rates) >= 2:
                 try:
                     rate_low_clean = float(rates[0])
@@ -572,18 +554,19 @@ def parse_potash_freight(df, final_data, agency, product, publish_date):
         })
 
 # ======================================
-# Основной цикл парсинга
+# Парсинг одной книги (при --workers > 1 — в отдельном процессе)
 # ======================================
-for file_info in FILES:
+def parse_workbook(file_info):
+    file_data = []
     file_path = file_info["path"]
     tables_to_parse = file_info["tables"]
     print(f"[INFO] Загружаем файл: {file_path}")
 
     try:
-        df = pd.read_excel(file_path, header=None, engine='openpyxl')
+        workbook = open_workbook(file_path)
     except Exception as e:
         print(f"[ERROR] Ошибка при загрузке файла: {e}")
-        continue
+        return None
 
     file_name = os.path.basename(file_path).replace('.xlsx', '')
     first_part = file_name.split('_')[0].strip() if '_' in file_name else file_name
@@ -592,29 +575,71 @@ for file_info in FILES:
     product = ' '.join(parts[1:]) if len(parts) >= 2 else ''
     publish_date = extract_publish_date(file_name)
 
-    if "Ammonia freight rates" in tables_to_parse:
-        parse_ammonia_freight_rates(df, final_data, agency, product, publish_date)
-    if "Dry bulk fertilizer freight assessments" in tables_to_parse:
-        parse_dry_bulk_freight(df, final_data, agency, product, publish_date)
-    if "Urea freight" in tables_to_parse:
-        parse_urea_freight(df, final_data, agency, product, publish_date)
-    if "Phosphate freigh" in tables_to_parse:
-        parse_phosphate_freight(df, final_data, agency, product, publish_date)
-    if "Potash freight" in tables_to_parse:
-        parse_potash_freight(df, final_data, agency, product, publish_date)
+    # Листы с запрошенными таблицами; строки-заголовки найдены за один проход по каждому листу
+    anchors = {name: TABLE_ANCHORS[name] for name in tables_to_parse if name in TABLE_ANCHORS}
+    for grid, table_index in iter_sheet_grids(workbook, file_path, anchors, STREAMING):
+        if "Ammonia freight rates" in table_index:
+            parse_ammonia_freight_rates(grid, file_data, agency, product, publish_date, table_index)
+        if "Dry bulk fertilizer freight assessments" in table_index:
+            parse_dry_bulk_freight(grid, file_data, agency, product, publish_date, table_index)
+        if "Urea freight" in table_index:
+            parse_urea_freight(grid, file_data, agency, product, publish_date, table_index)
+        if "Phosphate freigh" in table_index:
+            parse_phosphate_freight(grid, file_data, agency, product, publish_date, table_index)
+        if "Potash freight" in table_index:
+            parse_potash_freight(grid, file_data, agency, product, publish_date, table_index)
+    workbook.close()
+    return file_data
+
+def load_workbook_records(file_info, use_cache=True):
+    file_data = cached_parse(
+        file_info["path"], PARSER_VERSION, file_info["tables"], lambda: parse_workbook(file_info), use_cache
+    )
+    return file_data if file_data is not None else []
 
 # ======================================
-# Сохраняем результат в Excel
+# Основной цикл парсинга
 # ======================================
-if final_data:
-    columns_order = [
-        "Publish Date", "Agency", "Product", "Loading", "Destination", 
-        "Volume", "Rate Low", "Rate High", "Rate change"
-    ]
-    result_df = pd.DataFrame(final_data, columns=columns_order)
-    output_file = 'freight_processed.xlsx'
-    result_df.to_excel(output_file, index=False)
-    print(f"✅ Данные успешно обработаны и сохранены в '{output_file}'")
-    print(f"Обработано записей: {len(final_data)}")
-else:
-    print("⚠️ Не найдено данных для сохранения")
+def parse_all(files, workers=1, use_cache=True):
+    all_data = []
+    if workers > 1:
+        # pool.map отдаёт результаты в порядке files, поэтому итог не зависит от того,
+        # какой процесс закончил раньше
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for file_data in pool.map(load_workbook_records, files, repeat(use_cache)):
+                all_data.extend(file_data)
+    else:
+        for file_info in files:
+            all_data.extend(load_workbook_records(file_info, use_cache))
+    return all_data
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Парсинг таблиц фрахта из книг Argus")
+    arg_parser.add_argument("--workers", type=int, default=1,
+                            help="число процессов; каждая книга из FILES разбирается в своём процессе")
+    arg_parser.add_argument("--no-cache", action="store_true",
+                            help="разобрать книги заново, не используя кэш результатов")
+    arg_parser.add_argument("--format", dest="formats", nargs="+", choices=OUTPUT_FORMATS, default=["xlsx"],
+                            help="форматы итогового файла (по умолчанию xlsx)")
+    args = arg_parser.parse_args()
+
+    final_data.extend(parse_all(FILES, args.workers, not args.no_cache))
+
+    # Сохраняем результат в Excel
+    if final_data:
+        columns_order = [
+            "Publish Date", "Agency", "Product", "Loading", "Destination", 
+            "Volume", "Rate Low", "Rate High", "Rate change"
+        ]
+        # Типы колонок для csv/parquet/feather (xlsx пишется строками); Rate change остаётся текстом
+        output_types = {"Publish Date": "date", "Volume": "int", "Rate Low": "float", "Rate High": "float"}
+        result_df = pd.DataFrame(final_data, columns=columns_order)
+        output_file = 'freight_processed.xlsx'
+        for output_format in args.formats:
+            saved_file = write_output(result_df, output_file, output_format, output_types)
+            if saved_file:
+                print(f"✅ Данные успешно обработаны и сохранены в '{saved_file}'")
+        print(f"Обработано записей: {len(final_data)}")
+    else:
+        print("⚠️ Не найдено данных для сохранения")
@@ -1,8 +1,19 @@
-import pandas as pd
+import argparse
 import re
 from datetime import datetime
 import os
 
+from Argus_common import (
+    any_cell_anchor, first_cell_anchor,
+    open_workbook, iter_sheet_grids, build_table_index, find_table, cached_parse,
+    OUTPUT_FORMATS, write_records, file_tables, requested_anchors, AUTO_TABLES, RecordTable, parser_call, note_skip, note_not_found,
+    STATS_FORMATS, write_stats, find_header
+)
+from Argus_patterns import (
+    FILE_DATE_PATTERNS, DECIMAL_NUMBER_RE, NON_DIGIT_RE, THOUSANDS_DECIMAL_RE, RANGE_SEPARATOR_RE
+)
+from Argus_store import STORE_FILE, save_to_store
+
 # ======================================
 # Настройки путей и параметров
 # ======================================
@@ -14,24 +25,26 @@ FILES = [
     }
 ]
 
-final_data = []
+final_data = RecordTable()
+STREAMING = False  # True — потоковое чтение листа, см. Argus_common.iter_sheet_grids
+
+# ======================================
+# Якоря таблиц (строка-заголовок каждой таблицы)
+# ======================================
+TABLE_ANCHORS = {
+    "Ammonia freight rates": any_cell_anchor(r'ammonia freight rates', re.IGNORECASE),
+    "Dry bulk fertilizer freight assessments": first_cell_anchor(r'Dry bulk fertilizer freight assessments'),
+    "Urea freight": first_cell_anchor(r'Urea freight'),
+    "Phosphate freigh": first_cell_anchor(r'Phosphate freigh'),
+    "Potash freight": any_cell_anchor(r'potash freight', re.IGNORECASE),
+}
 
 # ======================================
 # Функция извлечения даты из имени файла
 # ======================================
 def extract_publish_date(filename):
-    date_patterns = [
-        # Формат с круглыми скобками: (2025-06-12)
-        (r'(\d{4}-\d{2}-\d{2})', "%Y-%m-%d"),
-        # Формат: 2025-06-11
-        (r'(\d{4}-\d{2}-\d{2})', "%Y-%m-%d"),
-        # Формат: 12-Jun-2025
-        (r'(\d{1,2}-[a-zA-Z]{3,9}-\d{4})', "%d-%b-%Y"),
-        # Формат: 12Jun2025
-        (r'(\d{1,2}[a-zA-Z]{3,9}\d{4})', "%d%b%Y")
-    ]
-    for pattern, fmt in date_patterns:
-        match = re.search(pattern, filename, re.IGNORECASE)
+    for pattern, fmt in FILE_DATE_PATTERNS:
+        match = pattern.search(filename)
         if match:
             try:
                 date_str = match.group(1)
@@ -46,51 +59,46 @@ def extract_publish_date(filename):
 # ======================================
 # Парсинг  Ammonia freight rates
 # ======================================
-def parse_ammonia_freight_rates(df, final_data, agency, product, publish_date):
+def parse_ammonia_freight_rates(grid, final_data, agency, product, publish_date, table_index=None):
     print("[INFO] Начинаем парсить таблицу 'Ammonia freight rates'...")
     
     # 1. Находим начало таблицы по заголовку (регистр не важен)
-    start_row = -1
-    for i, row in df.iterrows():
-        if any(cell for cell in row if isinstance(cell, str) and "ammonia freight rates" in cell.lower()):
-            start_row = i
-            break
+    start_row = find_table(grid, "Ammonia freight rates", TABLE_ANCHORS, table_index)
     if start_row == -1:
         print("[ERROR] Не найдена таблица 'Ammonia freight rates'")
         return
 
     # 2. Ищем строку с заголовком "Route"
     route_header_row = -1
-    for i in range(start_row + 1, start_row + 5):
-        if i >= len(df):
-            break
-        row = df.iloc[i]
-        if isinstance(row[0], str) and "route" in row[0].lower():
+    for i, row in grid.iter_rows(start_row + 1, start_row + 5):
+        if "route" in (row[0] or "").lower():
             route_header_row = i
             break
     if route_header_row == -1:
         print("[ERROR] Не найден заголовок 'Route'")
+        note_not_found()
         return
 
     # 3. Парсим данные, начиная со строки после "Route"
     empty_rows = 0
-    for i in range(route_header_row + 1, len(df)):
-        row = df.iloc[i]
+    for i, row in grid.iter_rows(route_header_row + 1):
 
         # Пропускаем пустые строки
-        if all(pd.isna(cell) or str(cell).strip() == "" for cell in row):
+        if not any(row):
+            note_skip("empty")
             continue
 
         # Получаем значения ячеек
-        route = str(row[0]).strip() if pd.notna(row[0]) else ""
-        volume = str(row[1]).strip() if len(row) > 1 and pd.notna(row[1]) else ""
-        rate_change = str(row[2]).strip() if len(row) > 2 and pd.notna(row[2]) else ""
+        route = row[0] or ""
+        volume = row[1] or ""
+        rate_change = row[2] or ""
 
         # Пропускаем строки, где во втором столбце (Volume) пусто
         if not volume:
             empty_rows += 1
             if empty_rows >= 3:
                 break
+            note_skip("empty")
             continue
         empty_rows = 0
 
@@ -111,7 +119,7 @@ def parse_ammonia_freight_rates(df, final_data, agency, product, publish_date):
             vol = volume.replace(" ", "")
             if any(char.isdigit() for char in vol):
                 if "-" in vol:
-                    parts = re.split(r'[-–—]', vol)
+                    parts = RANGE_SEPARATOR_RE.split(vol)
                     try:
                         parts = [int(float(p)) for p in parts]
                         avg = int(sum(parts) / len(parts))
@@ -119,7 +127,7 @@ def parse_ammonia_freight_rates(df, final_data, agency, product, publish_date):
                     except ValueError:
                         volume_clean = ""
                 else:
-                    digits_only = re.sub(r'[^\d]', '', vol)
+                    digits_only = NON_DIGIT_RE.sub('', vol)
                     if digits_only:
                         volume_clean = digits_only 
                     else:
@@ -147,76 +155,50 @@ def parse_ammonia_freight_rates(df, final_data, agency, product, publish_date):
 # ======================================
 # Парсинг Dry bulk fertilizer freight assessments
 # ======================================
-def parse_dry_bulk_freight(df, final_data, agency, product, publish_date, file_name_short):
+DRY_BULK_COLUMNS = (
+    ("loading", ("loading",)),
+    ("destination", ("destination",)),
+    ("volume", ("ooot", "volume")),
+    ("rate_low", ("rate ($/t) low", "rate low")),
+    ("rate_high", ("rate ($/t) high", "rate high")),
+)
+
+
+def parse_dry_bulk_freight(grid, final_data, agency, product, publish_date, file_name_short, table_index=None):
     print("[INFO] Начинаем парсить Dry bulk fertilizer freight assessments...")
     
     # 1. Находим начало таблицы по названию
-    start_row = -1
-    for i, row in df.iterrows():
-        if isinstance(row[0], str) and "Dry bulk fertilizer freight assessments" in row[0]:
-            start_row = i
-            break
-    
+    start_row = find_table(grid, "Dry bulk fertilizer freight assessments", TABLE_ANCHORS, table_index)
     if start_row == -1:
         print("[ERROR] Не найдена таблица 'Dry bulk fertilizer freight assessments'")
         return
     
-    # 2. Ищем колонку "Loading" в следующих строках
-    loading_col = -1
-    destination_col = -1
-    volume_col = -1
-    rate_low_col = -1
-    rate_high_col = -1
-    
-    # Проверяем следующие 3 строки после заголовка таблицы
-    for i in range(start_row + 1, start_row + 4):
-        if i >= len(df):
-            break
-            
-        row = df.iloc[i]
-        for col_idx, cell in enumerate(row):
-            if isinstance(cell, str):
-                cell_clean = cell.strip().lower()
-                if "loading" in cell_clean:
-                    loading_col = col_idx
-                elif "destination" in cell_clean:
-                    destination_col = col_idx
-                elif "ooot" in cell_clean or "volume" in cell_clean:
-                    volume_col = col_idx
-                elif "rate ($/t) low" in cell_clean or "rate low" in cell_clean:
-                    rate_low_col = col_idx
-                elif "rate ($/t) high" in cell_clean or "rate high" in cell_clean:
-                    rate_high_col = col_idx
-        
-        # Если нашли все нужные колонки, запоминаем строку с заголовками
-        if loading_col != -1 and destination_col != -1 and volume_col != -1 and rate_low_col != -1 and rate_high_col != -1:
-            header_row = i
-            break
-    
-    if loading_col == -1:
-        print("[ERROR] Не найдена колонка 'Loading'")
+    # 2. Ищем колонки в следующих 3 строках после заголовка таблицы
+    layout = find_header(grid, start_row + 1, start_row + 4, DRY_BULK_COLUMNS)
+    if layout is None:
+        print("[ERROR] Не найдены необходимые колонки для таблицы 'Dry bulk fertilizer freight assessments'")
+        note_not_found()
         return
+    destination_col = layout.index("destination")
+    extract = layout.extractor(("loading", "destination", "volume", "rate_low", "rate_high"))
     
     # 3. Парсим данные
     empty_rows = 0
-    for i in range(header_row + 1, len(df)):
-        row = df.iloc[i]
+    for i, row in grid.iter_rows(layout.header_row + 1):
         
         # Проверяем второй столбец (Destination) на пустоту
-        if destination_col < len(row) and (pd.isna(row[destination_col]) or str(row[destination_col]).strip() == ""):
+        if not row[destination_col]:
             empty_rows += 1
             if empty_rows >= 3:
                 break
+            note_skip("empty")
             continue
         
         empty_rows = 0
         
         # Получаем данные из строки
-        loading = str(row[loading_col]).strip() if loading_col < len(row) and pd.notna(row[loading_col]) else ""
-        destination = str(row[destination_col]).strip() if destination_col < len(row) and pd.notna(row[destination_col]) else ""
-        volume = str(row[volume_col]).strip() if volume_col < len(row) and pd.notna(row[volume_col]) else ""
-        rate_low = str(row[rate_low_col]).strip() if rate_low_col < len(row) and pd.notna(row[rate_low_col]) else ""
-        rate_high = str(row[rate_high_col]).strip() if rate_high_col < len(row) and pd.notna(row[rate_high_col]) else ""
+        loading, destination, volume, rate_low, rate_high = extract(row)
+        loading = loading or ""
 
         # --- Rate Low обработка ---
         try:
@@ -241,13 +223,13 @@ def parse_dry_bulk_freight(df, final_data, agency, product, publish_date, file_n
                 vol = vol.replace(',', '.')
 
                 # Проверка формата с . или , и тремя нулями после
-                decimal_pattern = re.compile(r'^\d+[.,]\d{3}$')
+                decimal_pattern = THOUSANDS_DECIMAL_RE
                 if decimal_pattern.match(vol):
                     # Оставляем как есть, убираем точку/запятую
                     volume_clean = vol.replace('.', '').replace(',', '')
                 elif '-' in vol:
                     # Диапазон: вычисляем среднее и добавляем 000
-                    parts = re.split(r'[-–—]', vol)
+                    parts = RANGE_SEPARATOR_RE.split(vol)
                     try:
                         parts = [int(float(p)) for p in parts]
                         avg = int(sum(parts) / len(parts))
@@ -257,7 +239,7 @@ def parse_dry_bulk_freight(df, final_data, agency, product, publish_date, file_n
                         volume_clean = ""
                 else:
                     # Простое число: убираем всё кроме цифр и добавляем 000
-                    digits_only = re.sub(r'[^\d]', '', vol)
+                    digits_only = NON_DIGIT_RE.sub('', vol)
                     if digits_only:
                         volume_clean = digits_only + "000"
                     else:
@@ -284,77 +266,50 @@ def parse_dry_bulk_freight(df, final_data, agency, product, publish_date, file_n
 # ======================================
 # Парсинг Urea freight
 # ======================================
-def parse_urea_freight(df, final_data, agency, product, publish_date):
+UREA_COLUMNS = (
+    ("loading", ("loading",)),
+    ("destination", ("destination",)),
+    ("tonnage", ("tonnage", "volume")),
+    ("rate_low", ("rate ($/t) low", "low")),
+    ("rate_high", ("rate ($/t) high", "high")),
+)
+
+
+def parse_urea_freight(grid, final_data, agency, product, publish_date, table_index=None):
     print("[INFO] Начинаем парсить таблицу 'Urea freight'...")
 
     # 1. Находим начало таблицы по заголовку
-    start_row = -1
-    for i, row in df.iterrows():
-        if isinstance(row[0], str) and "Urea freight" in row[0]:
-            start_row = i
-            break
-
+    start_row = find_table(grid, "Urea freight", TABLE_ANCHORS, table_index)
     if start_row == -1:
         print("[ERROR] Не найдена таблица 'Urea freight'")
         return
 
-    # 2. Ищем нужные колонки
-    loading_col = -1
-    destination_col = -1
-    tonnage_col = -1
-    rate_low_col = -1
-    rate_high_col = -1
-
-    # Проверяем следующие 3 строки после заголовка
-    for i in range(start_row + 1, start_row + 4):
-        if i >= len(df):
-            break
-
-        row = df.iloc[i]
-        for col_idx, cell in enumerate(row):
-            if isinstance(cell, str):
-                cell_clean = cell.strip().lower()
-                if "loading" in cell_clean:
-                    loading_col = col_idx
-                elif "destination" in cell_clean:
-                    destination_col = col_idx
-                elif "tonnage" in cell_clean or "volume" in cell_clean:
-                    tonnage_col = col_idx
-                elif "rate ($/t) low" in cell_clean or "low" in cell_clean:
-                    rate_low_col = col_idx
-                elif "rate ($/t) high" in cell_clean or "high" in cell_clean:
-                    rate_high_col = col_idx
-
-        # Если нашли все нужные колонки, запоминаем заголовочную строку
-        if (loading_col != -1 and destination_col != -1 and tonnage_col != -1 and
-            rate_low_col != -1 and rate_high_col != -1):
-            header_row = i
-            break
-
-    if loading_col == -1:
-        print("[ERROR] Не найдена колонка 'Loading'")
+    # 2. Ищем нужные колонки в следующих 3 строках после заголовка
+    layout = find_header(grid, start_row + 1, start_row + 4, UREA_COLUMNS)
+    if layout is None:
+        print("[ERROR] Не найдены необходимые колонки для таблицы 'Urea freight'")
+        note_not_found()
         return
+    destination_col = layout.index("destination")
+    extract = layout.extractor(("loading", "destination", "tonnage", "rate_low", "rate_high"))
 
     # 3. Парсим данные
     empty_rows = 0
-    for i in range(header_row + 1, len(df)):
-        row = df.iloc[i]
+    for i, row in grid.iter_rows(layout.header_row + 1):
 
         # Проверяем Destination на пустоту
-        if destination_col < len(row) and (pd.isna(row[destination_col]) or str(row[destination_col]).strip() == ""):
+        if not row[destination_col]:
             empty_rows += 1
             if empty_rows >= 3:
                 break
+            note_skip("empty")
             continue
 
         empty_rows = 0
 
         # Получаем значения ячеек
-        loading = str(row[loading_col]).strip() if loading_col < len(row) and pd.notna(row[loading_col]) else ""
-        destination = str(row[destination_col]).strip() if destination_col < len(row) and pd.notna(row[destination_col]) else ""
-        tonnage = str(row[tonnage_col]).strip() if tonnage_col < len(row) and pd.notna(row[tonnage_col]) else ""
-        rate_low = str(row[rate_low_col]).strip() if rate_low_col < len(row) and pd.notna(row[rate_low_col]) else ""
-        rate_high = str(row[rate_high_col]).strip() if rate_high_col < len(row) and pd.notna(row[rate_high_col]) else ""
+        loading, destination, tonnage, rate_low, rate_high = extract(row)
+        loading = loading or ""
 
         # --- Tonnage -> Volume ---
         volume_clean = ""
@@ -366,11 +321,11 @@ def parse_urea_freight(df, final_data, agency, product, publish_date):
                 # Заменяем запятую на точку
                 vol = vol.replace(',', '.')
 
-                decimal_pattern = re.compile(r'^\d+[.,]\d{3}$')
+                decimal_pattern = THOUSANDS_DECIMAL_RE
                 if decimal_pattern.match(vol):
                     volume_clean = vol.replace('.', '').replace(',', '')
                 elif '-' in vol:
-                    parts = re.split(r'[-–—]', vol)
+                    parts = RANGE_SEPARATOR_RE.split(vol)
                     try:
                         parts = [int(float(p)) for p in parts]
                         avg = int(sum(parts) / len(parts))
@@ -378,7 +333,7 @@ def parse_urea_freight(df, final_data, agency, product, publish_date):
                     except ValueError:
                         volume_clean = ""
                 else:
-                    digits_only = re.sub(r'[^\d]', '', vol)
+                    digits_only = NON_DIGIT_RE.sub('', vol)
                     if digits_only:
                         volume_clean = digits_only + "000"
                     else:
@@ -416,75 +371,50 @@ def parse_urea_freight(df, final_data, agency, product, publish_date):
 # ======================================
 # Парсинг Phosphate freight
 # ======================================
-def parse_phosphate_freight(df, final_data, agency, product, publish_date):
+# Rate ($/t) Low/High — одна колонка "Low-High"
+PHOSPHATE_COLUMNS = (
+    ("loading", ("loading",)),
+    ("destination", ("destination",)),
+    ("tonnage", ("tonnage", "volume")),
+    ("rate", (("rate", "low"), ("rate", "high"))),
+)
+
+
+def parse_phosphate_freight(grid, final_data, agency, product, publish_date, table_index=None):
     print("[INFO] Начинаем парсить таблицу 'Phosphate freight'...")
 
     # 1. Находим начало таблицы по заголовку
-    start_row = -1
-    for i, row in df.iterrows():
-        if isinstance(row[0], str) and "Phosphate freigh" in row[0]:
-            start_row = i
-            break
-
+    start_row = find_table(grid, "Phosphate freigh", TABLE_ANCHORS, table_index)
     if start_row == -1:
         print("[ERROR] Не найдена таблица 'Phosphate freigh'")
         return
 
-    # 2. Ищем нужные колонки
-    loading_col = -1
-    destination_col = -1
-    tonnage_col = -1
-    rate_combined_col = -1  # Для Rate ($/£) Low/High
-
-    # Проверяем следующие 3 строки после заголовка
-    found = False
-    for i in range(start_row + 1, start_row + 4):
-        if i >= len(df):
-            break
-
-        row = df.iloc[i]
-        for col_idx, cell in enumerate(row):
-            if isinstance(cell, str):
-                cell_clean = cell.strip().lower()
-                if "loading" in cell_clean:
-                    loading_col = col_idx
-                elif "destination" in cell_clean:
-                    destination_col = col_idx
-                elif "tonnage" in cell_clean or "volume" in cell_clean:
-                    tonnage_col = col_idx
-                elif "rate" in cell_clean and ("low" in cell_clean or "high" in cell_clean):
-                    rate_combined_col = col_idx
-
-        # Проверяем, нашли ли все нужные колонки
-        if (loading_col != -1 and destination_col != -1 and tonnage_col != -1 and
-            rate_combined_col != -1):
-            header_row = i
-            found = True
-            break
-
-    if not found:
+    # 2. Ищем нужные колонки в следующих 3 строках после заголовка
+    layout = find_header(grid, start_row + 1, start_row + 4, PHOSPHATE_COLUMNS)
+    if layout is None:
         print("[ERROR] Не найдены необходимые колонки для таблицы 'Phosphate freigh'")
+        note_not_found()
         return
+    destination_col = layout.index("destination")
+    extract = layout.extractor(("loading", "destination", "tonnage", "rate"))
 
     # 3. Парсим данные
     empty_rows = 0
-    for i in range(header_row + 1, len(df)):
-        row = df.iloc[i]
+    for i, row in grid.iter_rows(layout.header_row + 1):
 
         # Проверяем Destination на пустоту
-        if destination_col < len(row) and (pd.isna(row[destination_col]) or str(row[destination_col]).strip() == ""):
+        if not row[destination_col]:
             empty_rows += 1
             if empty_rows >= 3:
                 break
+            note_skip("empty")
             continue
 
         empty_rows = 0
 
         # Получаем значения ячеек
-        loading = str(row[loading_col]).strip() if loading_col < len(row) and pd.notna(row[loading_col]) else ""
-        destination = str(row[destination_col]).strip() if destination_col < len(row) and pd.notna(row[destination_col]) else ""
-        tonnage = str(row[tonnage_col]).strip() if tonnage_col < len(row) and pd.notna(row[tonnage_col]) else ""
-        rate_combined = str(row[rate_combined_col]).strip() if rate_combined_col < len(row) and pd.notna(row[rate_combined_col]) else ""
+        loading, destination, tonnage, rate_combined = extract(row)
+        loading = loading or ""
 
         # --- Tonnage -> Volume ---
         volume_clean = ""
@@ -496,11 +426,11 @@ def parse_phosphate_freight(df, final_data, agency, product, publish_date):
                 # Заменяем запятую на точку
                 vol = vol.replace(',', '.')
 
-                decimal_pattern = re.compile(r'^\d+[.,]\d{3}$')
+                decimal_pattern = THOUSANDS_DECIMAL_RE
                 if decimal_pattern.match(vol):
                     volume_clean = vol.replace('.', '').replace(',', '')
                 elif '-' in vol:
-                    parts = re.split(r'[-–—]', vol)
+                    parts = RANGE_SEPARATOR_RE.split(vol)
                     try:
                         parts = [int(float(p)) for p in parts]
                         avg = int(sum(parts) / len(parts))
@@ -508,7 +438,7 @@ def parse_phosphate_freight(df, final_data, agency, product, publish_date):
                     except ValueError:
                         volume_clean = ""
                 else:
-                    digits_only = re.sub(r'[^\d]', '', vol)
+                    digits_only = NON_DIGIT_RE.sub('', vol)
                     if digits_only:
                         volume_clean = digits_only + "000"
                     else:
@@ -524,7 +454,7 @@ def parse_phosphate_freight(df, final_data, agency, product, publish_date):
 
         if rate_combined:
             # Пробуем разделить строку на Low и High
-            rates = re.findall(r'(\d+\.?\d*)', rate_combined)
+            rates = DECIMAL_NUMBER_RE.findall(rate_combined)
             if len(rates) >= 2:
                 try:
                     rate_low_clean = float(rates[0])
@@ -557,71 +487,49 @@ def parse_phosphate_freight(df, final_data, agency, product, publish_date):
 # ======================================
 # Парсинг Potash freight
 # ======================================
-def parse_potash_freight(df, final_data, agency, product, publish_date):
+POTASH_COLUMNS = (
+    ("loading", ("loading",)),
+    ("destination", ("destination",)),
+    ("volume", ("mop ooot", "volume")),
+)
+
+
+def parse_potash_freight(grid, final_data, agency, product, publish_date, table_index=None):
     print("[INFO] Начинаем парсить таблицу 'Potash freight'...")
     
     # 1. Находим начало таблицы по заголовку (регистр не важен)
-    start_row = -1
-    for i, row in df.iterrows():
-        if any(cell for cell in row if isinstance(cell, str) and "potash freight" in cell.lower()):
-            start_row = i
-            break
+    start_row = find_table(grid, "Potash freight", TABLE_ANCHORS, table_index)
     if start_row == -1:
         print("[ERROR] Не найдена таблица 'Potash freight'")
         return
 
     # 2. Ищем нужные колонки: Loading, Destination, MOP ooot, Rate (справа от MOP ooot)
-    loading_col = -1
-    destination_col = -1
-    volume_col = -1
-    rate_col = -1
-
-    # Проверяем следующие несколько строк после заголовка для определения колонок
-    found = False
-    for i in range(start_row + 1, start_row + 5):
-        if i >= len(df):
-            break
-        row = df.iloc[i]
-        for col_idx, cell in enumerate(row):
-            if isinstance(cell, str):
-                cell_clean = cell.strip().lower()
-                if "loading" in cell_clean:
-                    loading_col = col_idx
-                elif "destination" in cell_clean:
-                    destination_col = col_idx
-                elif "mop ooot" in cell_clean or "volume" in cell_clean:
-                    volume_col = col_idx
-        # Если нашли MOP ooot, то следующий столбец — Rate
-        if volume_col != -1:
-            rate_col = volume_col + 1
-        # Если все колонки найдены, запоминаем заголовочную строку
-        if loading_col != -1 and destination_col != -1 and volume_col != -1 and rate_col != -1:
-            header_row = i
-            found = True
-            break
-
-    if not found:
+    layout = find_header(grid, start_row + 1, start_row + 5, POTASH_COLUMNS)
+    if layout is None:
         print("[ERROR] Не найдены все необходимые колонки для таблицы 'Potash freight'")
+        note_not_found()
         return
+    # Следующий за MOP ooot столбец — Rate; за краем листа его нет
+    layout.columns["rate"] = layout.columns["volume"] + 1
+    destination_col = layout.index("destination")
+    extract = layout.extractor(("loading", "destination", "volume", "rate"))
 
     # 3. Парсим данные
     empty_rows = 0
-    for i in range(header_row + 1, len(df)):
-        row = df.iloc[i]
+    for i, row in grid.iter_rows(layout.header_row + 1):
 
         # Пропускаем строки, где во втором столбце (Destination) пусто
-        if destination_col < len(row) and (pd.isna(row[destination_col]) or str(row[destination_col]).strip() == ""):
+        if not row[destination_col]:
             empty_rows += 1
             if empty_rows >= 3:
                 break
+            note_skip("empty")
             continue
         empty_rows = 0
 
         # Получаем значения ячеек
-        loading = str(row[loading_col]).strip() if loading_col < len(row) and pd.notna(row[loading_col]) else ""
-        destination = str(row[destination_col]).strip() if destination_col < len(row) and pd.notna(row[destination_col]) else ""
-        mop_volume = str(row[volume_col]).strip() if volume_col < len(row) and pd.notna(row[volume_col]) else ""
-        rate_value = str(row[rate_col]).strip() if rate_col < len(row) and pd.notna(row[rate_col]) else ""
+        loading, destination, mop_volume, rate_value = extract(row)
+        loading = loading or ""
 
         # --- Обработка Volume ---
         volume_clean = ""
@@ -629,7 +537,7 @@ def parse_potash_freight(df, final_data, agency, product, publish_date):
             vol = mop_volume.replace(" ", "")
             if any(char.isdigit() for char in vol):
                 if "-" in vol:
-                    parts = re.split(r'[-–—]', vol)
+                    parts = RANGE_SEPARATOR_RE.split(vol)
                     try:
                         parts = [int(float(p)) for p in parts]
                         avg = int(sum(parts) / len(parts))
@@ -637,7 +545,7 @@ def parse_potash_freight(df, final_data, agency, product, publish_date):
                     except ValueError:
                         volume_clean = ""
                 else:
-                    digits_only = re.sub(r'[^\d]', '', vol)
+                    digits_only = NON_DIGIT_RE.sub('', vol)
                     if digits_only:
                         volume_clean = digits_only + "000"
                     else:
@@ -651,7 +559,7 @@ def parse_potash_freight(df, final_data, agency, product, publish_date):
         rate_low_clean = ""
         rate_high_clean = ""
         if rate_value:
-            rates = re.findall(r'(\d+\.?\d*)', rate_value)
+            rates = DECIMAL_NUMBER_RE.findall(rate_value)
             if len(rates) >= 2:
                 try:
                     rate_low_clean = float(rates[0])
@@ -681,19 +589,29 @@ def parse_potash_freight(df, final_data, agency, product, publish_date):
             "Rate change": ""
         })
 # ======================================
-# Основной цикл парсинга
+# Порядок колонок (3 мета-колонки слева + 5 колонок данных)
 # ======================================
-for file_info in FILES:
-    file_path = file_info["path"]
-    tables_to_parse = file_info["tables"]
-    print(f"[INFO] Загружаем файл: {file_path}")
-    
-    try:
-        df = pd.read_excel(file_path, header=None, engine='openpyxl')
-    except Exception as e:
-        print(f"[ERROR] Ошибка при загрузке файла: {e}")
-        continue
+columns_order = [
+    "Publish Date", 
+    "Agency", 
+    "Product",
+    "Loading", 
+    "Destination", 
+    "Volume", 
+    "Rate Low", 
+    "Rate High",
+    "Rate change"
+]
+OUTPUT_FILE = 'freight_processed.xlsx'
+# Типы колонок для csv/parquet/feather (xlsx пишется строками); Rate change ("+2", "nc") остаётся текстом
+OUTPUT_TYPES = {"Publish Date": "date", "Volume": "int", "Rate Low": "float", "Rate High": "float"}
+PARSER_VERSION = "freight-3"  # версия для ключа кэша: менять при изменении парсеров
+STORE_DATASET = "freight"  # таблица исторического хранилища, см. Argus_store
 
+# ======================================
+# Парсинг одного файла по уже загруженному листу
+# ======================================
+def process_file(grid, file_path, tables_to_parse, final_data, table_index=None):
     file_name = os.path.basename(file_path).replace('.xlsx', '')
     first_part = file_name.split('_')[0].strip() if '_' in file_name else file_name
     parts = first_part.split()
@@ -704,37 +622,95 @@ for file_info in FILES:
     publish_date = extract_publish_date(file_name)
     file_name_short = os.path.basename(file_path)
 
+    # Один проход по листу: строки-заголовки всех запрошенных таблиц
+    if table_index is None:
+        table_index = build_table_index(
+            grid, {name: TABLE_ANCHORS[name] for name in tables_to_parse if name in TABLE_ANCHORS}
+        )
+
     if "Ammonia freight rates" in tables_to_parse:
-        parse_ammonia_freight_rates(df, final_data, agency, product, publish_date)
+        with parser_call("Ammonia freight rates", file_path, grid, final_data) as table_grid:
+            parse_ammonia_freight_rates(table_grid, final_data, agency, product, publish_date, table_index)
     if "Dry bulk fertilizer freight assessments" in tables_to_parse:
-        parse_dry_bulk_freight(df, final_data, agency, product, publish_date, file_name_short)
+        with parser_call("Dry bulk fertilizer freight assessments", file_path, grid, final_data) as table_grid:
+            parse_dry_bulk_freight(table_grid, final_data, agency, product, publish_date, file_name_short, table_index)
     if "Urea freight" in tables_to_parse:
-        parse_urea_freight(df, final_data, agency, product, publish_date)
+        with parser_call("Urea freight", file_path, grid, final_data) as table_grid:
+            parse_urea_freight(table_grid, final_data, agency, product, publish_date, table_index)
     if "Phosphate freigh" in tables_to_parse:
-        parse_phosphate_freight(df, final_data, agency, product, publish_date)
+        with parser_call("Phosphate freigh", file_path, grid, final_data) as table_grid:
+            parse_phosphate_freight(table_grid, final_data, agency, product, publish_date, table_index)
     if "Potash freight" in tables_to_parse:
-        parse_potash_freight(df, final_data, agency, product, publish_date)
+        with parser_call("Potash freight", file_path, grid, final_data) as table_grid:
+            parse_potash_freight(table_grid, final_data, agency, product, publish_date, table_index)
+
+# ======================================
+# Парсинг одной книги: все листы с запрошенными таблицами
+# ======================================
+def parse_workbook(file_path, tables_to_parse):
+    try:
+        workbook = open_workbook(file_path)
+    except Exception as e:
+        print(f"[ERROR] Ошибка при загрузке файла: {e}")
+        return None
+
+    file_data = RecordTable()
+    anchors = requested_anchors(tables_to_parse, TABLE_ANCHORS)
+    report_missing = tables_to_parse != AUTO_TABLES
+    for grid, table_index in iter_sheet_grids(workbook, file_path, anchors, STREAMING, report_missing):
+        process_file(grid, file_path, list(table_index), file_data, table_index)
+    workbook.close()
+    return file_data
+
 # ======================================
 # Сохраняем результат в Excel
 # ======================================
-if final_data:
-    # Определяем порядок колонок (3 мета-колонки слева + 5 колонок данных)
-    columns_order = [
-        "Publish Date", 
-        "Agency", 
-        "Product",
-        "Loading", 
-        "Destination", 
-        "Volume", 
-        "Rate Low", 
-        "Rate High",
-        "Rate change"
-    ]
-    
-    result_df = pd.DataFrame(final_data, columns=columns_order)
-    output_file = 'freight_processed.xlsx'
-    result_df.to_excel(output_file, index=False)
-    print(f"✅ Данные успешно обработаны и сохранены в '{output_file}'")
+def save_results(final_data, output_file=OUTPUT_FILE, formats=("xlsx",), store=None):
+    if not final_data:
+        print("⚠️ Не найдено данных для сохранения")
+        return
+    for output_format in formats:
+        saved_file = write_records(final_data, columns_order, output_file, output_format, OUTPUT_TYPES)
+        if saved_file:
+            print(f"✅ Данные успешно обработаны и сохранены в '{saved_file}'")
     print(f"Обработано записей: {len(final_data)}")
-else:
-    print("⚠️ Не найдено данных для сохранения")
+    if store:
+        save_to_store(store, STORE_DATASET, columns_order, final_data)
+
+# ======================================
+# Основной цикл парсинга
+# ======================================
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Парсинг таблиц фрахта из книг Argus")
+    arg_parser.add_argument("--no-cache", action="store_true",
+                            help="разобрать книги заново, не используя кэш результатов")
+    arg_parser.add_argument("--format", dest="formats", nargs="+", choices=OUTPUT_FORMATS, default=["xlsx"],
+                            help="форматы итогового файла (по умолчанию xlsx)")
+    arg_parser.add_argument("--store", nargs="?", const=STORE_FILE, default=None,
+                            help=f"дописать записи в историческое хранилище SQLite (по умолчанию {STORE_FILE})")
+    arg_parser.add_argument("--auto", action="store_true",
+                            help="искать все известные таблицы вместо списков из FILES")
+    arg_parser.add_argument("--stats", default=None,
+                            help="сохранить статистику парсеров (время, строки, пропуски) в файл")
+    arg_parser.add_argument("--stats-format", choices=STATS_FORMATS, default="json",
+                            help="формат статистики: json или prometheus (по умолчанию json)")
+    args = arg_parser.parse_args(argv)
+
+    for file_info in FILES:
+        file_path = file_info["path"]
+        tables = file_tables(file_info, args.auto)
+        print(f"[INFO] Загружаем файл: {file_path}")
+        file_data = cached_parse(
+            file_path, PARSER_VERSION, tables,
+            lambda: parse_workbook(file_path, tables), not args.no_cache
+        )
+        if file_data is not None:
+            final_data.extend(file_data)
+
+    save_results(final_data, formats=args.formats, store=args.store)
+    if args.stats:
+        write_stats(args.stats, args.stats_format)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,17 @@ import re
 from datetime import datetime
 import os
 
+from Argus_common import (
+    first_cell_anchor, header_anchor, row_text_anchor,
+    open_workbook, iter_sheet_grids, find_table
+)
+from Argus_patterns import (
+    DAY_RE, MID_EARLY_RE, END_RE, MONTH_RE, FILE_DATE_PATTERNS, DIGITS_RE, FIRST_NUMBER_RE, INTEGER_RE,
+    NON_DIGIT_RE, NUMBER_WITH_COMMAS_RE, LEADING_NUMBER_RE, PRICE_SEPARATORS_RE, WHITESPACE_RE,
+    MULTIPLY_SIGN_RE, DIVIDE_SIGN_RE, ARITHMETIC_OPERATOR_RE, INCOTERM_RE, TRAILING_INCOTERM_RE,
+    GRAND_TOTAL_RE, PORT_DATE_PARTS_RE, EDGE_DASHES_RE, literal_re
+)
+
 # ======================================
 # Настройки путей и параметров
 # ======================================
@@ -20,18 +31,30 @@ full_month_names = [
     'July', 'August', 'September', 'October', 'November', 'December'
 ]
 final_data = []
+STREAMING = False  # True — потоковое чтение листа, см. Argus_common.iter_sheet_grids
+
+# ======================================
+# Якоря таблиц (строка-заголовок каждой таблицы)
+# ======================================
+TABLE_ANCHORS = {
+    "Indian imports": first_cell_anchor(r'indian\s*imports', re.IGNORECASE),
+    "Spot Sales": first_cell_anchor(r'^(?!.*\b(?:recent|selected)\b).*spot\s*sales', re.IGNORECASE),
+    "Argus Urea Spot Deals Selection": first_cell_anchor(r'argus\s*urea\s*spot\s*deals?\s*selection', re.IGNORECASE),
+    "Argus Ammonium Sulphate Spot Deals Selection": first_cell_anchor(
+        r'argus\s*ammonium\s*sulphate\s*spot\s*deals?\s*selection', re.IGNORECASE),
+    "Recent spot sales": first_cell_anchor(r'recent\s*spot\s*sales', re.IGNORECASE),
+    "Indian NPK arrivals": first_cell_anchor(r'indian\s+npk\s+arrivals', re.IGNORECASE),
+    "Selected Spot Sales": first_cell_anchor(r'\bselected.*spot.*sales\b', re.IGNORECASE),
+    "India MOP vessel line-up": header_anchor('Seller/Buyer', 'Vessel', 'Tonnes'),
+    "Brazil Potash line-up": row_text_anchor(r'brazil potash line-up', re.IGNORECASE),
+}
 
 # ======================================
 # Функция извлечения даты из имени файла
 # ======================================
 def extract_publish_date(filename):
-    date_patterns = [
-        (r'(\d{4}-\d{2}-\d{2})', "%Y-%m-%d"),
-        (r'(\d{1,2}-[a-zA-Z]{3,9}-\d{4})', "%d-%b-%Y"),
-        (r'(\d{1,2}[a-zA-Z]{3,9}\d{4})', "%d%b%Y")
-    ]
-    for pattern, fmt in date_patterns:
-        match = re.search(pattern, filename, re.IGNORECASE)
+    for pattern, fmt in FILE_DATE_PATTERNS:
+        match = pattern.search(filename)
         if match:
             try:
                 date_str = match.group(1)
@@ -48,19 +71,15 @@ def parse_date(date_str):
     if not date_str:
         return ""
     date_str_lower = date_str.lower()
-    if re.search(r'\bmid\b|\bearly\b|\bme?i?d\b|\bear?ly\b', date_str_lower):
+    if MID_EARLY_RE.search(date_str_lower):
         day = 15
-    elif re.search(r'\bend\b|\ben?d\b', date_str_lower):
+    elif END_RE.search(date_str_lower):
         day = 30
     else:
-        day_match = re.search(r'\b(\d{1,2})\b', date_str)
+        day_match = DAY_RE.search(date_str)
         day = int(day_match.group(1)) if day_match else 1
     
-    month_match = re.search(
-        r'\b(jan|january|feb|february|mar|march|apr|april|may|jun|june|'
-        r'jul|july|aug|august|sep|september|oct|october|nov|november|dec|december)\b',
-        date_str_lower
-    )
+    month_match = MONTH_RE.search(date_str_lower)
     if month_match:
         month_str = month_match.group(1)[:3].capitalize()
         try:
@@ -74,8 +93,8 @@ def parse_date(date_str):
 # Обработка цены: Low, High, Average
 # ======================================
 def process_prices(price_str):
-    price_str = re.sub(r'[\s,\–\-\u2013]', ' ', price_str.strip())
-    nums = list(map(int, re.findall(r'\b\d+\b', price_str)))
+    price_str = PRICE_SEPARATORS_RE.sub(' ', price_str.strip())
+    nums = list(map(int, INTEGER_RE.findall(price_str)))
     low = ""
     high = ""
     avg = ""
@@ -122,22 +141,18 @@ def check_price_outliers(data_with_rows, filename):
 # ======================================
 # Парсинг Indian imports
 # ======================================
-def parse_indian_imports(df, final_data, agency, product, publish_date, file_name_short):
-    start_parsing = False
+def parse_indian_imports(grid, final_data, agency, product, publish_date, file_name_short, table_index=None):
     price_data = []
     print("[INFO] Начинаем парсить Indian imports...")
 
-    for i, row in df.iterrows():
-        first_cell = str(row[0]).strip() if not pd.isna(row[0]) else ""
-        if not first_cell:
-            continue
-
-        # Поиск начала таблицы
-        if re.search(r'indian\s*imports', first_cell, re.IGNORECASE):
-            start_parsing = True
-            continue
+    # Начало таблицы берём из индекса якорей
+    start_row = find_table(grid, "Indian imports", TABLE_ANCHORS, table_index)
+    if start_row == -1:
+        return
 
-        if not start_parsing:
+    for i, row in grid.iter_rows(start_row + 1):
+        first_cell = row[0] or ""
+        if not first_cell:
             continue
 
         # Прекращение парсинга по служебным словам
@@ -150,26 +165,22 @@ def parse_indian_imports(df, final_data, agency, product, publish_date, file_nam
             continue
 
         # Проверка: если заполнен только первый столбец — это неполноценные данные → пропускаем
-        other_cells_empty = all(
-            (idx == 0) or (pd.isna(cell) or str(cell).strip() == "")
-            for idx, cell in enumerate(row)
-        )
-        if other_cells_empty:
+        if not any(row[1:]):
             continue
 
         # Извлечение данных
         seller = first_cell
-        buyer = str(row[1]).strip() if 1 < len(row) and not pd.isna(row[1]) else ""
-        vessel = str(row[2]).strip() if 2 < len(row) and not pd.isna(row[2]) else ""
-        vol_origin = str(row[3]).strip() if 3 < len(row) and not pd.isna(row[3]) else ""
-        date_port = str(row[4]).strip() if 4 < len(row) and not pd.isna(row[4]) else ""
-        price = str(row[5]).strip() if 5 < len(row) and not pd.isna(row[5]) else ""
+        buyer = row[1] or ""
+        vessel = row[2] or ""
+        vol_origin = row[3] or ""
+        date_port = row[4] or ""
+        price = row[5] or ""
 
         # Обработка Volume и Origin
         volume = ""
         origin = ""
         if vol_origin:
-            vol_match = re.match(r'^([\d,]+)\s*(.*)$', vol_origin)
+            vol_match = LEADING_NUMBER_RE.match(vol_origin)
             if vol_match:
                 volume = vol_match.group(1).replace(',', '')
                 origin = vol_match.group(2).strip()
@@ -180,14 +191,9 @@ def parse_indian_imports(df, final_data, agency, product, publish_date, file_nam
         date_str = parse_date(date_port)
         discharge_port = ""
         if date_port:
-            discharge_port = re.sub(
-                r'\d{1,2}\s*-*\s*|'
-                r'\b(jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)\w*\b|'
-                r'\b(mid|early|end)\b',
-                '', date_port, flags=re.IGNORECASE
-            ).strip()
-            discharge_port = re.sub(r'^-+\s*|\s*-+\s*$', '', discharge_port).strip()
-            discharge_port = re.sub(r'\d+', '', discharge_port).strip()
+            discharge_port = PORT_DATE_PARTS_RE.sub('', date_port).strip()
+            discharge_port = EDGE_DASHES_RE.sub('', discharge_port).strip()
+            discharge_port = DIGITS_RE.sub('', discharge_port).strip()
             discharge_port = discharge_port.lstrip('-').strip()
 
         # Обработка цены
@@ -230,73 +236,69 @@ def parse_indian_imports(df, final_data, agency, product, publish_date, file_nam
 # ======================================
 # Парсинг Spot Sales
 # ======================================
-def parse_spot_sales(df, final_data, agency, product, publish_date, file_name_short):
-    start_parsing = False
+def parse_spot_sales(grid, final_data, agency, product, publish_date, file_name_short, table_index=None):
     price_data = []
-    for i, row in df.iterrows():
-        first_cell = str(row[0]).strip() if not pd.isna(row[0]) else ""
+    start_row = find_table(grid, "Spot Sales", TABLE_ANCHORS, table_index)
+    # Таблица занимает минимум 7 столбцов
+    if start_row == -1 or grid.width <= 6:
+        return
+    for i, row in grid.iter_rows(start_row + 1):
+        first_cell = row[0] or ""
         if not first_cell:
             continue
-        if re.search(r'spot\s*sales', first_cell, re.IGNORECASE):
-            start_parsing = True
-            continue
-        if start_parsing and first_cell == "Shipment":
+        if first_cell == "Shipment":
             continue
-        if start_parsing and any(keyword in first_cell.lower() for keyword in ['copyright', 'лицензия']):
+        if any(keyword in first_cell.lower() for keyword in ['copyright', 'лицензия']):
             break
-        if start_parsing and first_cell and len(row) > 6:
-            shipment = first_cell
-            seller = str(row[1]).strip() if not pd.isna(row[1]) else ""
-            buyer = str(row[2]).strip() if not pd.isna(row[2]) else ""
-            destination_val = str(row[3]).strip() if not pd.isna(row[3]) else ""
-            tonnes = str(row[4]).strip() if not pd.isna(row[4]) else ""
-            price_incoterm = str(row[5]).strip() if not pd.isna(row[5]) else ""
-            origin_value = str(row[6]).strip() if not pd.isna(row[6]) else ""
-            
-            volume = ""
-            if tonnes:
-                vol_match = re.search(r'([\d,]+)', tonnes)
-                if vol_match:
-                    volume = vol_match.group(1).replace(',', '')
-            
-            price_info = process_prices(price_incoterm)
-            final_index = len(final_data)
-            if price_info["Average"]:
-                price_data.append((i + 1, int(price_info["Average"]), final_index))
-            
-            incoterm = ""
-            incoterm_match = re.search(
-                r'(fob|cfr|cif|fca|dap|cpt|c\w+?r|rail|exw|ddp|dpu|d\w+?p|f\w+?t|c\w+?y)',
-                price_incoterm,
-                re.IGNORECASE
-            )
-            if incoterm_match:
-                incoterm = incoterm_match.group().upper()
-            
-            final_data.append({
-                "Publish Date": publish_date,
-                "Agency": agency,
-                "Product": product,
-                "Seller": seller,
-                "Buyer": buyer,
-                "Vessel": "",
-                "Volume (t)": volume,
-                "Origin": origin_value.strip(),
-                "Date of arrival": parse_date(shipment),
-                "Discharge port": "",
-                "Low": price_info["Low"],
-                "High": price_info["High"],
-                "Average": price_info["Average"],
-                "Incoterm": incoterm,
-                "Destination": destination_val,
-                "Grade": "",
-                "Loading port": "",
-                "Shipment Date": "",
-                "Charterer": "",
-                "ETB": "",
-                "Type": ""
-            })
-    
+
+        shipment = first_cell
+        seller = row[1] or ""
+        buyer = row[2] or ""
+        destination_val = row[3] or ""
+        tonnes = row[4] or ""
+        price_incoterm = row[5] or ""
+        origin_value = row[6] or ""
+
+        volume = ""
+        if tonnes:
+            vol_match = NUMBER_WITH_COMMAS_RE.search(tonnes)
+            if vol_match:
+                volume = vol_match.group(1).replace(',', '')
+
+        price_info = process_prices(price_incoterm)
+        final_index = len(final_data)
+        if price_info["Average"]:
+            price_data.append((i + 1, int(price_info["Average"]), final_index))
+
+        incoterm = ""
+        incoterm_match = INCOTERM_RE.search(price_incoterm)
+        if incoterm_match:
+            incoterm = incoterm_match.group().upper()
+
+        final_data.append({
+            "Publish Date": publish_date,
+            "Agency": agency,
+            "Product": product,
+            "Seller": seller,
+            "Buyer": buyer,
+            "Vessel": "",
+            "Volume (t)": volume,
+            "Origin": origin_value,
+            "Date of arrival": parse_date(shipment),
+            "Discharge port": "",
+            "Low": price_info["Low"],
+            "High": price_info["High"],
+            "Average": price_info["Average"],
+            "Incoterm": incoterm,
+            "Destination": destination_val,
+            "Grade": "",
+            "Loading port": "",
+            "Shipment Date": "",
+            "Charterer": "",
+            "ETB": "",
+            "Type": ""
+        })
+
     price_warnings = check_price_outliers(price_data, file_name_short)
     for idx, msg in price_warnings.items():
         final_data[idx]["Average"] = msg
@@ -304,22 +306,17 @@ def parse_spot_sales(df, final_data, agency, product, publish_date, file_name_sh
 # ======================================
 # Парсинг Argus Urea Spot Deals Selection
 # ======================================
-def parse_argus_urea_spot_deals_selection(df, final_data, agency, product, publish_date, file_name_short):
-    start_parsing = False
+def parse_argus_urea_spot_deals_selection(grid, final_data, agency, product, publish_date, file_name_short, table_index=None):
     header_skipped = False  # Флаг для пропуска заголовков
 
     print("[INFO] Начинаем парсить Argus Urea Spot Deals Selection...")
 
-    for i, row in df.iterrows():
-        first_cell = str(row[0]).strip() if not pd.isna(row[0]) else ""
-
-        # Поиск начала таблицы с возможностью частичного совпадения текста
-        if re.search(r'argus\s*urea\s*spot\s*deals?\s*selection', first_cell, re.IGNORECASE):
-            start_parsing = True
-            continue
+    start_row = find_table(grid, "Argus Urea Spot Deals Selection", TABLE_ANCHORS, table_index)
+    if start_row == -1:
+        return
 
-        if not start_parsing:
-            continue
+    for i, row in grid.iter_rows(start_row + 1):
+        first_cell = row[0] or ""
 
         # Проверяем, не является ли текущая строка заголовком
         if not header_skipped and any(kw in first_cell.lower() for kw in ['grade', 'product', 'origin', 'supplier', 'buyer']):
@@ -327,7 +324,7 @@ def parse_argus_urea_spot_deals_selection(df, final_data, agency, product, publi
             continue
 
         # Пропуск полностью пустых строк
-        if all(pd.isna(cell) or str(cell).strip() == "" for cell in row[:8]):
+        if not any(row[:8]):
             continue
 
         # Остановка при появлении служебных строк
@@ -336,27 +333,27 @@ def parse_argus_urea_spot_deals_selection(df, final_data, agency, product, publi
             break
 
         # Извлечение данных
-        grade = str(row[0]).strip() if len(row) > 0 and not pd.isna(row[0]) else ""
-        origin = str(row[1]).strip() if len(row) > 1 and not pd.isna(row[1]) else ""
-        supplier = str(row[2]).strip() if len(row) > 2 and not pd.isna(row[2]) else ""
-        buyer = str(row[3]).strip() if len(row) > 3 and not pd.isna(row[3]) else ""
-        destination = str(row[4]).strip() if len(row) > 4 and not pd.isna(row[4]) else ""
-        volume_raw = str(row[5]).strip() if len(row) > 5 and not pd.isna(row[5]) else ""
-        price_raw = str(row[6]).strip() if len(row) > 6 and not pd.isna(row[6]) else ""
-        shipment_raw = str(row[7]).strip() if len(row) > 7 and not pd.isna(row[7]) else ""
+        grade = first_cell
+        origin = row[1] or ""
+        supplier = row[2] or ""
+        buyer = row[3] or ""
+        destination = row[4] or ""
+        volume_raw = row[5] or ""
+        price_raw = row[6] or ""
+        shipment_raw = row[7] or ""
 
         # Обработка Volume
-        volume = re.sub(r'[^\d]', '', volume_raw) if volume_raw else ""
+        volume = NON_DIGIT_RE.sub('', volume_raw) if volume_raw else ""
 
         # Обработка Price
-        price_clean = re.sub(r'\s+', ' ', price_raw).strip()
+        price_clean = WHITESPACE_RE.sub(' ', price_raw).strip()
         incoterm = ""
-        incoterm_match = re.search(r'(fob|cfr|cif|fca|dap|cpt|c\w+?r|rail|exw|ddp|dpu|d\w+?p|f\w+?t|c\w+?y)', price_clean, re.IGNORECASE)
+        incoterm_match = INCOTERM_RE.search(price_clean)
         if incoterm_match:
             incoterm = incoterm_match.group().upper()
-            price_clean = re.sub(incoterm_match.group(), '', price_clean, flags=re.IGNORECASE).strip()
+            price_clean = literal_re(incoterm_match.group()).sub('', price_clean).strip()
 
-        nums = list(map(int, re.findall(r'\b\d+\b', price_clean)))
+        nums = list(map(int, INTEGER_RE.findall(price_clean)))
         if len(nums) == 1:
             average = str(nums[0])
             low, high = "", ""
@@ -397,20 +394,15 @@ def parse_argus_urea_spot_deals_selection(df, final_data, agency, product, publi
 # ======================================
 # Парсинг Argus Ammonium Sulphate Spot Deals Selection
 # ======================================
-def parse_argus_ammonium_sulphate_spot_deals_selection(df, final_data, agency, product, publish_date, file_name_short):
-    start_parsing = False
+def parse_argus_ammonium_sulphate_spot_deals_selection(grid, final_data, agency, product, publish_date, file_name_short, table_index=None):
     header_skipped = False  # Флаг для пропуска заголовков
 
-    for i, row in df.iterrows():
-        first_cell = str(row[0]).strip() if not pd.isna(row[0]) else ""
-
-        # Поиск начала таблицы с возможностью частичного совпадения текста
-        if re.search(r'argus\s*ammonium\s*sulphate\s*spot\s*deals?\s*selection', first_cell, re.IGNORECASE):
-            start_parsing = True
-            continue
+    start_row = find_table(grid, "Argus Ammonium Sulphate Spot Deals Selection", TABLE_ANCHORS, table_index)
+    if start_row == -1:
+        return
 
-        if not start_parsing:
-            continue
+    for i, row in grid.iter_rows(start_row + 1):
+        first_cell = row[0] or ""
 
         # Проверяем, не является ли текущая строка заголовком
         if not header_skipped and any(kw in first_cell.lower() for kw in ['grade', 'product', 'origin', 'supplier', 'buyer']):
@@ -418,7 +410,7 @@ def parse_argus_ammonium_sulphate_spot_deals_selection(df, final_data, agency, p
             continue
 
         # Пропуск полностью пустых строк
-        if all(pd.isna(cell) or str(cell).strip() == "" for cell in row[:8]):
+        if not any(row[:8]):
             continue
 
         # Остановка при появлении служебных строк
@@ -426,28 +418,28 @@ def parse_argus_ammonium_sulphate_spot_deals_selection(df, final_data, agency, p
             break
 
         # Извлечение данных
-        grade = str(row[0]).strip() if len(row) > 0 and not pd.isna(row[0]) else ""
-        origin = str(row[1]).strip() if len(row) > 1 and not pd.isna(row[1]) else ""
-        supplier = str(row[2]).strip() if len(row) > 2 and not pd.isna(row[2]) else ""
-        buyer = str(row[3]).strip() if len(row) > 3 and not pd.isna(row[3]) else ""
-        destination = str(row[4]).strip() if len(row) > 4 and not pd.isna(row[4]) else ""
-        volume_raw = str(row[5]).strip() if len(row) > 5 and not pd.isna(row[5]) else ""
-        price_raw = str(row[6]).strip() if len(row) > 6 and not pd.isna(row[6]) else ""
-        shipment_raw = str(row[7]).strip() if len(row) > 7 and not pd.isna(row[7]) else ""
+        grade = first_cell
+        origin = row[1] or ""
+        supplier = row[2] or ""
+        buyer = row[3] or ""
+        destination = row[4] or ""
+        volume_raw = row[5] or ""
+        price_raw = row[6] or ""
+        shipment_raw = row[7] or ""
 
         # Обработка Volume (удаление всех нецифровых символов)
-        volume = re.sub(r'[^\d]', '', volume_raw) if volume_raw else ""
+        volume = NON_DIGIT_RE.sub('', volume_raw) if volume_raw else ""
 
         # Обработка Price
-        price_clean = re.sub(r'\s+', ' ', price_raw).strip()
+        price_clean = WHITESPACE_RE.sub(' ', price_raw).strip()
         incoterm = ""
-        incoterm_match = re.search(r'(fob|cfr|cif|fca|dap|cpt|c\w+?r|rail|exw|ddp|dpu|d\w+?p|f\w+?t|c\w+?y)', price_clean, re.IGNORECASE)
+        incoterm_match = INCOTERM_RE.search(price_clean)
         if incoterm_match:
             incoterm = incoterm_match.group().upper()
-            price_clean = re.sub(incoterm_match.group(), '', price_clean, flags=re.IGNORECASE).strip()
+            price_clean = literal_re(incoterm_match.group()).sub('', price_clean).strip()
 
         # Извлечение чисел из цены
-        nums = list(map(int, re.findall(r'\b\d+\b', price_clean)))
+        nums = list(map(int, INTEGER_RE.findall(price_clean)))
         if len(nums) == 1:
             average = str(nums[0])
             low, high = "", ""
@@ -488,23 +480,19 @@ def parse_argus_ammonium_sulphate_spot_deals_selection(df, final_data, agency, p
 # ======================================
 # Парсинг Recent spot sales
 # ======================================
-def parse_recent_spot_sales(df, final_data, agency, product, publish_date, file_name_short):
-    start_parsing = False
+def parse_recent_spot_sales(grid, final_data, agency, product, publish_date, file_name_short, table_index=None):
     header_skipped = False  # Флаг для пропуска заголовков
     price_data = []
     print("[INFO] Начинаем парсить Recent spot sales...")
 
-    for i, row in df.iterrows():
-        first_cell = str(row[0]).strip() if not pd.isna(row[0]) else ""
-        if not first_cell:
-            continue
-
-        # Поиск начала таблицы
-        if re.search(r'recent\s*spot\s*sales', first_cell, re.IGNORECASE):
-            start_parsing = True
-            continue
+    start_row = find_table(grid, "Recent spot sales", TABLE_ANCHORS, table_index)
+    # Таблица занимает минимум 9 столбцов
+    if start_row == -1 or grid.width < 9:
+        return
 
-        if not start_parsing:
+    for i, row in grid.iter_rows(start_row + 1):
+        first_cell = row[0] or ""
+        if not first_cell:
             continue
 
         # Пропуск строки с заголовками
@@ -517,32 +505,28 @@ def parse_recent_spot_sales(df, final_data, agency, product, publish_date, file_
             print(f"[INFO] Встретили служебную строку → завершаем парсинг Recent spot sales")
             break
 
-        # Проверяем, что данных достаточно (минимум 9 столбцов)
-        if not len(row) >= 9 or pd.isna(row[0]):
-            continue
-
         # Извлечение данных
-        supplier = str(row[0]).strip()
-        origin = str(row[1]).strip()
-        buyer = str(row[2]).strip()
-        destination = str(row[3]).strip()
-        product_grade = str(row[4]).strip()
-        volume = str(row[5]).strip()
-        price_range = str(row[6]).strip()
-        basis = str(row[7]).strip()
-        shipment_period = str(row[9]).strip()
+        supplier = first_cell
+        origin = row[1] or ""
+        buyer = row[2] or ""
+        destination = row[3] or ""
+        product_grade = row[4] or ""
+        volume = row[5] or ""
+        price_range = row[6] or ""
+        basis = row[7] or ""
+        shipment_period = row[9] or ""
 
         # Обработка Volume
         volume_processed = ""
         if volume:
             try:
-                vol_expr = re.sub(r'[хХxX*×]', '*', volume.replace(',', ''))
-                vol_expr = re.sub(r'[:÷]', '/', vol_expr)
-                if re.search(r'[\+\-\*/]', vol_expr):
+                vol_expr = MULTIPLY_SIGN_RE.sub('*', volume.replace(',', ''))
+                vol_expr = DIVIDE_SIGN_RE.sub('/', vol_expr)
+                if ARITHMETIC_OPERATOR_RE.search(vol_expr):
                     result = eval(vol_expr)
                     volume_processed = str(int(result) * 1000)
                 else:
-                    vol_num = re.search(r'(\d+)', vol_expr)
+                    vol_num = FIRST_NUMBER_RE.search(vol_expr)
                     if vol_num:
                         volume_processed = str(int(vol_num.group(1)) * 1000)
             except Exception:
@@ -557,7 +541,7 @@ def parse_recent_spot_sales(df, final_data, agency, product, publish_date, file_
         # Обработка даты отгрузки
         date_str = ""
         if shipment_period and shipment_period != 'TBC':
-            shipment_lower = shipment_period.strip().lower()
+            shipment_lower = shipment_period.lower()
             for month in full_month_names:
                 if shipment_lower == month.lower():
                     month_index = full_month_names.index(month) + 1
@@ -604,110 +588,111 @@ def parse_recent_spot_sales(df, final_data, agency, product, publish_date, file_
 # ======================================
 # Парсинг Indian NPK arrivals
 # ======================================
-def parse_indian_npk_arrivals(df, final_data, agency, product, publish_date, file_name_short):
-    start_parsing = False
-    for i, row in df.iterrows():
-        first_cell = str(row[0]).strip() if not pd.isna(row[0]) else ""
+def parse_indian_npk_arrivals(grid, final_data, agency, product, publish_date, file_name_short, table_index=None):
+    start_row = find_table(grid, "Indian NPK arrivals", TABLE_ANCHORS, table_index)
+    # Таблица занимает минимум 6 столбцов
+    if start_row == -1 or grid.width < 6:
+        return
+    for i, row in grid.iter_rows(start_row + 1):
+        first_cell = row[0] or ""
         if not first_cell:
             continue
-        if re.search(r'indian\s+npk\s+arrivals', first_cell, re.IGNORECASE):
-            start_parsing = True
-            continue
-        if start_parsing and first_cell == "Supplier":
+        if first_cell == "Supplier":
             continue
-        if start_parsing and re.search(r'^grand\s+total', first_cell, re.IGNORECASE):
+        if GRAND_TOTAL_RE.search(first_cell):
             break
-        if start_parsing and first_cell.lower() == "total":
+        if first_cell.lower() == "total":
             continue
-        if start_parsing and first_cell and len(row) >= 6:
-            supplier = str(row[0]).strip()
-            buyer = str(row[1]).strip()
-            vessel = str(row[2]).strip()
-            grade = str(row[3]).strip()
-            vol_loading = str(row[4]).strip()
-            discharge_port = str(row[5]).strip()
-            arrival = str(row[6]).strip() if len(row) > 6 else ""
-
-            volume_clean = ""
-            loading_port = ""
-            if vol_loading:
-                vol_match = re.match(r'^([\d,]+)\s*(.*)$', vol_loading)
-                if vol_match:
-                    volume_clean = vol_match.group(1).replace(',', '').replace('.', '')
-                    loading_port = vol_match.group(2).strip()
-                else:
-                    loading_port = vol_loading.strip()
 
-            date_str = parse_date(arrival)
+        supplier = first_cell
+        buyer = row[1] or ""
+        vessel = row[2] or ""
+        grade = row[3] or ""
+        vol_loading = row[4] or ""
+        discharge_port = row[5] or ""
+        arrival = row[6] or ""
+
+        volume_clean = ""
+        loading_port = ""
+        if vol_loading:
+            vol_match = LEADING_NUMBER_RE.match(vol_loading)
+            if vol_match:
+                volume_clean = vol_match.group(1).replace(',', '').replace('.', '')
+                loading_port = vol_match.group(2).strip()
+            else:
+                loading_port = vol_loading
 
-            final_data.append({
-                "Publish Date": publish_date,
-                "Agency": agency,
-                "Product": product,
-                "Seller": "",
-                "Buyer": buyer,
-                "Vessel": vessel,
-                "Volume (t)": volume_clean,
-                "Origin": supplier,
-                "Date of arrival": date_str,
-                "Discharge port": discharge_port,
-                "Low": "",
-                "High": "",
-                "Average": "",
-                "Incoterm": "",
-                "Destination": "",
-                "Grade": grade,
-                "Loading port": loading_port,
-                "Shipment Date": "",
-                "Charterer": "",
-                "ETB": "",
-                "Type": ""
-            })
+        date_str = parse_date(arrival)
+
+        final_data.append({
+            "Publish Date": publish_date,
+            "Agency": agency,
+            "Product": product,
+            "Seller": "",
+            "Buyer": buyer,
+            "Vessel": vessel,
+            "Volume (t)": volume_clean,
+            "Origin": supplier,
+            "Date of arrival": date_str,
+            "Discharge port": discharge_port,
+            "Low": "",
+            "High": "",
+            "Average": "",
+            "Incoterm": "",
+            "Destination": "",
+            "Grade": grade,
+            "Loading port": loading_port,
+            "Shipment Date": "",
+            "Charterer": "",
+            "ETB": "",
+            "Type": ""
+        })
 
 # ======================================
 # Парсинг Selected Spot Sales
 # ======================================
-def parse_selected_spot_sales(df, final_data, agency, publish_date, file_name_short):
-    start_parsing = False
+def parse_selected_spot_sales(grid, final_data, agency, publish_date, file_name_short, table_index=None):
     file_name_base = os.path.basename(file_name_short).split('_')[0].strip()
     file_name_parts = file_name_base.split()
     default_product = file_name_parts[1] if len(file_name_parts) > 1 else ""
 
-    for i, row in df.iterrows():
-        first_cell = str(row[0]).strip() if not pd.isna(row[0]) else ""
+    start_row = find_table(grid, "Selected Spot Sales", TABLE_ANCHORS, table_index)
+    if start_row == -1:
+        return
+    # Таблица занимает минимум 7 столбцов
+    has_all_columns = grid.width >= 7
 
-        if re.search(r'\bselected.*spot.*sales\b', first_cell, re.IGNORECASE):
-            start_parsing = True
-            continue
+    for i, row in grid.iter_rows(start_row + 1):
+        first_cell = row[0] or ""
 
-        if start_parsing and any(
-            isinstance(col, str) and col.strip().lower() in ["origin", "seller", "buyer", "destination", "volume ('000t)", "price delivery period"]
+        if any(
+            col and col.lower() in ["origin", "seller", "buyer", "destination", "volume ('000t)", "price delivery period"]
             for col in row[:7]
         ):
             continue
 
-        if start_parsing and any(kw in first_cell.lower() for kw in ['copyright', 'total', 'note']):
+        if any(kw in first_cell.lower() for kw in ['copyright', 'total', 'note']):
             break
 
-        if start_parsing and first_cell and len(row) >= 7:
-            if all(pd.isna(cell) or str(cell).strip() == "" for cell in row[1:]):
+        if first_cell and has_all_columns:
+            if not any(row[1:]):
                 continue
 
-            origin = str(row[0]).strip()
-            seller = str(row[1]).strip()
-            buyer = str(row[2]).strip()
-            destination = str(row[3]).strip()
-            volume_product = str(row[4]).strip()
-            price = str(row[5]).strip()
-            delivery_period = str(row[6]).strip() if len(row) > 6 else ""
+            origin = first_cell
+            seller = row[1] or ""
+            buyer = row[2] or ""
+            destination = row[3] or ""
+            volume_product = row[4] or ""
+            price = row[5] or ""
+            delivery_period = row[6] or ""
 
             volume = ""
             product = ""
             if volume_product:
-                vol_prod_match = re.match(r'^([\d,]+)\s*(.*)$', volume_product)
+                vol_prod_match = LEADING_NUMBER_RE.match(volume_product)
                 if vol_prod_match:
                     vol_str = vol_prod_match.group(1)
-                    vol_clean = re.sub(r'[^\d]', '', vol_str)
+                    vol_clean = NON_DIGIT_RE.sub('', vol_str)
                     if vol_clean.isdigit():
                         volume = vol_clean + "000"
                     product = vol_prod_match.group(2).strip()
@@ -722,17 +707,13 @@ def parse_selected_spot_sales(df, final_data, agency, publish_date, file_name_sh
 
             incoterm = ""
             if price:
-                incoterm_match = re.search(r'[A-Za-z]{3}$', price)
+                incoterm_match = TRAILING_INCOTERM_RE.search(price)
                 if incoterm_match:
                     incoterm = incoterm_match.group().upper()
 
             shipment_date = ""
             if delivery_period:
-                month_match = re.search(
-                    r'\b(jan|january|feb|february|mar|march|apr|april|may|jun|june|'
-                    r'jul|july|aug|august|sep|september|oct|october|nov|november|dec|december)\b',
-                    delivery_period.lower()
-                )
+                month_match = MONTH_RE.search(delivery_period.lower())
                 if month_match:
                     month_str = month_match.group(1)[:3].capitalize()
                     try:
@@ -769,46 +750,41 @@ def parse_selected_spot_sales(df, final_data, agency, publish_date, file_name_sh
 # ======================================
 # Парсинг India MOP vessel line-up
 # ======================================
-def parse_india_mop_vessel_lineup(df, final_data, agency, product, publish_date, file_name_short):
-    header_row = -1
-    for i, row in df.iterrows():
-        if 'Seller/Buyer' in str(row[0]) and 'Vessel' in str(row[1]) and 'Tonnes' in str(row[2]):
-            header_row = i
-            break
-    
-    if header_row == -1:
+def parse_india_mop_vessel_lineup(grid, final_data, agency, product, publish_date, file_name_short, table_index=None):
+    # Якорь этой таблицы — сама строка шапки Seller/Buyer | Vessel | Tonnes
+    header_row = find_table(grid, "India MOP vessel line-up", TABLE_ANCHORS, table_index)
+    # Таблица занимает минимум 6 столбцов
+    if header_row == -1 or grid.width < 6:
         return
-    
+
     first_data_row = -1
-    for i in range(header_row + 1, len(df)):
-        row = df.iloc[i]
-        first_cell = str(row[0]).strip()
-        if '/' in first_cell and any(c.isdigit() for c in str(row[2])):
+    for i, row in grid.iter_rows(header_row + 1):
+        first_cell = row[0] or ""
+        if '/' in first_cell and any(c.isdigit() for c in (row[2] or "")):
             first_data_row = i
             break
-    
+
     if first_data_row == -1:
         return
-    
-    for i in range(first_data_row, len(df)):
-        row = df.iloc[i]
-        first_cell = str(row[0]).strip()
-        
+
+    for i, row in grid.iter_rows(first_data_row):
+        first_cell = row[0] or ""
+
         if not first_cell or first_cell.lower() in ['copyright', 'total']:
             break
-            
-        if len(row) < 6 or '/' not in first_cell:
+
+        if '/' not in first_cell:
             continue
-            
+
         seller_buyer = first_cell
-        vessel = str(row[1]).strip()
-        tonnes = str(row[2]).strip()
-        load_port = str(row[3]).strip()
-        discharge_port = str(row[4]).strip()
-        arrival = str(row[5]).strip()
-
-        seller, buyer = seller_buyer.split('/', 1) if '/' in seller_buyer else (seller_buyer, "")
-        
+        vessel = row[1] or ""
+        tonnes = row[2] or ""
+        load_port = row[3] or ""
+        discharge_port = row[4] or ""
+        arrival = row[5] or ""
+
+        seller, buyer = seller_buyer.split('/', 1)
+
         volume = ''.join(c for c in tonnes if c.isdigit())
 
         final_data.append({
@@ -838,36 +814,30 @@ def parse_india_mop_vessel_lineup(df, final_data, agency, product, publish_date,
 # ======================================
 # Парсинг Brazil Potash line-up
 # ======================================
-def parse_brazil_potash_lineup(df, final_data, agency, product, publish_date, file_name_short):
-    start_row = -1
-    for i, row in df.iterrows():
-        row_str = ' '.join(str(cell).strip().lower() for cell in row if pd.notna(cell))
-        if 'brazil potash line-up' in row_str.lower():
-            start_row = i
-            break
-    
+def parse_brazil_potash_lineup(grid, final_data, agency, product, publish_date, file_name_short, table_index=None):
+    start_row = find_table(grid, "Brazil Potash line-up", TABLE_ANCHORS, table_index)
     if start_row == -1:
         return
-    
+
     header_row = -1
+    header_cells = None
     required_headers = ['port', 'vessel', 'charterer', 'origin', 'product', 'volume', 'receiver', 'eta', 'etb']
-    
-    for i in range(start_row, min(start_row + 10, len(df))):
-        row = df.iloc[i]
-        row_headers = [str(cell).strip().lower() for cell in row if pd.notna(cell)]
-        
+
+    for i, row in grid.iter_rows(start_row, start_row + 10):
+        row_headers = [cell.lower() for cell in row if cell is not None]
+
         if all(any(h in header for header in row_headers) for h in required_headers):
             header_row = i
+            header_cells = row
             break
-    
+
     if header_row == -1:
         return
-    
+
     col_map = {}
-    header = df.iloc[header_row]
-    
-    for idx, cell in enumerate(header):
-        cell_str = str(cell).strip().lower()
+
+    for idx, cell in enumerate(header_cells):
+        cell_str = (cell or "").lower()
         if 'port' in cell_str:
             col_map['port'] = idx
         elif 'vessel' in cell_str:
@@ -886,30 +856,28 @@ def parse_brazil_potash_lineup(df, final_data, agency, product, publish_date, fi
             col_map['eta'] = idx
         elif 'etb' in cell_str:
             col_map['etb'] = idx
-    
+
     empty_rows = 0
-    for i in range(header_row + 1, len(df)):
-        row = df.iloc[i]
-        
-        vessel_col = col_map.get('vessel', 1)
-        if pd.isna(row[vessel_col]) or str(row[vessel_col]).strip() == "":
+    vessel_col = col_map.get('vessel', 1)
+    for i, row in grid.iter_rows(header_row + 1):
+        if not row[vessel_col]:
             empty_rows += 1
             if empty_rows >= 3:
                 break
             continue
-        
+
         empty_rows = 0
-        
-        port = str(row[col_map['port']]).strip() if 'port' in col_map and col_map['port'] < len(row) and pd.notna(row[col_map['port']]) else ""
-        vessel = str(row[col_map['vessel']]).strip() if 'vessel' in col_map and col_map['vessel'] < len(row) and pd.notna(row[col_map['vessel']]) else ""
-        charterer = str(row[col_map['charterer']]).strip() if 'charterer' in col_map and col_map['charterer'] < len(row) and pd.notna(row[col_map['charterer']]) else ""
-        origin = str(row[col_map['origin']]).strip() if 'origin' in col_map and col_map['origin'] < len(row) and pd.notna(row[col_map['origin']]) else ""
-        product_name = str(row[col_map['product']]).strip() if 'product' in col_map and col_map['product'] < len(row) and pd.notna(row[col_map['product']]) else product
-        volume = re.sub(r'[^\d]', '', str(row[col_map['volume']])) if 'volume' in col_map and col_map['volume'] < len(row) and pd.notna(row[col_map['volume']]) else ""
-        receiver = str(row[col_map['receiver']]).strip() if 'receiver' in col_map and col_map['receiver'] < len(row) and pd.notna(row[col_map['receiver']]) else ""
-        eta_date = parse_date(str(row[col_map['eta']])) if 'eta' in col_map and col_map['eta'] < len(row) and pd.notna(row[col_map['eta']]) else ""
-        etb_date = parse_date(str(row[col_map['etb']])) if 'etb' in col_map and col_map['etb'] < len(row) and pd.notna(row[col_map['etb']]) else ""
-        
+
+        port = (row[col_map['port']] or "") if 'port' in col_map else ""
+        vessel = (row[col_map['vessel']] or "") if 'vessel' in col_map else ""
+        charterer = (row[col_map['charterer']] or "") if 'charterer' in col_map else ""
+        origin = (row[col_map['origin']] or "") if 'origin' in col_map else ""
+        product_name = (row[col_map['product']] or product) if 'product' in col_map else product
+        volume = NON_DIGIT_RE.sub('', row[col_map['volume']] or "") if 'volume' in col_map else ""
+        receiver = (row[col_map['receiver']] or "") if 'receiver' in col_map else ""
+        eta_date = parse_date(row[col_map['eta']] or "") if 'eta' in col_map else ""
+        etb_date = parse_date(row[col_map['etb']] or "") if 'etb' in col_map else ""
+
         final_data.append({
             "Publish Date": publish_date,
             "Agency": agency,
@@ -935,43 +903,7 @@ def parse_brazil_potash_lineup(df, final_data, agency, product, publish_date, fi
         })
 
 # ======================================
-# Основной цикл парсинга
-# ======================================
-for file_info in FILES:
-    file_path = file_info["path"]
-    tables_to_parse = file_info["tables"]
-    df = pd.read_excel(file_path, header=None, engine='openpyxl')
-
-    file_name = os.path.basename(file_path).replace('.xlsx', '')
-    first_part = file_name.split('_')[0].strip()
-    parts = first_part.split()
-
-    agency = parts[0] if len(parts) >= 1 else ''
-    product = parts[1] if len(parts) >= 2 else ''
-    publish_date = extract_publish_date(file_name)
-    file_name_short = os.path.basename(file_path)
-
-    if "Indian imports" in tables_to_parse:
-        parse_indian_imports(df, final_data, agency, product, publish_date, file_name_short)
-    if "Spot Sales" in tables_to_parse:
-        parse_spot_sales(df, final_data, agency, product, publish_date, file_name_short)
-    if "Argus Urea Spot Deals Selection" in tables_to_parse:
-        parse_argus_urea_spot_deals_selection(df, final_data, agency, product, publish_date, file_name_short)
-    if "Argus Ammonium Sulphate Spot Deals Selection" in tables_to_parse:
-        parse_argus_ammonium_sulphate_spot_deals_selection(df, final_data, agency, product, publish_date, file_name_short)
-    if "Recent spot sales" in tables_to_parse:
-        parse_recent_spot_sales(df, final_data, agency, product, publish_date, file_name_short)
-    if "Indian NPK arrivals" in tables_to_parse:
-        parse_indian_npk_arrivals(df, final_data, agency, product, publish_date, file_name_short)
-    if "Selected Spot Sales" in tables_to_parse:
-        parse_selected_spot_sales(df, final_data, agency, publish_date, file_name_short)
-    if "India MOP vessel line-up" in tables_to_parse:
-        parse_india_mop_vessel_lineup(df, final_data, agency, product, publish_date, file_name_short)
-    if "Brazil Potash line-up" in tables_to_parse:
-        parse_brazil_potash_lineup(df, final_data, agency, product, publish_date, file_name_short)
-
-# ======================================
-# Сохраняем результат в Excel
+# Колонки итоговой таблицы
 # ======================================
 columns_order = [
     "Publish Date", "Agency", "Product", "Seller", "Buyer", "Vessel",
@@ -980,8 +912,54 @@ columns_order = [
     "Grade", "Type", "Charterer"
 ]
 
-result_df = pd.DataFrame(final_data, columns=columns_order)
-output_file = 'lne_processed_output.xlsx'
-result_df.to_excel(output_file, index=False)
-print(f"✅ Файл успешно обработан и сохранён как '{output_file}'")
-print(f"Таблицы Brazilian MOP, Bronka MOP vessel line-up, St Petersburg MOP vessel line-up - НЕ ВЫВЕДЕНЫ тк ИСХОДНИК БИТЫЙ")
+# ======================================
+# Основной цикл парсинга
+# ======================================
+def main():
+    for file_info in FILES:
+        file_path = file_info["path"]
+        tables_to_parse = file_info["tables"]
+        workbook = open_workbook(file_path)
+
+        file_name = os.path.basename(file_path).replace('.xlsx', '')
+        first_part = file_name.split('_')[0].strip()
+        parts = first_part.split()
+
+        agency = parts[0] if len(parts) >= 1 else ''
+        product = parts[1] if len(parts) >= 2 else ''
+        publish_date = extract_publish_date(file_name)
+        file_name_short = os.path.basename(file_path)
+
+        # Листы с запрошенными таблицами; строки-заголовки найдены за один проход по каждому листу
+        anchors = {name: TABLE_ANCHORS[name] for name in tables_to_parse if name in TABLE_ANCHORS}
+        for grid, table_index in iter_sheet_grids(workbook, file_path, anchors, STREAMING):
+            if "Indian imports" in table_index:
+                parse_indian_imports(grid, final_data, agency, product, publish_date, file_name_short, table_index)
+            if "Spot Sales" in table_index:
+                parse_spot_sales(grid, final_data, agency, product, publish_date, file_name_short, table_index)
+            if "Argus Urea Spot Deals Selection" in table_index:
+                parse_argus_urea_spot_deals_selection(grid, final_data, agency, product, publish_date, file_name_short, table_index)
+            if "Argus Ammonium Sulphate Spot Deals Selection" in table_index:
+                parse_argus_ammonium_sulphate_spot_deals_selection(grid, final_data, agency, product, publish_date, file_name_short, table_index)
+            if "Recent spot sales" in table_index:
+                parse_recent_spot_sales(grid, final_data, agency, product, publish_date, file_name_short, table_index)
+            if "Indian NPK arrivals" in table_index:
+                parse_indian_npk_arrivals(grid, final_data, agency, product, publish_date, file_name_short, table_index)
+            if "Selected Spot Sales" in table_index:
+                parse_selected_spot_sales(grid, final_data, agency, publish_date, file_name_short, table_index)
+            if "India MOP vessel line-up" in table_index:
+                parse_india_mop_vessel_lineup(grid, final_data, agency, product, publish_date, file_name_short, table_index)
+            if "Brazil Potash line-up" in table_index:
+                parse_brazil_potash_lineup(grid, final_data, agency, product, publish_date, file_name_short, table_index)
+        workbook.close()
+
+    # Сохраняем результат в Excel
+    result_df = pd.DataFrame(final_data, columns=columns_order)
+    output_file = 'lne_processed_output.xlsx'
+    result_df.to_excel(output_file, index=False)
+    print(f"✅ Файл успешно обработан и сохранён как '{output_file}'")
+    print(f"Таблицы Brazilian MOP, Bronka MOP vessel line-up, St Petersburg MOP vessel line-up - НЕ ВЫВЕДЕНЫ тк ИСХОДНИК БИТЫЙ")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,24 @@
-import pandas as pd
+import argparse
 import re
 from datetime import datetime
+from functools import lru_cache
 import os
 
-# Define report_date at the beginning
-report_date = datetime.now()
+from Argus_common import (
+    first_cell_anchor, header_anchor, row_text_anchor,
+    open_workbook, iter_sheet_grids, build_table_index, find_table, cached_parse,
+    OUTPUT_FORMATS, write_records, file_tables, requested_anchors, AUTO_TABLES, RecordTable, parser_call, note_skip,
+    STATS_FORMATS, write_stats, volume_amount, expression_volume, find_header,
+    report_date_of, report_year
+)
+from Argus_patterns import (
+    DAY_RE, MID_RE, END_RE, MONTH_RE, YEAR_RE, FILE_DATE_RE, COMPACT_DATE_RE, INTEGER_RE,
+    NON_DIGIT_RE, NUMBER_WITH_COMMAS_RE, LEADING_NUMBER_RE, PRICE_SEPARATORS_RE, WHITESPACE_RE, INCOTERM_RE,
+    TRAILING_INCOTERM_RE, GRAND_TOTAL_RE, PORT_DATE_PARTS_RE, EDGE_DASHES_RE, literal_re
+)
+from Argus_store import STORE_FILE, save_to_store
+from Argus_outliers import OUTLIER_FIELD, flag_price_outliers
+from Argus_vessels import VOYAGE_FIELD, link_voyages
 
 # ======================================
 # Настройки путей и параметров
@@ -22,14 +36,31 @@ full_month_names = [
     'January', 'February', 'March', 'April', 'May', 'June',
     'July', 'August', 'September', 'October', 'November', 'December'
 ]
-final_data = []
+final_data = RecordTable()
+STREAMING = False  # True — потоковое чтение листа, см. Argus_common.iter_sheet_grids
+
+# ======================================
+# Якоря таблиц (строка-заголовок каждой таблицы)
+# ======================================
+TABLE_ANCHORS = {
+    "Indian imports": first_cell_anchor(r'indian\s*imports', re.IGNORECASE),
+    "Spot Sales": first_cell_anchor(r'^(?!.*\b(?:recent|selected)\b).*spot\s*sales', re.IGNORECASE),
+    "Argus Urea Spot Deals Selection": first_cell_anchor(r'argus\s*urea\s*spot\s*deals?\s*selection', re.IGNORECASE),
+    "Argus Ammonium Sulphate Spot Deals Selection": first_cell_anchor(
+        r'argus\s*ammonium\s*sulphate\s*spot\s*deals?\s*selection', re.IGNORECASE),
+    "Recent spot sales": first_cell_anchor(r'recent\s*spot\s*sales', re.IGNORECASE),
+    "Indian NPK arrivals": first_cell_anchor(r'indian\s+npk\s+arrivals', re.IGNORECASE),
+    "Selected Spot Sales": first_cell_anchor(r'\bselected.*spot.*sales\b', re.IGNORECASE),
+    "India MOP vessel line-up": header_anchor('Seller/Buyer', 'Vessel', 'Tonnes'),
+    "Brazil Potash line-up": row_text_anchor(r'brazil potash line-up', re.IGNORECASE),
+}
 
 # ======================================
 # Функция извлечения даты публикации из имени файла
 # ======================================
 def extract_publish_date(filename):
     # Ищем дату в имени файла (разные возможные форматы)
-    date_match = re.search(r'(\d{4}-\d{2}-\d{2}|\d{2}\.\d{2}\.\d{4}|\d{2}[A-Za-z]{3}\d{4})', filename)
+    date_match = FILE_DATE_RE.search(filename)
 
     if not date_match:
         return datetime.now().strftime("%d.%m.%Y")  # Если не найдено — текущая дата
@@ -42,7 +73,7 @@ def extract_publish_date(filename):
             dt = datetime.strptime(date_str, "%Y-%m-%d")
         elif '.' in date_str and len(date_str.split('.')) == 3:
             dt = datetime.strptime(date_str, "%d.%m.%Y")
-        elif re.match(r'^\d{2}[A-Za-z]{3}\d{4}$', date_str):  # например: 12Jun2025
+        elif COMPACT_DATE_RE.match(date_str):  # например: 12Jun2025
             dt = datetime.strptime(date_str, "%d%b%Y")
         else:
             return datetime.now().strftime("%d.%m.%Y")
@@ -55,22 +86,25 @@ def extract_publish_date(filename):
 # ======================================
 # Функция извлечения даты из строки
 # ======================================
-def parse_date(date_str, report_date=None):
-    if not date_str or str(date_str).strip() == "":
-        return ""
+# Одни и те же строки ("mid-Jun", "end Jul", "1-5 Aug") повторяются тысячи раз
+# за прогон архива, поэтому результат кэшируется по (строка, год и месяц отчёта).
+# Дата отчёта — дата выпуска, см. Argus_common.report_date_of.
+DATE_CACHE_SIZE = 4096
 
-    date_str = str(date_str).strip()
-    date_str_lower = date_str.lower()
+MONTH_NUMBERS = {
+    'jan': 1, 'feb': 2, 'mar': 3, 'apr': 4, 'may': 5, 'jun': 6,
+    'jul': 7, 'aug': 8, 'sep': 9, 'oct': 10, 'nov': 11, 'dec': 12
+}
 
-    # Если не передана дата отчета, используем текущую
-    if report_date is None:
-        report_date = datetime.now()
+
+def _normalize_date(date_str, year, report_month):
+    date_str_lower = date_str.lower()
 
     # Определяем день
-    day_match = re.search(r'\b(\d{1,2})\b', date_str)
-    if re.search(r'\bmid\b|\bme?i?d\b', date_str_lower):
+    day_match = DAY_RE.search(date_str)
+    if MID_RE.search(date_str_lower):
         day = 15
-    elif re.search(r'\bend\b|\ben?d\b', date_str_lower):
+    elif END_RE.search(date_str_lower):
         day = 30
     elif day_match:
         day = int(day_match.group(1))
@@ -78,23 +112,18 @@ def parse_date(date_str, report_date=None):
         day = 1
 
     # Определяем месяц
-    month_match = re.search(
-        r'\b(jan|january|feb|february|mar|march|apr|april|may|jun|june|'
-        r'jul|july|aug|august|sep|september|oct|october|nov|november|dec|december)\b',
-        date_str_lower
-    )
+    month_match = MONTH_RE.search(date_str_lower)
     if not month_match:
         return ""
-    month_abbr = month_match.group(1)[:3].capitalize()
-    month_num = datetime.strptime(month_abbr, "%b").month
+    month_num = MONTH_NUMBERS[month_match.group(1)[:3]]
 
     # Определяем год
-    year_match = re.search(r'\b(20\d{2})\b', date_str)
+    year_match = YEAR_RE.search(date_str)
     if year_match:
         year = int(year_match.group(1))  # Явно указанный год в строке
     else:
-        # Берем год из report_date (publish_date), если не указан явно
-        year = report_date.year
+        # Год выпуска, если не указан явно (с переходом через границу года)
+        year = report_year(month_num, year, report_month)
 
     try:
         dt = datetime(year=year, month=month_num, day=day)
@@ -103,12 +132,37 @@ def parse_date(date_str, report_date=None):
         print(f"[WARNING] Ошибка при парсинге даты '{date_str}': {e}")
         return ""
 
+
+_cached_normalize_date = lru_cache(maxsize=DATE_CACHE_SIZE)(_normalize_date)
+
+
+def configure_date_cache(maxsize=DATE_CACHE_SIZE):
+    # Пересоздаёт кэш с новым размером (None — без ограничения, 0 — без кэша)
+    global _cached_normalize_date
+    _cached_normalize_date = lru_cache(maxsize=maxsize)(_normalize_date)
+
+
+def date_cache_info():
+    # Счётчики попаданий/промахов: hits, misses, maxsize, currsize
+    return _cached_normalize_date.cache_info()
+
+
+def parse_date(date_str, report_date=None):
+    if not date_str or str(date_str).strip() == "":
+        return ""
+
+    # Если не передана дата отчета, используем текущую
+    if report_date is None:
+        report_date = datetime.now()
+
+    return _cached_normalize_date(str(date_str).strip(), report_date.year, report_date.month)
+
 # ======================================
 # Обработка цены: Low, High, Average
 # ======================================
 def process_prices(price_str):
-    price_str = re.sub(r'[\s,\–\-\u2013]', ' ', price_str.strip())
-    nums = list(map(int, re.findall(r'\b\d+\b', price_str)))
+    price_str = PRICE_SEPARATORS_RE.sub(' ', price_str.strip())
+    nums = list(map(int, INTEGER_RE.findall(price_str)))
     low = ""
     high = ""
     avg = ""
@@ -122,55 +176,68 @@ def process_prices(price_str):
     return {"Low": low, "High": high, "Average": avg}
 
 # ======================================
-# Проверка на выбросы
+# Обработка цен целой колонкой: Low, High, Average
 # ======================================
-def check_price_outliers(data_with_rows, filename):
-    if not data_with_rows:
-        return {}
+# В таблице одни и те же цены ("410-415 fob") повторяются из строки в строку, поэтому
+# каждое различное значение разбирается process_prices один раз, а результат
+# раскладывается по строкам — как split_date_port_column для колонки "дата + порт".
+def process_price_column(prices):
+    split = {price: process_prices(price) for price in set(prices)}
+    return [split[price] for price in prices]
 
-    prices = []
-    valid_data = []
 
-    for row_num, price, idx in data_with_rows:
-        try:
-            price_int = int(price)
-            prices.append(price_int)
-            valid_data.append((row_num, price_int, idx))
-        except (ValueError, TypeError):
-            continue
+def fill_prices(final_data, price_rows):
+    # price_rows: (индекс записи в final_data, строка цены)
+    for (idx, _), price in zip(price_rows, process_price_column([price for _, price in price_rows])):
+        final_data[idx]["Low"] = price["Low"]
+        final_data[idx]["High"] = price["High"]
+        final_data[idx]["Average"] = price["Average"]
 
-    if not valid_data:
-        return {}
+# ======================================
+# Разбор колонки "дата + порт": Date of arrival, Discharge port
+# ======================================
+# "mid-Jun Kandla" -> ("15.06.2025", "Kandla"). Колонка разбирается целиком после цикла
+# по строкам: каждое различное значение — один раз, обе колонки сразу.
+def split_date_port(date_port, report_date=None):
+    if not date_port:
+        return "", ""
+    # PORT_DATE_PARTS_RE убирает и все цифры, отдельный проход по DIGITS_RE не нужен
+    discharge_port = EDGE_DASHES_RE.sub('', PORT_DATE_PARTS_RE.sub('', date_port).strip()).strip()
+    return parse_date(date_port, report_date=report_date), discharge_port.lstrip('-').strip()
 
-    avg = sum(prices) / len(prices)
-    warnings_dict = {}
 
-    for row_number, price, idx in valid_data:
-        if avg != 0 and price > 2 * avg:
-            warning_msg = f"🟥 Проверьте цену в строке - {row_number} ({filename})"
-            warnings_dict[idx] = warning_msg
+def split_date_port_column(cells, report_date=None):
+    split = {cell: split_date_port(cell, report_date) for cell in set(cells)}
+    return [split[cell] for cell in cells]
 
-    return warnings_dict
+
+def fill_date_ports(final_data, date_port_rows, report_date=None):
+    # date_port_rows: (индекс записи в final_data, строка "дата + порт")
+    if not date_port_rows:
+        return
+    split = split_date_port_column([cell for _, cell in date_port_rows], report_date)
+    for (idx, _), (date_str, discharge_port) in zip(date_port_rows, split):
+        final_data[idx]["Date of arrival"] = date_str
+        final_data[idx]["Discharge port"] = discharge_port
 
 # ======================================
 # Парсинг Indian imports
 # ======================================
-def parse_indian_imports(df, final_data, agency, product, publish_date, file_name_short):
-    start_parsing = False
-    price_data = []
+def parse_indian_imports(grid, final_data, agency, product, publish_date, file_name_short, table_index=None):
+    report_date = report_date_of(publish_date)
+    price_rows = []
+    date_port_rows = []
     print("[INFO] Начинаем парсить Indian imports...")
 
-    for i, row in df.iterrows():
-        first_cell = str(row[0]).strip() if not pd.isna(row[0]) else ""
-        if not first_cell:
-            continue
-
-        # Поиск начала таблицы
-        if re.search(r'indian\s*imports', first_cell, re.IGNORECASE):
-            start_parsing = True
-            continue
+    # Начало таблицы берём из индекса якорей
+    start_row = find_table(grid, "Indian imports", TABLE_ANCHORS, table_index)
+    if start_row == -1:
+        return
 
-        if not start_parsing:
+    for i, row in grid.iter_rows(start_row + 1):
+        first_cell = row[0] or ""
+        if not first_cell:
+            note_skip("empty")
             continue
 
         # Прекращение парсинга по служебным словам
@@ -180,54 +247,36 @@ def parse_indian_imports(df, final_data, agency, product, publish_date, file_nam
 
         # Пропуск строки с заголовком "Seller"
         if first_cell == "Seller":
+            note_skip("header")
             continue
 
         # Проверка: если заполнен только первый столбец — это неполноценные данные → пропускаем
-        other_cells_empty = all(
-            (idx == 0) or (pd.isna(cell) or str(cell).strip() == "")
-            for idx, cell in enumerate(row)
-        )
-        if other_cells_empty:
+        if not any(row[1:]):
+            note_skip("incomplete")
             continue
 
         # Извлечение данных
         seller = first_cell
-        buyer = str(row[1]).strip() if 1 < len(row) and not pd.isna(row[1]) else ""
-        vessel = str(row[2]).strip() if 2 < len(row) and not pd.isna(row[2]) else ""
-        vol_origin = str(row[3]).strip() if 3 < len(row) and not pd.isna(row[3]) else ""
-        date_port = str(row[4]).strip() if 4 < len(row) and not pd.isna(row[4]) else ""
-        price = str(row[5]).strip() if 5 < len(row) and not pd.isna(row[5]) else ""
+        buyer = row[1] or ""
+        vessel = row[2] or ""
+        vol_origin = row[3] or ""
+        date_port = row[4] or ""
+        price = row[5] or ""
 
         # Обработка Volume и Origin
         volume = ""
         origin = ""
         if vol_origin:
-            vol_match = re.match(r'^([\d,]+)\s*(.*)$', vol_origin)
+            vol_match = LEADING_NUMBER_RE.match(vol_origin)
             if vol_match:
                 volume = vol_match.group(1).replace(',', '')
                 origin = vol_match.group(2).strip()
             else:
                 origin = vol_origin
 
-        # Обработка даты и порта разгрузки
-        date_str = parse_date(date_port, report_date=report_date)
-        discharge_port = ""
-        if date_port:
-            discharge_port = re.sub(
-                r'\d{1,2}\s*-*\s*|'
-                r'\b(jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)\w*\b|'
-                r'\b(mid|early|end)\b',
-                '', date_port, flags=re.IGNORECASE
-            ).strip()
-            discharge_port = re.sub(r'^-+\s*|\s*-+\s*$', '', discharge_port).strip()
-            discharge_port = re.sub(r'\d+', '', discharge_port).strip()
-            discharge_port = discharge_port.lstrip('-').strip()
-
-        # Обработка цены
-        price_info = process_prices(price)
-        final_index = len(final_data)
-        if price_info["Average"]:
-            price_data.append((i + 1, int(price_info["Average"]), final_index))
+        # Дату с портом разгрузки и цену разбираем после цикла сразу по всей колонке
+        date_port_rows.append((len(final_data), date_port))
+        price_rows.append((len(final_data), price))
 
         # Добавление записи
         final_data.append({
@@ -239,11 +288,11 @@ def parse_indian_imports(df, final_data, agency, product, publish_date, file_nam
             "Vessel": vessel,
             "Volume (t)": volume,
             "Origin": origin,
-            "Date of arrival": date_str,
-            "Discharge port": discharge_port,
-            "Low": price_info["Low"],
-            "High": price_info["High"],
-            "Average": price_info["Average"],
+            "Date of arrival": "",
+            "Discharge port": "",
+            "Low": "",
+            "High": "",
+            "Average": "",
             "Incoterm": "",
             "Destination": "",
             "Grade": "",
@@ -254,113 +303,103 @@ def parse_indian_imports(df, final_data, agency, product, publish_date, file_nam
             "Type": ""
         })
 
-    # Проверка цен на выбросы
-    price_warnings = check_price_outliers(price_data, file_name_short)
-    for idx, msg in price_warnings.items():
-        if idx < len(final_data):
-            final_data[idx]["Average"] = msg
+    fill_date_ports(final_data, date_port_rows, report_date=report_date)
+    fill_prices(final_data, price_rows)
 
 # ======================================
 # Парсинг Spot Sales
 # ======================================
-def parse_spot_sales(df, final_data, agency, product, publish_date, file_name_short):
-    start_parsing = False
-    price_data = []
-    for i, row in df.iterrows():
-        first_cell = str(row[0]).strip() if not pd.isna(row[0]) else ""
+def parse_spot_sales(grid, final_data, agency, product, publish_date, file_name_short, table_index=None):
+    report_date = report_date_of(publish_date)
+    price_rows = []
+    start_row = find_table(grid, "Spot Sales", TABLE_ANCHORS, table_index)
+    # Таблица занимает минимум 7 столбцов
+    if start_row == -1 or grid.width <= 6:
+        return
+    for i, row in grid.iter_rows(start_row + 1):
+        first_cell = row[0] or ""
         if not first_cell:
+            note_skip("empty")
             continue
-        if re.search(r'spot\s*sales', first_cell, re.IGNORECASE):
-            start_parsing = True
-            continue
-        if start_parsing and first_cell == "Shipment":
+        if first_cell == "Shipment":
+            note_skip("header")
             continue
-        if start_parsing and any(keyword in first_cell.lower() for keyword in ['copyright', 'лицензия']):
+        if any(keyword in first_cell.lower() for keyword in ['copyright', 'лицензия']):
             break
-        if start_parsing and first_cell and len(row) > 6:
-            shipment = first_cell
-            seller = str(row[1]).strip() if not pd.isna(row[1]) else ""
-            buyer = str(row[2]).strip() if not pd.isna(row[2]) else ""
-            destination_val = str(row[3]).strip() if not pd.isna(row[3]) else ""
-            tonnes = str(row[4]).strip() if not pd.isna(row[4]) else ""
-            price_incoterm = str(row[5]).strip() if not pd.isna(row[5]) else ""
-            origin_value = str(row[6]).strip() if not pd.isna(row[6]) else ""
-            
-            volume = ""
-            if tonnes:
-                vol_match = re.search(r'([\d,]+)', tonnes)
-                if vol_match:
-                    volume = vol_match.group(1).replace(',', '')
-            
-            price_info = process_prices(price_incoterm)
-            final_index = len(final_data)
-            if price_info["Average"]:
-                price_data.append((i + 1, int(price_info["Average"]), final_index))
-            
-            incoterm = ""
-            incoterm_match = re.search(
-                r'(fob|cfr|cif|fca|dap|cpt|c\w+?r|rail|exw|ddp|dpu|d\w+?p|f\w+?t|c\w+?y)',
-                price_incoterm,
-                re.IGNORECASE
-            )
-            if incoterm_match:
-                incoterm = incoterm_match.group().upper()
-            
-            final_data.append({
-                "Publish Date": publish_date,
-                "Agency": agency,
-                "Product": product,
-                "Seller": seller,
-                "Buyer": buyer,
-                "Vessel": "",
-                "Volume (t)": volume,
-                "Origin": origin_value.strip(),
-                "Date of arrival": parse_date(shipment, report_date=report_date),
-                "Discharge port": "",
-                "Low": price_info["Low"],
-                "High": price_info["High"],
-                "Average": price_info["Average"],
-                "Incoterm": incoterm,
-                "Destination": destination_val,
-                "Grade": "",
-                "Loading port": "",
-                "Shipment Date": "",
-                "Charterer": "",
-                "ETB": "",
-                "Type": ""
-            })
-    
-    price_warnings = check_price_outliers(price_data, file_name_short)
-    for idx, msg in price_warnings.items():
-        final_data[idx]["Average"] = msg
+
+        shipment = first_cell
+        seller = row[1] or ""
+        buyer = row[2] or ""
+        destination_val = row[3] or ""
+        tonnes = row[4] or ""
+        price_incoterm = row[5] or ""
+        origin_value = row[6] or ""
+
+        volume = ""
+        if tonnes:
+            vol_match = NUMBER_WITH_COMMAS_RE.search(tonnes)
+            if vol_match:
+                volume = vol_match.group(1).replace(',', '')
+
+        # Цену разбираем после цикла сразу по всей колонке
+        price_rows.append((len(final_data), price_incoterm))
+
+        incoterm = ""
+        incoterm_match = INCOTERM_RE.search(price_incoterm)
+        if incoterm_match:
+            incoterm = incoterm_match.group().upper()
+
+        final_data.append({
+            "Publish Date": publish_date,
+            "Agency": agency,
+            "Product": product,
+            "Seller": seller,
+            "Buyer": buyer,
+            "Vessel": "",
+            "Volume (t)": volume,
+            "Origin": origin_value,
+            "Date of arrival": parse_date(shipment, report_date=report_date),
+            "Discharge port": "",
+            "Low": "",
+            "High": "",
+            "Average": "",
+            "Incoterm": incoterm,
+            "Destination": destination_val,
+            "Grade": "",
+            "Loading port": "",
+            "Shipment Date": "",
+            "Charterer": "",
+            "ETB": "",
+            "Type": ""
+        })
+
+    fill_prices(final_data, price_rows)
 
 # ======================================
 # Парсинг Argus Urea Spot Deals Selection
 # ======================================
-def parse_argus_urea_spot_deals_selection(df, final_data, agency, product, publish_date, file_name_short):
-    start_parsing = False
+def parse_argus_urea_spot_deals_selection(grid, final_data, agency, product, publish_date, file_name_short, table_index=None):
+    report_date = report_date_of(publish_date)
     header_skipped = False  # Флаг для пропуска заголовков
 
     print("[INFO] Начинаем парсить Argus Urea Spot Deals Selection...")
 
-    for i, row in df.iterrows():
-        first_cell = str(row[0]).strip() if not pd.isna(row[0]) else ""
-
-        # Поиск начала таблицы с возможностью частичного совпадения текста
-        if re.search(r'argus\s*urea\s*spot\s*deals?\s*selection', first_cell, re.IGNORECASE):
-            start_parsing = True
-            continue
+    start_row = find_table(grid, "Argus Urea Spot Deals Selection", TABLE_ANCHORS, table_index)
+    if start_row == -1:
+        return
 
-        if not start_parsing:
-            continue
+    for i, row in grid.iter_rows(start_row + 1):
+        first_cell = row[0] or ""
 
         # Проверяем, не является ли текущая строка заголовком
         if not header_skipped and any(kw in first_cell.lower() for kw in ['grade', 'product', 'origin', 'supplier', 'buyer']):
             header_skipped = True
+            note_skip("header")
             continue
 
         # Пропуск полностью пустых строк
-        if all(pd.isna(cell) or str(cell).strip() == "" for cell in row[:8]):
+        if not any(row[:8]):
+            note_skip("empty")
             continue
 
         # Остановка при появлении служебных строк
@@ -369,27 +408,30 @@ def parse_argus_urea_spot_deals_selection(df, final_data, agency, product, publi
             break
 
         # Извлечение данных
-        grade = str(row[0]).strip() if len(row) > 0 and not pd.isna(row[0]) else ""
-        origin = str(row[1]).strip() if len(row) > 1 and not pd.isna(row[1]) else ""
-        supplier = str(row[2]).strip() if len(row) > 2 and not pd.isna(row[2]) else ""
-        buyer = str(row[3]).strip() if len(row) > 3 and not pd.isna(row[3]) else ""
-        destination = str(row[4]).strip() if len(row) > 4 and not pd.isna(row[4]) else ""
-        volume_raw = str(row[5]).strip() if len(row) > 5 and not pd.isna(row[5]) else ""
-        price_raw = str(row[6]).strip() if len(row) > 6 and not pd.isna(row[6]) else ""
-        shipment_raw = str(row[7]).strip() if len(row) > 7 and not pd.isna(row[7]) else ""
+        grade = first_cell
+        origin = row[1] or ""
+        supplier = row[2] or ""
+        buyer = row[3] or ""
+        destination = row[4] or ""
+        volume_raw = row[5] or ""
+        price_raw = row[6] or ""
+        shipment_raw = row[7] or ""
 
         # Обработка Volume
-        volume = re.sub(r'[^\d]', '', volume_raw) if volume_raw else ""
+        volume = NON_DIGIT_RE.sub('', volume_raw) if volume_raw else ""
+        amount = expression_volume(volume_raw) if volume_raw else None
+        if amount is not None:
+            volume = str(int(amount))  # "2x25,000" -> 50000, а не 225000
 
         # Обработка Price
-        price_clean = re.sub(r'\s+', ' ', price_raw).strip()
+        price_clean = WHITESPACE_RE.sub(' ', price_raw).strip()
         incoterm = ""
-        incoterm_match = re.search(r'(fob|cfr|cif|fca|dap|cpt|c\w+?r|rail|exw|ddp|dpu|d\w+?p|f\w+?t|c\w+?y)', price_clean, re.IGNORECASE)
+        incoterm_match = INCOTERM_RE.search(price_clean)
         if incoterm_match:
             incoterm = incoterm_match.group().upper()
-            price_clean = re.sub(incoterm_match.group(), '', price_clean, flags=re.IGNORECASE).strip()
+            price_clean = literal_re(incoterm_match.group()).sub('', price_clean).strip()
 
-        nums = list(map(int, re.findall(r'\b\d+\b', price_clean)))
+        nums = list(map(int, INTEGER_RE.findall(price_clean)))
         if len(nums) == 1:
             average = str(nums[0])
             low, high = "", ""
@@ -430,28 +472,26 @@ def parse_argus_urea_spot_deals_selection(df, final_data, agency, product, publi
 # ======================================
 # Парсинг Argus Ammonium Sulphate Spot Deals Selection
 # ======================================
-def parse_argus_ammonium_sulphate_spot_deals_selection(df, final_data, agency, product, publish_date, file_name_short):
-    start_parsing = False
+def parse_argus_ammonium_sulphate_spot_deals_selection(grid, final_data, agency, product, publish_date, file_name_short, table_index=None):
+    report_date = report_date_of(publish_date)
     header_skipped = False  # Флаг для пропуска заголовков
 
-    for i, row in df.iterrows():
-        first_cell = str(row[0]).strip() if not pd.isna(row[0]) else ""
+    start_row = find_table(grid, "Argus Ammonium Sulphate Spot Deals Selection", TABLE_ANCHORS, table_index)
+    if start_row == -1:
+        return
 
-        # Поиск начала таблицы с возможностью частичного совпадения текста
-        if re.search(r'argus\s*ammonium\s*sulphate\s*spot\s*deals?\s*selection', first_cell, re.IGNORECASE):
-            start_parsing = True
-            continue
-
-        if not start_parsing:
-            continue
+    for i, row in grid.iter_rows(start_row + 1):
+        first_cell = row[0] or ""
 
         # Проверяем, не является ли текущая строка заголовком
         if not header_skipped and any(kw in first_cell.lower() for kw in ['grade', 'product', 'origin', 'supplier', 'buyer']):
             header_skipped = True
+            note_skip("header")
             continue
 
         # Пропуск полностью пустых строк
-        if all(pd.isna(cell) or str(cell).strip() == "" for cell in row[:8]):
+        if not any(row[:8]):
+            note_skip("empty")
             continue
 
         # Остановка при появлении служебных строк
@@ -459,28 +499,31 @@ def parse_argus_ammonium_sulphate_spot_deals_selection(df, final_data, agency, p
             break
 
         # Извлечение данных
-        grade = str(row[0]).strip() if len(row) > 0 and not pd.isna(row[0]) else ""
-        origin = str(row[1]).strip() if len(row) > 1 and not pd.isna(row[1]) else ""
-        supplier = str(row[2]).strip() if len(row) > 2 and not pd.isna(row[2]) else ""
-        buyer = str(row[3]).strip() if len(row) > 3 and not pd.isna(row[3]) else ""
-        destination = str(row[4]).strip() if len(row) > 4 and not pd.isna(row[4]) else ""
-        volume_raw = str(row[5]).strip() if len(row) > 5 and not pd.isna(row[5]) else ""
-        price_raw = str(row[6]).strip() if len(row) > 6 and not pd.isna(row[6]) else ""
-        shipment_raw = str(row[7]).strip() if len(row) > 7 and not pd.isna(row[7]) else ""
+        grade = first_cell
+        origin = row[1] or ""
+        supplier = row[2] or ""
+        buyer = row[3] or ""
+        destination = row[4] or ""
+        volume_raw = row[5] or ""
+        price_raw = row[6] or ""
+        shipment_raw = row[7] or ""
 
         # Обработка Volume (удаление всех нецифровых символов)
-        volume = re.sub(r'[^\d]', '', volume_raw) if volume_raw else ""
+        volume = NON_DIGIT_RE.sub('', volume_raw) if volume_raw else ""
+        amount = expression_volume(volume_raw) if volume_raw else None
+        if amount is not None:
+            volume = str(int(amount))  # "2x25,000" -> 50000, а не 225000
 
         # Обработка Price
-        price_clean = re.sub(r'\s+', ' ', price_raw).strip()
+        price_clean = WHITESPACE_RE.sub(' ', price_raw).strip()
         incoterm = ""
-        incoterm_match = re.search(r'(fob|cfr|cif|fca|dap|cpt|c\w+?r|rail|exw|ddp|dpu|d\w+?p|f\w+?t|c\w+?y)', price_clean, re.IGNORECASE)
+        incoterm_match = INCOTERM_RE.search(price_clean)
         if incoterm_match:
             incoterm = incoterm_match.group().upper()
-            price_clean = re.sub(incoterm_match.group(), '', price_clean, flags=re.IGNORECASE).strip()
+            price_clean = literal_re(incoterm_match.group()).sub('', price_clean).strip()
 
         # Извлечение чисел из цены
-        nums = list(map(int, re.findall(r'\b\d+\b', price_clean)))
+        nums = list(map(int, INTEGER_RE.findall(price_clean)))
         if len(nums) == 1:
             average = str(nums[0])
             low, high = "", ""
@@ -521,28 +564,27 @@ def parse_argus_ammonium_sulphate_spot_deals_selection(df, final_data, agency, p
 # ======================================
 # Парсинг Recent spot sales
 # ======================================
-def parse_recent_spot_sales(df, final_data, agency, product, publish_date, file_name_short):
-    start_parsing = False
+def parse_recent_spot_sales(grid, final_data, agency, product, publish_date, file_name_short, table_index=None):
+    report_date = report_date_of(publish_date)
     header_skipped = False  # Флаг для пропуска заголовков
-    price_data = []
+    price_rows = []
     print("[INFO] Начинаем парсить Recent spot sales...")
 
-    for i, row in df.iterrows():
-        first_cell = str(row[0]).strip() if not pd.isna(row[0]) else ""
-        if not first_cell:
-            continue
-
-        # Поиск начала таблицы
-        if re.search(r'recent\s*spot\s*sales', first_cell, re.IGNORECASE):
-            start_parsing = True
-            continue
+    start_row = find_table(grid, "Recent spot sales", TABLE_ANCHORS, table_index)
+    # Таблица занимает минимум 9 столбцов
+    if start_row == -1 or grid.width < 9:
+        return
 
-        if not start_parsing:
+    for i, row in grid.iter_rows(start_row + 1):
+        first_cell = row[0] or ""
+        if not first_cell:
+            note_skip("empty")
             continue
 
         # Пропуск строки с заголовками
         if not header_skipped and any(kw in first_cell.lower() for kw in ['supplier', 'buyer', 'product', 'volume']):
             header_skipped = True
+            note_skip("header")
             continue
 
         # Остановка по служебным словам
@@ -550,57 +592,42 @@ def parse_recent_spot_sales(df, final_data, agency, product, publish_date, file_
             print(f"[INFO] Встретили служебную строку → завершаем парсинг Recent spot sales")
             break
 
-        # Проверяем, что данных достаточно (минимум 9 столбцов)
-        if not len(row) >= 9 or pd.isna(row[0]):
-            continue
-
         # Извлечение данных
-        supplier = str(row[0]).strip()
-        origin = str(row[1]).strip()
-        buyer = str(row[2]).strip()
-        destination = str(row[3]).strip()
-        product_grade = str(row[4]).strip()
-        volume = str(row[5]).strip()
-        price_range = str(row[6]).strip()
-        basis = str(row[7]).strip()
-        shipment_period = str(row[9]).strip()
+        supplier = first_cell
+        origin = row[1] or ""
+        buyer = row[2] or ""
+        destination = row[3] or ""
+        product_grade = row[4] or ""
+        volume = row[5] or ""
+        price_range = row[6] or ""
+        basis = row[7] or ""
+        shipment_period = row[9] or ""
 
         # Обработка Volume
         volume_processed = ""
         if volume:
-            try:
-                vol_expr = re.sub(r'[хХxX*×]', '*', volume.replace(',', ''))
-                vol_expr = re.sub(r'[:÷]', '/', vol_expr)
-                if re.search(r'[\+\-\*/]', vol_expr):
-                    result = eval(vol_expr)
-                    volume_processed = str(int(result) * 1000)
-                else:
-                    vol_num = re.search(r'(\d+)', vol_expr)
-                    if vol_num:
-                        volume_processed = str(int(vol_num.group(1)) * 1000)
-            except Exception:
-                volume_processed = ""
-
-        # Обработка цены
-        price_info = process_prices(price_range)
-        final_index = len(final_data)
-        if price_info["Average"]:
-            price_data.append((i + 1, int(price_info["Average"]), final_index))
+            # "2x25", "30:2" и т.п. считаются без eval, см. Argus_common.volume_amount
+            amount = volume_amount(volume)
+            if amount is not None:
+                volume_processed = str(amount * 1000)
+
+        # Цену разбираем после цикла сразу по всей колонке
+        price_rows.append((len(final_data), price_range))
 
         # Обработка даты отгрузки
         date_str = ""
         if shipment_period and shipment_period != 'TBC':
-            shipment_lower = shipment_period.strip().lower()
+            shipment_lower = shipment_period.lower()
             for month in full_month_names:
                 if shipment_lower == month.lower():
                     month_index = full_month_names.index(month) + 1
-                    date_str = f"01.{month_index:02d}.{report_date.year}"
+                    date_str = f"01.{month_index:02d}.{report_year(month_index, report_date.year, report_date.month)}"
                     break
             if not date_str:
                 for month in full_month_names:
                     if shipment_lower == month[:3].lower():
                         month_index = full_month_names.index(month) + 1
-                        date_str = f"01.{month_index:02d}.{report_date.year}"
+                        date_str = f"01.{month_index:02d}.{report_year(month_index, report_date.year, report_date.month)}"
                         break
 
         # Добавление записи
@@ -615,9 +642,9 @@ def parse_recent_spot_sales(df, final_data, agency, product, publish_date, file_
             "Origin": origin,
             "Date of arrival": date_str,
             "Discharge port": "",
-            "Low": price_info["Low"],
-            "High": price_info["High"],
-            "Average": price_info["Average"],
+            "Low": "",
+            "High": "",
+            "Average": "",
             "Incoterm": basis.upper(),
             "Destination": destination,
             "Grade": product_grade,
@@ -628,119 +655,124 @@ def parse_recent_spot_sales(df, final_data, agency, product, publish_date, file_
             "Type": ""
         })
 
-    # Проверка цен на выбросы
-    price_warnings = check_price_outliers(price_data, file_name_short)
-    for idx, msg in price_warnings.items():
-        if idx < len(final_data):
-            final_data[idx]["Average"] = msg
+    fill_prices(final_data, price_rows)
 
 # ======================================
 # Парсинг Indian NPK arrivals
 # ======================================
-def parse_indian_npk_arrivals(df, final_data, agency, product, publish_date, file_name_short):
-    start_parsing = False
-    for i, row in df.iterrows():
-        first_cell = str(row[0]).strip() if not pd.isna(row[0]) else ""
+def parse_indian_npk_arrivals(grid, final_data, agency, product, publish_date, file_name_short, table_index=None):
+    report_date = report_date_of(publish_date)
+    start_row = find_table(grid, "Indian NPK arrivals", TABLE_ANCHORS, table_index)
+    # Таблица занимает минимум 6 столбцов
+    if start_row == -1 or grid.width < 6:
+        return
+    for i, row in grid.iter_rows(start_row + 1):
+        first_cell = row[0] or ""
         if not first_cell:
+            note_skip("empty")
             continue
-        if re.search(r'indian\s+npk\s+arrivals', first_cell, re.IGNORECASE):
-            start_parsing = True
+        if first_cell == "Supplier":
+            note_skip("header")
             continue
-        if start_parsing and first_cell == "Supplier":
-            continue
-        if start_parsing and re.search(r'^grand\s+total', first_cell, re.IGNORECASE):
+        if GRAND_TOTAL_RE.search(first_cell):
             break
-        if start_parsing and first_cell.lower() == "total":
+        if first_cell.lower() == "total":
+            note_skip("subtotal")
             continue
-        if start_parsing and first_cell and len(row) >= 6:
-            supplier = str(row[0]).strip()
-            buyer = str(row[1]).strip()
-            vessel = str(row[2]).strip()
-            grade = str(row[3]).strip()
-            vol_loading = str(row[4]).strip()
-            discharge_port = str(row[5]).strip()
-            arrival = str(row[6]).strip() if len(row) > 6 else ""
-
-            volume_clean = ""
-            loading_port = ""
-            if vol_loading:
-                vol_match = re.match(r'^([\d,]+)\s*(.*)$', vol_loading)
-                if vol_match:
-                    volume_clean = vol_match.group(1).replace(',', '').replace('.', '')
-                    loading_port = vol_match.group(2).strip()
-                else:
-                    loading_port = vol_loading.strip()
-
-            date_str = parse_date(arrival, report_date=report_date)
 
-            final_data.append({
-                "Publish Date": publish_date,
-                "Agency": agency,
-                "Product": product,
-                "Seller": "",
-                "Buyer": buyer,
-                "Vessel": vessel,
-                "Volume (t)": volume_clean,
-                "Origin": supplier,
-                "Date of arrival": date_str,
-                "Discharge port": discharge_port,
-                "Low": "",
-                "High": "",
-                "Average": "",
-                "Incoterm": "",
-                "Destination": "",
-                "Grade": grade,
-                "Loading port": loading_port,
-                "Shipment Date": "",
-                "Charterer": "",
-                "ETB": "",
-                "Type": ""
-            })
+        supplier = first_cell
+        buyer = row[1] or ""
+        vessel = row[2] or ""
+        grade = row[3] or ""
+        vol_loading = row[4] or ""
+        discharge_port = row[5] or ""
+        arrival = row[6] or ""
+
+        volume_clean = ""
+        loading_port = ""
+        if vol_loading:
+            vol_match = LEADING_NUMBER_RE.match(vol_loading)
+            if vol_match:
+                volume_clean = vol_match.group(1).replace(',', '').replace('.', '')
+                loading_port = vol_match.group(2).strip()
+            else:
+                loading_port = vol_loading
+
+        date_str = parse_date(arrival, report_date=report_date)
+
+        final_data.append({
+            "Publish Date": publish_date,
+            "Agency": agency,
+            "Product": product,
+            "Seller": "",
+            "Buyer": buyer,
+            "Vessel": vessel,
+            "Volume (t)": volume_clean,
+            "Origin": supplier,
+            "Date of arrival": date_str,
+            "Discharge port": discharge_port,
+            "Low": "",
+            "High": "",
+            "Average": "",
+            "Incoterm": "",
+            "Destination": "",
+            "Grade": grade,
+            "Loading port": loading_port,
+            "Shipment Date": "",
+            "Charterer": "",
+            "ETB": "",
+            "Type": ""
+        })
 
 # ======================================
 # Парсинг Selected Spot Sales
 # ======================================
-def parse_selected_spot_sales(df, final_data, agency, publish_date, file_name_short):
-    start_parsing = False
+def parse_selected_spot_sales(grid, final_data, agency, publish_date, file_name_short, table_index=None):
+    report_date = report_date_of(publish_date)
     file_name_base = os.path.basename(file_name_short).split('_')[0].strip()
     file_name_parts = file_name_base.split()
     default_product = file_name_parts[1] if len(file_name_parts) > 1 else ""
+    price_rows = []
 
-    for i, row in df.iterrows():
-        first_cell = str(row[0]).strip() if not pd.isna(row[0]) else ""
+    start_row = find_table(grid, "Selected Spot Sales", TABLE_ANCHORS, table_index)
+    if start_row == -1:
+        return
+    # Таблица занимает минимум 7 столбцов
+    has_all_columns = grid.width >= 7
 
-        if re.search(r'\bselected.*spot.*sales\b', first_cell, re.IGNORECASE):
-            start_parsing = True
-            continue
+    for i, row in grid.iter_rows(start_row + 1):
+        first_cell = row[0] or ""
 
-        if start_parsing and any(
-            isinstance(col, str) and col.strip().lower() in ["origin", "seller", "buyer", "destination", "volume ('000t)", "price delivery period"]
+        if any(
+            col and col.lower() in ["origin", "seller", "buyer", "destination", "volume ('000t)", "price delivery period"]
             for col in row[:7]
         ):
+            note_skip("header")
             continue
 
-        if start_parsing and any(kw in first_cell.lower() for kw in ['copyright', 'total', 'note']):
+        if any(kw in first_cell.lower() for kw in ['copyright', 'total', 'note']):
             break
 
-        if start_parsing and first_cell and len(row) >= 7:
-            if all(pd.isna(cell) or str(cell).strip() == "" for cell in row[1:]):
+        if first_cell and has_all_columns:
+            if not any(row[1:]):
+                note_skip("incomplete")
                 continue
 
-            origin = str(row[0]).strip()
-            seller = str(row[1]).strip()
-            buyer = str(row[2]).strip()
-            destination = str(row[3]).strip()
-            volume_product = str(row[4]).strip()
-            price = str(row[5]).strip()
-            delivery_period = str(row[6]).strip() if len(row) > 6 else ""
+            origin = first_cell
+            seller = row[1] or ""
+            buyer = row[2] or ""
+            destination = row[3] or ""
+            volume_product = row[4] or ""
+            price = row[5] or ""
+            delivery_period = row[6] or ""
 
             volume = ""
             product = ""
             if volume_product:
-                vol_prod_match = re.match(r'^([\d,]+)\s*(.*)$', volume_product)
+                vol_prod_match = LEADING_NUMBER_RE.match(volume_product)
                 if vol_prod_match:
                     vol_str = vol_prod_match.group(1)
-                    vol_clean = re.sub(r'[^\d]', '', vol_str)
+                    vol_clean = NON_DIGIT_RE.sub('', vol_str)
                     if vol_clean.isdigit():
                         volume = vol_clean + "000"
                     product = vol_prod_match.group(2).strip()
@@ -748,29 +780,22 @@ def parse_selected_spot_sales(df, final_data, agency, publish_date, file_name_sh
             if not product or product.upper() in ["TBC", "-", ".", "..", "...", "N/A"]:
                 product = default_product
 
-            price_info = process_prices(price)
-            low = price_info["Low"]
-            high = price_info["High"]
-            average = price_info["Average"]
+            # Цену разбираем после цикла сразу по всей колонке
+            price_rows.append((len(final_data), price))
 
             incoterm = ""
             if price:
-                incoterm_match = re.search(r'[A-Za-z]{3}$', price)
+                incoterm_match = TRAILING_INCOTERM_RE.search(price)
                 if incoterm_match:
                     incoterm = incoterm_match.group().upper()
 
             shipment_date = ""
             if delivery_period:
-                month_match = re.search(
-                    r'\b(jan|january|feb|february|mar|march|apr|april|may|jun|june|'
-                    r'jul|july|aug|august|sep|september|oct|october|nov|november|dec|december)\b',
-                    delivery_period.lower()
-                )
+                month_match = MONTH_RE.search(delivery_period.lower())
                 if month_match:
                     month_str = month_match.group(1)[:3].capitalize()
                     try:
-                        current_year = datetime.now().year
-                        dt = datetime.strptime(f"01 {month_str} {current_year}", "%d %b %Y")
+                        dt = datetime.strptime(f"01 {month_str} {report_date.year}", "%d %b %Y")
                         shipment_date = parse_date(delivery_period, report_date=report_date)
                     except ValueError:
                         pass
@@ -786,9 +811,9 @@ def parse_selected_spot_sales(df, final_data, agency, publish_date, file_name_sh
                 "Origin": origin,
                 "Date of arrival": "",
                 "Discharge port": "",
-                "Low": low,
-                "High": high,
-                "Average": average,
+                "Low": "",
+                "High": "",
+                "Average": "",
                 "Incoterm": incoterm,
                 "Destination": destination,
                 "Grade": "",
@@ -799,49 +824,48 @@ def parse_selected_spot_sales(df, final_data, agency, publish_date, file_name_sh
                 "Type": ""
             })
 
+    fill_prices(final_data, price_rows)
+
 # ======================================
 # Парсинг India MOP vessel line-up
 # ======================================
-def parse_india_mop_vessel_lineup(df, final_data, agency, product, publish_date, file_name_short):
-    header_row = -1
-    for i, row in df.iterrows():
-        if 'Seller/Buyer' in str(row[0]) and 'Vessel' in str(row[1]) and 'Tonnes' in str(row[2]):
-            header_row = i
-            break
-    
-    if header_row == -1:
+def parse_india_mop_vessel_lineup(grid, final_data, agency, product, publish_date, file_name_short, table_index=None):
+    report_date = report_date_of(publish_date)
+    # Якорь этой таблицы — сама строка шапки Seller/Buyer | Vessel | Tonnes
+    header_row = find_table(grid, "India MOP vessel line-up", TABLE_ANCHORS, table_index)
+    # Таблица занимает минимум 6 столбцов
+    if header_row == -1 or grid.width < 6:
         return
-    
+
     first_data_row = -1
-    for i in range(header_row + 1, len(df)):
-        row = df.iloc[i]
-        first_cell = str(row[0]).strip()
-        if '/' in first_cell and any(c.isdigit() for c in str(row[2])):
+    for i, row in grid.iter_rows(header_row + 1):
+        first_cell = row[0] or ""
+        if '/' in first_cell and any(c.isdigit() for c in (row[2] or "")):
             first_data_row = i
             break
-    
+
     if first_data_row == -1:
         return
-    
-    for i in range(first_data_row, len(df)):
-        row = df.iloc[i]
-        first_cell = str(row[0]).strip()
-        
+
+    for i, row in grid.iter_rows(first_data_row):
+        first_cell = row[0] or ""
+
         if not first_cell or first_cell.lower() in ['copyright', 'total']:
             break
-            
-        if len(row) < 6 or '/' not in first_cell:
+
+        if '/' not in first_cell:
+            note_skip("incomplete")
             continue
-            
+
         seller_buyer = first_cell
-        vessel = str(row[1]).strip()
-        tonnes = str(row[2]).strip()
-        load_port = str(row[3]).strip()
-        discharge_port = str(row[4]).strip()
-        arrival = str(row[5]).strip()
+        vessel = row[1] or ""
+        tonnes = row[2] or ""
+        load_port = row[3] or ""
+        discharge_port = row[4] or ""
+        arrival = row[5] or ""
+
+        seller, buyer = seller_buyer.split('/', 1)
 
-        seller, buyer = seller_buyer.split('/', 1) if '/' in seller_buyer else (seller_buyer, "")
-        
         volume = ''.join(c for c in tonnes if c.isdigit())
 
         final_data.append({
@@ -871,78 +895,57 @@ def parse_india_mop_vessel_lineup(df, final_data, agency, product, publish_date,
 # ======================================
 # Парсинг Brazil Potash line-up
 # ======================================
-def parse_brazil_potash_lineup(df, final_data, agency, product, publish_date, file_name_short):
-    start_row = -1
-    for i, row in df.iterrows():
-        row_str = ' '.join(str(cell).strip().lower() for cell in row if pd.notna(cell))
-        if 'brazil potash line-up' in row_str.lower():
-            start_row = i
-            break
-    
+BRAZIL_LINEUP_COLUMNS = (
+    ("port", ("port",)),
+    ("vessel", ("vessel",)),
+    ("charterer", ("charterer",)),
+    ("origin", ("origin",)),
+    ("product", ("product",)),
+    ("volume", ("volume",)),
+    ("receiver", ("receiver",)),
+    ("eta", ("eta",)),
+    ("etb", ("etb",)),
+)
+
+
+def parse_brazil_potash_lineup(grid, final_data, agency, product, publish_date, file_name_short, table_index=None):
+    report_date = report_date_of(publish_date)
+    start_row = find_table(grid, "Brazil Potash line-up", TABLE_ANCHORS, table_index)
     if start_row == -1:
         return
-    
-    header_row = -1
-    required_headers = ['port', 'vessel', 'charterer', 'origin', 'product', 'volume', 'receiver', 'eta', 'etb']
-    
-    for i in range(start_row, min(start_row + 10, len(df))):
-        row = df.iloc[i]
-        row_headers = [str(cell).strip().lower() for cell in row if pd.notna(cell)]
-        
-        if all(any(h in header for header in row_headers) for h in required_headers):
-            header_row = i
-            break
-    
-    if header_row == -1:
+
+    # Шапка — одна строка со всеми колонками среди первых 10 строк таблицы; одна ячейка
+    # может закрывать несколько колонок ("ETA/ETB"), вторая из них тогда остаётся пустой
+    layout = find_header(grid, start_row, start_row + 10, BRAZIL_LINEUP_COLUMNS, merge_rows=False, shared_cells=True)
+    if layout is None:
         return
-    
-    col_map = {}
-    header = df.iloc[header_row]
-    
-    for idx, cell in enumerate(header):
-        cell_str = str(cell).strip().lower()
-        if 'port' in cell_str:
-            col_map['port'] = idx
-        elif 'vessel' in cell_str:
-            col_map['vessel'] = idx
-        elif 'charterer' in cell_str:
-            col_map['charterer'] = idx
-        elif 'origin' in cell_str:
-            col_map['origin'] = idx
-        elif 'product' in cell_str:
-            col_map['product'] = idx
-        elif 'volume' in cell_str:
-            col_map['volume'] = idx
-        elif 'receiver' in cell_str:
-            col_map['receiver'] = idx
-        elif 'eta' in cell_str:
-            col_map['eta'] = idx
-        elif 'etb' in cell_str:
-            col_map['etb'] = idx
-    
+    vessel_col = layout.index('vessel')
+    if vessel_col is None:
+        vessel_col = 1
+    extract = layout.extractor(('port', 'vessel', 'charterer', 'origin', 'product', 'volume', 'receiver', 'eta', 'etb'))
+
     empty_rows = 0
-    for i in range(header_row + 1, len(df)):
-        row = df.iloc[i]
-        
-        vessel_col = col_map.get('vessel', 1)
-        if pd.isna(row[vessel_col]) or str(row[vessel_col]).strip() == "":
+    for i, row in grid.iter_rows(layout.header_row + 1):
+        if not row[vessel_col]:
             empty_rows += 1
             if empty_rows >= 3:
                 break
+            note_skip("empty")
             continue
-        
+
         empty_rows = 0
-        
-        port = str(row[col_map['port']]).strip() if 'port' in col_map and col_map['port'] < len(row) and pd.notna(row[col_map['port']]) else ""
-        vessel = str(row[col_map['vessel']]).strip() if 'vessel' in col_map and col_map['vessel'] < len(row) and pd.notna(row[col_map['vessel']]) else ""
-        charterer = str(row[col_map['charterer']]).strip() if 'charterer' in col_map and col_map['charterer'] < len(row) and pd.notna(row[col_map['charterer']]) else ""
-        origin = str(row[col_map['origin']]).strip() if 'origin' in col_map and col_map['origin'] < len(row) and pd.notna(row[col_map['origin']]) else ""
-        product_name = str(row[col_map['product']]).strip() if 'product' in col_map and col_map['product'] < len(row) and pd.notna(row[col_map['product']]) else product
-        volume = re.sub(r'[^\d]', '', str(row[col_map['volume']])) if 'volume' in col_map and col_map['volume'] < len(row) and pd.notna(row[col_map['volume']]) else ""
-        receiver = str(row[col_map['receiver']]).strip() if 'receiver' in col_map and col_map['receiver'] < len(row) and pd.notna(row[col_map['receiver']]) else ""
-        eta_date = parse_date(str(row[col_map['eta']]), report_date=report_date) if 'eta' in col_map and col_map['eta'] < len(row) and pd.notna(row[col_map['eta']]) else ""
-        etb_date = parse_date(str(row[col_map['etb']]), report_date=report_date) if 'etb' in col_map and col_map['etb'] < len(row) and pd.notna(row[col_map['etb']]) else ""
-        
+
+        port, vessel, charterer, origin, product_name, volume, receiver, eta, etb = extract(row)
+        port = port or ""
+        vessel = vessel or ""
+        charterer = charterer or ""
+        origin = origin or ""
+        product_name = product_name or product
+        volume = NON_DIGIT_RE.sub('', volume or "")
+        receiver = receiver or ""
+        eta_date = parse_date(eta or "", report_date=report_date)
+        etb_date = parse_date(etb or "", report_date=report_date)
+
         final_data.append({
             "Publish Date": publish_date,
             "Agency": agency,
@@ -968,13 +971,30 @@ def parse_brazil_potash_lineup(df, final_data, agency, product, publish_date, fi
         })
 
 # ======================================
-# Основной цикл парсинга
+# Колонки итоговой таблицы
 # ======================================
-for file_info in FILES:
-    file_path = file_info["path"]
-    tables_to_parse = file_info["tables"]
-    df = pd.read_excel(file_path, header=None, engine='openpyxl')
+columns_order = [
+    "Publish Date", "Agency", "Product", "Seller", "Buyer", "Vessel",
+    "Volume (t)", "Origin", "Destination", "Date of arrival", "Shipment Date", 
+    "ETB", "Discharge port", "Loading port", "Low", "High", "Average", "Incoterm", 
+    "Grade", "Type", "Charterer", OUTLIER_FIELD, VOYAGE_FIELD
+]
+OUTPUT_FILE = 'lne_processed_output.xlsx'
+# Типы колонок для csv/parquet/feather (xlsx пишется строками)
+OUTPUT_TYPES = {
+    "Publish Date": "date", "Date of arrival": "date", "Shipment Date": "date", "ETB": "date",
+    "Volume (t)": "int", "Low": "int", "High": "int", "Average": "int"
+}
+# Версия для ключа кэша: менять при изменении парсеров. Год для дат без года берётся
+# из даты выпуска в имени книги, а имя уже входит в ключ кэша, поэтому текущий год
+# в версию не входит: иначе наблюдатель и сервер держали бы год своего запуска
+PARSER_VERSION = "lineup_date-5"
+STORE_DATASET = "lineup"  # таблица исторического хранилища, см. Argus_store
 
+# ======================================
+# Парсинг одного файла по уже загруженному листу
+# ======================================
+def process_file(grid, file_path, tables_to_parse, final_data, table_index=None):
     file_name = os.path.basename(file_path).replace('.xlsx', '')
     first_part = file_name.split('_')[0].strip()
     parts = first_part.split()
@@ -984,37 +1004,103 @@ for file_info in FILES:
     publish_date = extract_publish_date(file_name)
     file_name_short = os.path.basename(file_path)
 
+    # Один проход по листу: строки-заголовки всех запрошенных таблиц
+    if table_index is None:
+        table_index = build_table_index(
+            grid, {name: TABLE_ANCHORS[name] for name in tables_to_parse if name in TABLE_ANCHORS}
+        )
+
     if "Indian imports" in tables_to_parse:
-        parse_indian_imports(df, final_data, agency, product, publish_date, file_name_short)
+        with parser_call("Indian imports", file_path, grid, final_data) as table_grid:
+            parse_indian_imports(table_grid, final_data, agency, product, publish_date, file_name_short, table_index)
     if "Spot Sales" in tables_to_parse:
-        parse_spot_sales(df, final_data, agency, product, publish_date, file_name_short)
+        with parser_call("Spot Sales", file_path, grid, final_data) as table_grid:
+            parse_spot_sales(table_grid, final_data, agency, product, publish_date, file_name_short, table_index)
     if "Argus Urea Spot Deals Selection" in tables_to_parse:
-        parse_argus_urea_spot_deals_selection(df, final_data, agency, product, publish_date, file_name_short)
+        with parser_call("Argus Urea Spot Deals Selection", file_path, grid, final_data) as table_grid:
+            parse_argus_urea_spot_deals_selection(table_grid, final_data, agency, product, publish_date, file_name_short, table_index)
     if "Argus Ammonium Sulphate Spot Deals Selection" in tables_to_parse:
-        parse_argus_ammonium_sulphate_spot_deals_selection(df, final_data, agency, product, publish_date, file_name_short)
+        with parser_call("Argus Ammonium Sulphate Spot Deals Selection", file_path, grid, final_data) as table_grid:
+            parse_argus_ammonium_sulphate_spot_deals_selection(table_grid, final_data, agency, product, publish_date, file_name_short, table_index)
     if "Recent spot sales" in tables_to_parse:
-        parse_recent_spot_sales(df, final_data, agency, product, publish_date, file_name_short)
+        with parser_call("Recent spot sales", file_path, grid, final_data) as table_grid:
+            parse_recent_spot_sales(table_grid, final_data, agency, product, publish_date, file_name_short, table_index)
     if "Indian NPK arrivals" in tables_to_parse:
-        parse_indian_npk_arrivals(df, final_data, agency, product, publish_date, file_name_short)
+        with parser_call("Indian NPK arrivals", file_path, grid, final_data) as table_grid:
+            parse_indian_npk_arrivals(table_grid, final_data, agency, product, publish_date, file_name_short, table_index)
     if "Selected Spot Sales" in tables_to_parse:
-        parse_selected_spot_sales(df, final_data, agency, publish_date, file_name_short)
+        with parser_call("Selected Spot Sales", file_path, grid, final_data) as table_grid:
+            parse_selected_spot_sales(table_grid, final_data, agency, publish_date, file_name_short, table_index)
     if "India MOP vessel line-up" in tables_to_parse:
-        parse_india_mop_vessel_lineup(df, final_data, agency, product, publish_date, file_name_short)
+        with parser_call("India MOP vessel line-up", file_path, grid, final_data) as table_grid:
+            parse_india_mop_vessel_lineup(table_grid, final_data, agency, product, publish_date, file_name_short, table_index)
     if "Brazil Potash line-up" in tables_to_parse:
-        parse_brazil_potash_lineup(df, final_data, agency, product, publish_date, file_name_short)
+        with parser_call("Brazil Potash line-up", file_path, grid, final_data) as table_grid:
+            parse_brazil_potash_lineup(table_grid, final_data, agency, product, publish_date, file_name_short, table_index)
+
+# ======================================
+# Парсинг одной книги: все листы с запрошенными таблицами
+# ======================================
+def parse_workbook(file_path, tables_to_parse):
+    file_data = RecordTable()
+    workbook = open_workbook(file_path)
+    anchors = requested_anchors(tables_to_parse, TABLE_ANCHORS)
+    report_missing = tables_to_parse != AUTO_TABLES
+    for grid, table_index in iter_sheet_grids(workbook, file_path, anchors, STREAMING, report_missing):
+        process_file(grid, file_path, list(table_index), file_data, table_index)
+    workbook.close()
+    return file_data
 
 # ======================================
 # Сохраняем результат в Excel
 # ======================================
-columns_order = [
-    "Publish Date", "Agency", "Product", "Seller", "Buyer", "Vessel",
-    "Volume (t)", "Origin", "Destination", "Date of arrival", "Shipment Date", 
-    "ETB", "Discharge port", "Loading port", "Low", "High", "Average", "Incoterm", 
-    "Grade", "Type", "Charterer"
-]
+def save_results(final_data, output_file=OUTPUT_FILE, formats=("xlsx",), store=None):
+    # Выбросы считаются по всей истории цен, поэтому не при разборе книги (его результат
+    # кэшируется), а перед сохранением
+    flag_price_outliers(final_data, store, STORE_DATASET)
+    if store:
+        link_voyages(final_data, store)  # номер рейса судна для line-up таблиц, см. Argus_vessels
+    for output_format in formats:
+        saved_file = write_records(final_data, columns_order, output_file, output_format, OUTPUT_TYPES)
+        if saved_file:
+            print(f"✅ Файл успешно обработан и сохранён как '{saved_file}'")
+    print(f"Таблицы Brazilian MOP, Bronka MOP vessel line-up, St Petersburg MOP vessel line-up - НЕ ВЫВЕДЕНЫ тк ИСХОДНИК БИТЫЙ")
+    if store:
+        save_to_store(store, STORE_DATASET, columns_order, final_data)
 
-result_df = pd.DataFrame(final_data, columns=columns_order)
-output_file = 'lne_processed_output.xlsx'
-result_df.to_excel(output_file, index=False)
-print(f"✅ Файл успешно обработан и сохранён как '{output_file}'")
-print(f"Таблицы Brazilian MOP, Bronka MOP vessel line-up, St Petersburg MOP vessel line-up - НЕ ВЫВЕДЕНЫ тк ИСХОДНИК БИТЫЙ")
+# ======================================
+# Основной цикл парсинга
+# ======================================
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Парсинг line-up таблиц из книг Argus")
+    arg_parser.add_argument("--no-cache", action="store_true",
+                            help="разобрать книги заново, не используя кэш результатов")
+    arg_parser.add_argument("--format", dest="formats", nargs="+", choices=OUTPUT_FORMATS, default=["xlsx"],
+                            help="форматы итогового файла (по умолчанию xlsx)")
+    arg_parser.add_argument("--store", nargs="?", const=STORE_FILE, default=None,
+                            help=f"дописать записи в историческое хранилище SQLite (по умолчанию {STORE_FILE})")
+    arg_parser.add_argument("--auto", action="store_true",
+                            help="искать все известные таблицы вместо списков из FILES")
+    arg_parser.add_argument("--stats", default=None,
+                            help="сохранить статистику парсеров (время, строки, пропуски) в файл")
+    arg_parser.add_argument("--stats-format", choices=STATS_FORMATS, default="json",
+                            help="формат статистики: json или prometheus (по умолчанию json)")
+    args = arg_parser.parse_args(argv)
+
+    for file_info in FILES:
+        file_path = file_info["path"]
+        tables = file_tables(file_info, args.auto)
+        final_data.extend(cached_parse(
+            file_path, PARSER_VERSION, tables,
+            lambda: parse_workbook(file_path, tables), not args.no_cache
+        ))
+
+    save_results(final_data, formats=args.formats, store=args.store)
+    if args.stats:
+        write_stats(args.stats, args.stats_format)
+    cache = date_cache_info()
+    print(f"[INFO] Кэш дат: попаданий {cache.hits}, промахов {cache.misses}, записей {cache.currsize}/{cache.maxsize}")
+
+
+if __name__ == "__main__":
+    main()
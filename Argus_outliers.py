@@ -0,0 +1,253 @@
+import math
+import os
+
+from Argus_common import record_fields, set_record_field
+from Argus_store import ISSUE_FIELDS, dataset_columns, open_store, quote
+
+# ======================================
+# Проверка цен на выбросы
+# ======================================
+# Цена сравнивается с медианой цен того же продукта и базиса (Product / Incoterm) по всей
+# истории хранилища и текущему выпуску. Разброс — MAD (медиана абсолютных отклонений):
+# в отличие от среднего, одна ошибочная цена "4100" вместо "410" не сдвигает границу.
+# Результат пишется в отдельную колонку, Average остаётся числом.
+OUTLIER_FIELD = "Price check"
+PRICE_FIELD = "Average"
+OUTLIER_KEY_FIELDS = ("Product", "Incoterm")
+OUTLIER_THRESHOLD = 3.5  # модифицированный z-score (Iglewicz, Hoaglin)
+OUTLIER_MIN_COUNT = 8  # в группе с меньшим числом цен выбросы не ищутся
+MIN_MAD_SHARE = 0.01  # MAD не меньше 1% медианы: иначе при одинаковых ценах выброс — любое отличие
+SKETCH_BINS = 512
+
+
+def price_value(value):
+    try:
+        price = float(value)
+    except (TypeError, ValueError):
+        return None
+    return price if math.isfinite(price) else None
+
+
+def weighted_median(pairs):
+    # pairs: отсортированные (значение, вес); для чётного числа — среднее двух средних значений
+    pairs = list(pairs)
+    total = sum(weight for _, weight in pairs)
+    lower_rank, upper_rank = (total - 1) // 2, total // 2
+    lower = upper = None
+    seen = 0
+    for value, weight in pairs:
+        seen += weight
+        if lower is None and seen > lower_rank:
+            lower = value
+        if seen > upper_rank:
+            upper = value
+            break
+    return (lower + upper) / 2
+
+# ======================================
+# Гистограмма цен одной группы
+# ======================================
+class PriceSketch:
+    # Цены не хранятся списком: {начало корзины: число цен}. Цена попадает в корзину своего
+    # ближайшего целого: пока различных цен не больше max_bins, медиана и MAD точные для
+    # целых цен (цены Argus — целые доллары, различных значений сотни), дробная цена
+    # округляется до доллара. При переполнении ширина корзины удваивается и соседние
+    # корзины сливаются.
+    __slots__ = ("bins", "width", "count", "max_bins")
+
+    def __init__(self, max_bins=SKETCH_BINS):
+        self.bins = {}
+        self.width = 1
+        self.count = 0
+        self.max_bins = max_bins
+
+    def bin_key(self, value):
+        return math.floor(value + 0.5) // self.width * self.width
+
+    def add(self, value):
+        key = self.bin_key(value)
+        self.bins[key] = self.bins.get(key, 0) + 1
+        self.count += 1
+        while len(self.bins) > self.max_bins:
+            self.width *= 2
+            merged = {}
+            for key, count in self.bins.items():
+                key = key // self.width * self.width
+                merged[key] = merged.get(key, 0) + count
+            self.bins = merged
+
+    def remove(self, value):
+        # Обратное add: цена выпуска, который сейчас перезаписывается
+        key = self.bin_key(value)
+        count = self.bins.get(key, 0)
+        if not count:
+            return
+        if count == 1:
+            del self.bins[key]
+        else:
+            self.bins[key] = count - 1
+        self.count -= 1
+
+    def centers(self):
+        # Середина корзины; при ширине 1 — сама цена
+        offset = (self.width - 1) / 2
+        return [(key + offset, count) for key, count in sorted(self.bins.items())]
+
+    def median_mad(self):
+        centers = self.centers()
+        median = weighted_median(centers)
+        mad = weighted_median(sorted((abs(value - median), count) for value, count in centers))
+        return median, mad
+
+# ======================================
+# Статистика по группам Product / Incoterm
+# ======================================
+class PriceOutliers:
+    def __init__(self, max_bins=SKETCH_BINS):
+        self.max_bins = max_bins
+        self.sketches = {}
+        self._limits = {}
+
+    def add(self, key, price):
+        sketch = self.sketches.get(key)
+        if sketch is None:
+            sketch = self.sketches[key] = PriceSketch(self.max_bins)
+        sketch.add(price)
+        self._limits.pop(key, None)
+
+    def remove(self, key, price):
+        sketch = self.sketches.get(key)
+        if sketch is not None:
+            sketch.remove(price)
+            self._limits.pop(key, None)
+
+    def count(self):
+        return sum(sketch.count for sketch in self.sketches.values())
+
+    def limits(self, key):
+        # (медиана, масштаб) группы; None — цен для проверки мало
+        if key not in self._limits:
+            sketch = self.sketches.get(key)
+            if sketch is None or sketch.count < OUTLIER_MIN_COUNT:
+                self._limits[key] = None
+            else:
+                median, mad = sketch.median_mad()
+                self._limits[key] = (median, max(mad, MIN_MAD_SHARE * abs(median)))
+        return self._limits[key]
+
+    def check(self, key, price):
+        limits = self.limits(key)
+        if limits is None or price is None:
+            return ""
+        median, scale = limits
+        if scale == 0 or 0.6745 * abs(price - median) / scale <= OUTLIER_THRESHOLD:
+            return ""
+        return f"🟥 Проверьте цену: {price:g} при медиане {median:g} ({' '.join(filter(None, key))})"
+
+# ======================================
+# История цен из хранилища
+# ======================================
+# Таблица набора читается целиком один раз на процесс: дальше статистика повторяет то, что
+# пишется в хранилище, — цены каждого сохраняемого выпуска добавляются к ней, а цены
+# перезаписываемых выпусков вычитаются (их строки берутся по индексу выпуска). Перепрогон
+# архива из N выпусков читает историю один раз, а не N раз. Если хранилище пишет ещё
+# какой-то процесс, историю нужно перечитать: reset_history().
+_HISTORY = {}  # (путь хранилища, набор) -> PriceOutliers
+
+
+def reset_history():
+    _HISTORY.clear()
+
+
+def history_rows(connection, dataset, issue=None):
+    # Курсор (поля выпуска..., Product, Incoterm, цена) по всему набору или по одному выпуску;
+    # None — таблицы набора ещё нет
+    fields = ISSUE_FIELDS + OUTLIER_KEY_FIELDS + (PRICE_FIELD,)
+    existing = set(dataset_columns(connection, dataset))
+    if not existing:
+        return None
+    # Колонки, которых в базе ещё нет (SOURCE_FIELD в базе старой схемы), читаются как NULL
+    columns = ', '.join(quote(field) if field in existing else 'NULL' for field in fields)
+    query = f"SELECT {columns} FROM {quote(dataset)}"
+    if issue is None:
+        return connection.execute(query)
+    if not all(field in existing for field in ISSUE_FIELDS):
+        return None
+    return connection.execute(query + " WHERE " + " AND ".join(f"{quote(field)} = ?" for field in ISSUE_FIELDS), issue)
+
+
+def load_history(outliers, path, dataset, skip_issues=()):
+    # Строки читаются курсором по одной; выпуски из skip_issues сейчас перезаписываются
+    # и в историю не входят, иначе повторная загрузка выпуска посчитала бы его цены дважды
+    if not path or not os.path.exists(path):
+        return 0
+    connection = open_store(path)
+    try:
+        cursor = history_rows(connection, dataset)
+        if cursor is None:
+            return 0
+        loaded = 0
+        issue_size = len(ISSUE_FIELDS)
+        for row in cursor:
+            price = price_value(row[-1])
+            if price is None or tuple(row[:issue_size]) in skip_issues:
+                continue
+            outliers.add(tuple(value or "" for value in row[issue_size:-1]), price)
+            loaded += 1
+        return loaded
+    finally:
+        connection.close()
+
+
+def forget_issues(outliers, path, dataset, issues):
+    # Вычитает из статистики цены выпусков, которые сейчас перезаписываются
+    if not os.path.exists(path):
+        return
+    issue_size = len(ISSUE_FIELDS)
+    connection = open_store(path)
+    try:
+        for issue in issues:
+            cursor = history_rows(connection, dataset, issue)
+            for row in cursor or ():
+                price = price_value(row[-1])
+                if price is not None:
+                    outliers.remove(tuple(value or "" for value in row[issue_size:-1]), price)
+    finally:
+        connection.close()
+
+
+def store_history(path, dataset, issues):
+    # Статистика хранилища без выпусков issues: при первом вызове — чтение всей таблицы,
+    # дальше — уже накопленная в процессе
+    key = (os.path.abspath(path), dataset)
+    outliers = _HISTORY.get(key)
+    if outliers is None or not os.path.exists(path):
+        outliers = _HISTORY[key] = PriceOutliers()
+        load_history(outliers, path, dataset, issues)
+    else:
+        forget_issues(outliers, path, dataset, issues)
+    return outliers
+
+
+def flag_price_outliers(records, store=None, dataset=None):
+    # Статистика истории (см. store_history) дополняется ценами выпуска, затем каждая
+    # запись получает отметку в OUTLIER_FIELD ("" — цена в норме)
+    fields = ISSUE_FIELDS + OUTLIER_KEY_FIELDS + (PRICE_FIELD,)
+    issue_size = len(ISSUE_FIELDS)
+    issues = {values[:issue_size] for values in record_fields(records, ISSUE_FIELDS)}
+
+    outliers = store_history(store, dataset, issues) if store else PriceOutliers()
+    history = outliers.count()
+    for values in record_fields(records, fields):
+        price = price_value(values[-1])
+        if price is not None:
+            outliers.add(values[issue_size:-1], price)
+
+    flags = [outliers.check(values[:-1], price_value(values[-1]))
+             for values in record_fields(records, OUTLIER_KEY_FIELDS + (PRICE_FIELD,))]
+    set_record_field(records, OUTLIER_FIELD, flags)
+
+    flagged = sum(1 for flag in flags if flag)
+    if flagged:
+        print(f"[WARNING] Цены вне нормы: {flagged} из {len(flags)} (история: {history} цен)")
+    return flagged
@@ -0,0 +1,87 @@
+import re
+from functools import lru_cache
+
+# ======================================
+# Общий реестр регулярных выражений парсеров
+# ======================================
+# Все шаблоны компилируются один раз при импорте. Раньше каждый вызов re.search(r'...')
+# в цикле по строкам заново искал шаблон в кэше модуля re, а шаблоны, собранные через
+# f-строку (день и месяц в Argus_tender.parse_date), компилировались заново.
+
+MONTHS_ALTERNATION = (
+    r'jan|january|feb|february|mar|march|apr|april|may|jun|june|'
+    r'jul|july|aug|august|sep|september|oct|october|nov|november|dec|december'
+)
+MONTH_ABBREVIATIONS = r'jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec'
+
+# --------------------------------------
+# Даты в тексте ячеек
+# --------------------------------------
+DAY_RE = re.compile(r'\b(\d{1,2})\b')
+MID_RE = re.compile(r'\bmid\b|\bme?i?d\b')
+MID_EARLY_RE = re.compile(r'\bmid\b|\bearly\b|\bme?i?d\b|\bear?ly\b')
+END_RE = re.compile(r'\bend\b|\ben?d\b')
+MONTH_RE = re.compile(rf'\b({MONTHS_ALTERNATION})\b')  # по строке в нижнем регистре
+YEAR_RE = re.compile(r'\b(20\d{2})\b')
+# "15 Jul" / "Jul 15": вместо rf'\b{day}\s+{month}\b' — один шаблон, день и месяц сверяются после поиска
+DAY_MONTH_RE = re.compile(r'\b(\d{1,2})\s+([a-z]{3})\b', re.IGNORECASE)
+MONTH_DAY_RE = re.compile(r'\b([a-z]{3})\s+\d', re.IGNORECASE)
+SHIPMENT_MONTH_RE = re.compile(rf'(\d{{1,2}})?\s*({MONTH_ABBREVIATIONS})\w*', re.IGNORECASE)
+SHIPMENT_MONTH_STRIP_RE = re.compile(rf'\s*(\d{{1,2}})?\s*({MONTH_ABBREVIATIONS})\w*', re.IGNORECASE)
+
+# --------------------------------------
+# Дата выпуска в имени файла
+# --------------------------------------
+FILE_DATE_RE = re.compile(r'(\d{4}-\d{2}-\d{2}|\d{2}\.\d{2}\.\d{4}|\d{2}[A-Za-z]{3}\d{4})')
+COMPACT_DATE_RE = re.compile(r'^\d{2}[A-Za-z]{3}\d{4}$')  # 12Jun2025
+FILE_DATE_PATTERNS = [
+    # (2025-06-12) и 2025-06-11
+    (re.compile(r'(\d{4}-\d{2}-\d{2})', re.IGNORECASE), "%Y-%m-%d"),
+    # 12-Jun-2025
+    (re.compile(r'(\d{1,2}-[a-zA-Z]{3,9}-\d{4})', re.IGNORECASE), "%d-%b-%Y"),
+    # 12Jun2025
+    (re.compile(r'(\d{1,2}[a-zA-Z]{3,9}\d{4})', re.IGNORECASE), "%d%b%Y"),
+]
+
+# --------------------------------------
+# Числа, объёмы, цены
+# --------------------------------------
+DIGITS_RE = re.compile(r'\d+')
+FIRST_NUMBER_RE = re.compile(r'(\d+)')
+INTEGER_RE = re.compile(r'\b\d+\b')
+DECIMAL_NUMBER_RE = re.compile(r'(\d+\.?\d*)')
+NON_DIGIT_RE = re.compile(r'[^\d]')
+NON_NUMERIC_RE = re.compile(r'[^\d.,]')
+NUMBER_WITH_COMMAS_RE = re.compile(r'([\d,]+)')
+LEADING_NUMBER_RE = re.compile(r'^([\d,]+)\s*(.*)$')  # "25,000 Saudi Arabia" -> объём, остаток
+THOUSANDS_DECIMAL_RE = re.compile(r'^\d+[.,]\d{3}$')
+RANGE_SEPARATOR_RE = re.compile(r'[-–—]')
+VOLUME_RANGE_RE = re.compile(r'^\s*(\d+)\s*[-–]\s*(\d+)\s*$')
+PRICE_SEPARATORS_RE = re.compile(r'[\s,\–\-\u2013]')
+WHITESPACE_RE = re.compile(r'\s+')
+MULTIPLY_SIGN_RE = re.compile(r'[хХxX*×]')
+DIVIDE_SIGN_RE = re.compile(r'[:÷]')
+ARITHMETIC_OPERATOR_RE = re.compile(r'[\+\-\*/]')
+
+# --------------------------------------
+# Базис поставки и служебные строки
+# --------------------------------------
+INCOTERM_RE = re.compile(r'(fob|cfr|cif|fca|dap|cpt|c\w+?r|rail|exw|ddp|dpu|d\w+?p|f\w+?t|c\w+?y)', re.IGNORECASE)
+TRAILING_INCOTERM_RE = re.compile(r'[A-Za-z]{3}$')
+GRAND_TOTAL_RE = re.compile(r'^grand\s+total', re.IGNORECASE)
+COUNTRY_HOLDER_RE = re.compile(r'country\s*/\s*holder', re.IGNORECASE)
+
+# --------------------------------------
+# Порт разгрузки в Indian imports: "mid-Jun Kandla" -> "Kandla"
+# --------------------------------------
+PORT_DATE_PARTS_RE = re.compile(
+    rf'\d{{1,2}}\s*-*\s*|\b({MONTH_ABBREVIATIONS})\w*\b|\b(mid|early|end)\b', re.IGNORECASE
+)
+EDGE_DASHES_RE = re.compile(r'^-+\s*|\s*-+\s*$')
+
+
+@lru_cache(maxsize=64)
+def literal_re(text):
+    # Найденный базис ("CFR") убирается из строки цены без учёта регистра; таких слов
+    # единицы, поэтому шаблон компилируется один раз на слово
+    return re.compile(re.escape(text), re.IGNORECASE)
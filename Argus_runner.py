@@ -0,0 +1,124 @@
+import argparse
+
+from Argus_common import (
+    open_workbook, iter_sheet_grids, cached_parse, file_tables, requested_anchors, AUTO_TABLES, RecordTable, OUTPUT_FORMATS, STATS_FORMATS, write_stats
+)
+from Argus_store import STORE_FILE
+import Argus_lineup_date
+import Argus_freight
+import Argus_tender
+
+# ======================================
+# Настройки путей и параметров
+# ======================================
+# Для каждой книги перечисляются все таблицы: line-up, фрахт и тендеры.
+# Книга читается один раз, затем один и тот же лист передаётся всем парсерам.
+FILES = [
+    {
+        "path": "Argus Ammonia _ Russia version (2025-07-03).xlsx",
+        "tables": ["Indian imports", "Spot Sales", "Ammonia freight rates"]
+    },
+    {
+        "path": "Argus Nitrogen _ Russia version (2025-07-03).xlsx",
+        "tables": ["Argus Urea Spot Deals Selection", "Argus Ammonium Sulphate Spot Deals Selection",
+                   "Dry bulk fertilizer freight assessments"]
+    },
+    {
+        "path": "Argus NPKs _ Russia version (2025-07-03).xlsx",
+        "tables": ["Recent spot sales", "Indian NPK arrivals", "Urea freight",
+                   "Latest African NPK tender", "Indian NPK, NPS tenders", "phosphate tenders"]
+    },
+    {
+        "path": "Argus Phosphates _ Russia version (2025-07-03).xlsx",
+        "tables": ["Selected Spot Sales", "Phosphate freigh"]
+    },
+    {
+        "path": "Argus Potash _ Russia version (2025-07-03).xlsx",
+        "tables": ["India MOP vessel line-up", "Brazil Potash line-up", "Potash freight"]
+    }
+]
+
+# True — читать книги потоково (openpyxl read_only) и не дочитывать лист после последней таблицы
+STREAMING = False
+
+# Семейства парсеров: каждый модуль сам отбирает свои таблицы из списка
+PARSERS = [Argus_lineup_date, Argus_freight, Argus_tender]
+
+# Якоря всех таблиц, которые умеют разбирать семейства (для автоопределения)
+TABLE_ANCHORS = {name: anchor for module in PARSERS for name, anchor in module.TABLE_ANCHORS.items()}
+
+# Версия для ключа кэша складывается из версий всех семейств
+PARSER_VERSION = '+'.join(module.PARSER_VERSION for module in PARSERS)
+
+# ======================================
+# Парсинг всех семейств таблиц по одной книге
+# ======================================
+def parse_workbook(file_path, tables_to_parse):
+    try:
+        workbook = open_workbook(file_path)
+    except Exception as e:
+        print(f"[ERROR] Ошибка при загрузке файла: {e}")
+        return None
+
+    # Якоря всех семейств ищутся за один проход по каждому листу
+    anchors = {}
+    for module in PARSERS:
+        anchors.update(requested_anchors(tables_to_parse, module.TABLE_ANCHORS))
+    report_missing = tables_to_parse != AUTO_TABLES
+    # Записи по семействам: ключ — имя модуля (так результат можно положить в кэш)
+    file_results = {module.__name__: RecordTable() for module in PARSERS}
+    for grid, table_index in iter_sheet_grids(workbook, file_path, anchors, STREAMING, report_missing):
+        for module in PARSERS:
+            module.process_file(grid, file_path, list(table_index), file_results[module.__name__], table_index)
+    workbook.close()
+    return file_results
+
+
+def process_workbook(file_path, tables_to_parse, results, use_cache=True):
+    # False — книгу не удалось открыть (ошибка уже напечатана parse_workbook)
+    print(f"[INFO] Загружаем файл: {file_path}")
+    file_results = cached_parse(
+        file_path, PARSER_VERSION, tables_to_parse, lambda: parse_workbook(file_path, tables_to_parse), use_cache
+    )
+    if file_results is None:
+        return False
+    for module in PARSERS:
+        results[module].extend(file_results[module.__name__])
+    return True
+
+# ======================================
+# Основной цикл парсинга
+# ======================================
+def run(files, use_cache=True, formats=("xlsx",), store=None, auto=False):
+    results = {module: RecordTable() for module in PARSERS}
+    for file_info in files:
+        process_workbook(file_info["path"], file_tables(file_info, auto), results, use_cache)
+
+    for module in PARSERS:
+        module.save_results(results[module], formats=formats, store=store)
+    return results
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Парсинг line-up, фрахта и тендеров из книг Argus")
+    arg_parser.add_argument("--no-cache", action="store_true",
+                            help="разобрать книги заново, не используя кэш результатов")
+    arg_parser.add_argument("--format", dest="formats", nargs="+", choices=OUTPUT_FORMATS, default=["xlsx"],
+                            help="форматы итогового файла (по умолчанию xlsx)")
+    arg_parser.add_argument("--store", nargs="?", const=STORE_FILE, default=None,
+                            help=f"дописать записи в историческое хранилище SQLite (по умолчанию {STORE_FILE})")
+    arg_parser.add_argument("--auto", action="store_true",
+                            help="искать все известные таблицы вместо списков из FILES")
+    arg_parser.add_argument("--stats", default=None,
+                            help="сохранить статистику парсеров (время, строки, пропуски) в файл")
+    arg_parser.add_argument("--stats-format", choices=STATS_FORMATS, default="json",
+                            help="формат статистики: json или prometheus (по умолчанию json)")
+    args = arg_parser.parse_args(argv)
+
+    run(FILES, not args.no_cache, args.formats, args.store, args.auto)
+    if args.stats:
+        write_stats(args.stats, args.stats_format)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+import argparse
+import contextlib
+import importlib
+import io
+import json
+import os
+import socket
+import socketserver
+import time
+
+from Argus_common import OUTPUT_FORMATS
+from Argus_store import STORE_FILE
+
+# ======================================
+# Настройки
+# ======================================
+# Сервер держит загруженными pandas, openpyxl и все парсеры и разбирает книгу по запросу
+# через Unix-сокет: разовый разбор одного файла не платит за запуск интерпретатора и
+# импорт pandas. Клиенту (python Argus_server.py parse ...) pandas не нужен: Argus_common
+# и Argus_store импортируют его лениво. Запрос и ответ — по одной строке JSON.
+SOCKET_FILE = os.path.join(os.path.expanduser('~'), '.argus_parser.sock')
+OUTPUT_DIR = 'processed'
+
+# Модули, загружаемые при старте сервера: Argus_watch тянет раннер и все семейства парсеров
+PRELOAD_MODULES = ("pandas", "openpyxl", "Argus_watch")
+
+# ======================================
+# Сервер
+# ======================================
+def handle_request(request):
+    # Парсеры импортируются при запуске сервера, здесь модули уже загружены
+    from Argus_common import reset_stats, stats_summary
+    from Argus_outliers import reset_history
+    from Argus_watch import parse_issue, save_issue
+
+    started = time.perf_counter()
+    file_path = request["path"]
+    if not os.path.isfile(file_path):
+        return {"ok": False, "error": f"Файл не найден: {file_path}"}
+
+    reset_stats()
+    reset_history()  # хранилище между запросами могли дописать наблюдатель или перепрогон архива
+    log = io.StringIO()
+    with contextlib.redirect_stdout(log):
+        results = parse_issue(file_path, request.get("use_cache", True), request.get("auto", False))
+        if results is None:
+            return {"ok": False, "error": f"Книга не открывается: {file_path}", "log": log.getvalue()}
+        save_issue(file_path, results, request.get("output_dir") or OUTPUT_DIR,
+                   request.get("formats") or ["xlsx"], request.get("store"))
+    return {
+        "ok": True,
+        "seconds": round(time.perf_counter() - started, 3),
+        "records": {name: len(records) for name, records in results.items()},
+        "tables": stats_summary()["tables"],
+        "log": log.getvalue(),
+    }
+
+
+class ParserHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        try:
+            response = handle_request(json.loads(self.rfile.readline()))
+        except Exception as e:
+            response = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+        self.wfile.write(json.dumps(response, ensure_ascii=False).encode("utf-8") + b"\n")
+
+
+def socket_in_use(path):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+        try:
+            probe.connect(path)
+            return True
+        except OSError:
+            return False
+
+
+def serve(socket_path=SOCKET_FILE):
+    if not hasattr(socket, "AF_UNIX"):
+        print("[ERROR] Unix-сокеты недоступны на этой платформе — запускайте скрипты напрямую")
+        return
+    if os.path.exists(socket_path):
+        if socket_in_use(socket_path):
+            print(f"[ERROR] Сервер уже запущен: {socket_path}")
+            return
+        os.remove(socket_path)  # сокет остался от упавшего сервера
+
+    started = time.perf_counter()
+    # Всё тяжёлое загружается один раз при старте
+    for module_name in PRELOAD_MODULES:
+        importlib.import_module(module_name)
+    print(f"[INFO] Парсеры загружены за {time.perf_counter() - started:.1f} с, сокет: {socket_path} (Ctrl+C — остановка)")
+
+    # Запросы обрабатываются по одному: у парсеров общее состояние модуля (статистика, кэш дат)
+    with socketserver.UnixStreamServer(socket_path, ParserHandler) as server:
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print("[INFO] Сервер остановлен")
+        finally:
+            os.remove(socket_path)
+
+# ======================================
+# Клиент
+# ======================================
+def request_parse(request, socket_path=SOCKET_FILE):
+    # None — сервер не запущен
+    if not hasattr(socket, "AF_UNIX") or not os.path.exists(socket_path):
+        return None
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        try:
+            client.connect(socket_path)
+        except OSError:
+            return None
+        client.sendall(json.dumps(request, ensure_ascii=False).encode("utf-8") + b"\n")
+        with client.makefile("rb") as response:
+            return json.loads(response.readline())
+
+
+def parse_file(request, socket_path=SOCKET_FILE):
+    response = request_parse(request, socket_path)
+    if response is None:
+        # Без сервера — тот же разбор в этом процессе (с полным временем запуска)
+        print(f"[WARNING] Сервер не запущен ({socket_path}), разбираем в текущем процессе")
+        from Argus_watch import ingest
+        try:
+            ingest(request["path"], request["output_dir"], request["formats"], request["store"],
+                   request["use_cache"], request["auto"])
+        except Exception as e:
+            print(f"[ERROR] Ошибка при обработке {request['path']}: {e}")
+            return False
+        return True
+
+    if not response["ok"]:
+        print(f"[ERROR] {response['error']}")
+        return False
+    if request.get("verbose"):
+        print(response["log"], end="")
+    for line in response["log"].splitlines():
+        if line.startswith("✅") or (not request.get("verbose") and line.startswith("[ERROR]")):
+            print(line)
+    records = ", ".join(f"{name}: {count}" for name, count in response["records"].items())
+    print(f"[INFO] {os.path.basename(request['path'])}: {records} — {response['seconds']:.2f} с на сервере")
+    return True
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Сервер разбора книг Argus (Unix-сокет)")
+    arg_parser.add_argument("--socket", default=SOCKET_FILE, help=f"путь к сокету (по умолчанию {SOCKET_FILE})")
+    commands = arg_parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("serve", help="запустить сервер и держать парсеры загруженными")
+    parse_command = commands.add_parser("parse", help="разобрать книги через запущенный сервер")
+    parse_command.add_argument("files", nargs="+", help="книги Argus (.xlsx)")
+    parse_command.add_argument("--output-dir", default=OUTPUT_DIR,
+                               help=f"папка для результатов по каждой книге (по умолчанию {OUTPUT_DIR})")
+    parse_command.add_argument("--format", dest="formats", nargs="+", choices=OUTPUT_FORMATS, default=["xlsx"],
+                               help="форматы итогового файла (по умолчанию xlsx)")
+    parse_command.add_argument("--store", nargs="?", const=STORE_FILE, default=None,
+                               help=f"дописать записи в историческое хранилище SQLite (по умолчанию {STORE_FILE})")
+    parse_command.add_argument("--no-cache", action="store_true",
+                               help="разобрать книги заново, не используя кэш результатов")
+    parse_command.add_argument("--auto", action="store_true",
+                               help="искать все известные таблицы вместо списков из FILES раннера")
+    parse_command.add_argument("--verbose", action="store_true", help="показывать вывод парсеров")
+    args = arg_parser.parse_args()
+
+    if args.command == "serve":
+        serve(args.socket)
+    else:
+        for file_path in args.files:
+            parse_file({
+                "path": os.path.abspath(file_path),
+                "output_dir": os.path.abspath(args.output_dir),
+                "formats": args.formats,
+                "store": os.path.abspath(args.store) if args.store else None,
+                "use_cache": not args.no_cache,
+                "auto": args.auto,
+                "verbose": args.verbose,
+            }, args.socket)
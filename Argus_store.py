@@ -0,0 +1,120 @@
+import argparse
+import sqlite3
+
+from Argus_common import TABLE_FIELD, SOURCE_FIELD, write_xlsx_rows
+
+# ======================================
+# Историческое хранилище (SQLite)
+# ======================================
+# Вместо перезаписи xlsx каждый прогон дописывает записи своего выпуска в базу.
+# Ключ выпуска — книга-источник и Publish Date: при повторной загрузке выпуска все его
+# строки удаляются и записываются заново в одной транзакции, поэтому в базе никогда не
+# оказывается половина старого и половина нового выпуска, а строки продукта, который
+# пропал из выпуска или переименован (Product в Brazil Potash line-up и Selected Spot
+# Sales берётся из ячеек), не остаются в базе.
+STORE_FILE = 'argus_history.sqlite'
+ISSUE_FIELDS = (SOURCE_FIELD, "Publish Date")
+# Служебные поля, которые хранятся вместе с columns_order
+RECORD_FIELDS = ISSUE_FIELDS + ("Agency", "Product", TABLE_FIELD)
+# Строки, записанные до появления SOURCE_FIELD, заменялись по этому ключу
+LEGACY_ISSUE_FIELDS = ("Publish Date", "Agency", TABLE_FIELD)
+
+
+def quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def open_store(path=STORE_FILE):
+    return sqlite3.connect(path)
+
+
+def dataset_columns(connection, dataset):
+    return [row[1] for row in connection.execute(f"PRAGMA table_info({quote(dataset)})")]
+
+
+def ensure_dataset(connection, dataset, columns):
+    fields = list(columns) + [field for field in RECORD_FIELDS if field not in columns]
+    connection.execute(
+        f"CREATE TABLE IF NOT EXISTS {quote(dataset)} ({', '.join(quote(field) + ' TEXT' for field in fields)})"
+    )
+    # Колонки, добавленные в columns_order после создания базы
+    existing = set(dataset_columns(connection, dataset))
+    for field in fields:
+        if field not in existing:
+            connection.execute(f"ALTER TABLE {quote(dataset)} ADD COLUMN {quote(field)} TEXT")
+    connection.execute(
+        f"CREATE INDEX IF NOT EXISTS {quote(dataset + '_source_issue')} "
+        f"ON {quote(dataset)} ({', '.join(quote(field) for field in ISSUE_FIELDS)})"
+    )
+    return fields
+
+
+def store_records(connection, dataset, columns, records):
+    fields = ensure_dataset(connection, dataset, columns)
+
+    issues = {}
+    legacy_keys = {}
+    for record in records:
+        issue_key = tuple(record.get(field, "") for field in ISSUE_FIELDS)
+        issues.setdefault(issue_key, []).append(tuple(record.get(field, "") for field in fields))
+        legacy_keys.setdefault(issue_key, set()).add(tuple(record.get(field, "") for field in LEGACY_ISSUE_FIELDS))
+
+    delete_sql = (
+        f"DELETE FROM {quote(dataset)} WHERE "
+        + " AND ".join(f"{quote(field)} = ?" for field in ISSUE_FIELDS)
+    )
+    delete_legacy_sql = (
+        f"DELETE FROM {quote(dataset)} WHERE {quote(SOURCE_FIELD)} IS NULL AND "
+        + " AND ".join(f"{quote(field)} = ?" for field in LEGACY_ISSUE_FIELDS)
+    )
+    insert_sql = (
+        f"INSERT INTO {quote(dataset)} ({', '.join(quote(field) for field in fields)}) "
+        f"VALUES ({', '.join('?' for _ in fields)})"
+    )
+    with connection:
+        for issue_key, rows in issues.items():
+            # Сначала все строки выпуска (и его строки из старой схемы без SOURCE_FIELD), затем новые
+            connection.execute(delete_sql, issue_key)
+            connection.executemany(delete_legacy_sql, legacy_keys[issue_key])
+            connection.executemany(insert_sql, rows)
+
+    print(f"[INFO] Хранилище '{dataset}': записано {len(records)} записей, выпусков: {len(issues)}")
+
+
+def save_to_store(path, dataset, columns, records):
+    connection = open_store(path)
+    try:
+        store_records(connection, dataset, columns, records)
+    finally:
+        connection.close()
+
+
+# ======================================
+# Выгрузка истории в xlsx
+# ======================================
+def export_dataset(path, dataset, output_file):
+    # Строки идут курсором SQLite прямо в лист write_only: выгрузка всей истории
+    # (сотни тысяч строк) не держит в памяти ни DataFrame, ни книгу целиком
+    connection = open_store(path)
+    try:
+        columns = dataset_columns(connection, dataset)
+        if not columns:
+            print(f"[ERROR] В хранилище '{path}' нет набора '{dataset}'")
+            return 0
+        cursor = connection.execute(f"SELECT * FROM {quote(dataset)} ORDER BY rowid")
+        count = write_xlsx_rows(cursor, columns, output_file)
+    finally:
+        connection.close()
+    print(f"✅ История '{dataset}' выгружена в {output_file}: {count} записей")
+    return count
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Выгрузка исторического хранилища Argus в xlsx")
+    arg_parser.add_argument("dataset", help="набор записей: lineup, freight или tender")
+    arg_parser.add_argument("output", help="итоговый файл .xlsx")
+    arg_parser.add_argument("--store", default=STORE_FILE,
+                            help=f"историческое хранилище SQLite (по умолчанию {STORE_FILE})")
+    args = arg_parser.parse_args()
+
+    export_dataset(args.store, args.dataset, args.output)
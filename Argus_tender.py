@@ -1,8 +1,19 @@
-import pandas as pd
+import argparse
 import re
 from datetime import datetime
 import os
 
+from Argus_common import (
+    first_cell_anchor, open_workbook, iter_sheet_grids, build_table_index, find_table, cached_parse,
+    OUTPUT_FORMATS, write_records, file_tables, requested_anchors, AUTO_TABLES, RecordTable, parser_call, note_skip,
+    STATS_FORMATS, write_stats, expression_volume, report_date_of, report_year
+)
+from Argus_patterns import (
+    DAY_RE, MID_RE, END_RE, MONTH_RE, YEAR_RE, DAY_MONTH_RE, MONTH_DAY_RE, SHIPMENT_MONTH_RE,
+    SHIPMENT_MONTH_STRIP_RE, FILE_DATE_PATTERNS, NON_NUMERIC_RE, VOLUME_RANGE_RE, COUNTRY_HOLDER_RE
+)
+from Argus_store import STORE_FILE, save_to_store
+
 # ======================================
 # Колонки итоговой таблицы
 # ======================================
@@ -25,19 +36,24 @@ full_month_names = [
     'January', 'February', 'March', 'April', 'May', 'June',
     'July', 'August', 'September', 'October', 'November', 'December'
 ]
-final_data = []
+final_data = RecordTable()
+STREAMING = False  # True — потоковое чтение листа, см. Argus_common.iter_sheet_grids
+
+# ======================================
+# Якоря таблиц (строка-заголовок каждой таблицы)
+# ======================================
+TABLE_ANCHORS = {
+    "Latest African NPK tender": first_cell_anchor(r'.{0,5}latest.*african.*npk.*tender.{0,5}', re.IGNORECASE),
+    "Indian NPK, NPS tenders": first_cell_anchor(r'.{0,5}indian.*npk[\s,]+nps.*tenders?.{0,5}', re.IGNORECASE),
+    "phosphate tenders": first_cell_anchor(r'.{0,5}phosphate[\s_]+tenders?.{0,5}', re.IGNORECASE),
+}
 
 # ======================================
 # Функция извлечения даты из имени файла
 # ======================================
 def extract_publish_date(filename):
-    date_patterns = [
-        (r'(\d{4}-\d{2}-\d{2})', "%Y-%m-%d"),
-        (r'(\d{1,2}-[a-zA-Z]{3,9}-\d{4})', "%d-%b-%Y"),
-        (r'(\d{1,2}[a-zA-Z]{3,9}\d{4})', "%d%b%Y")
-    ]
-    for pattern, fmt in date_patterns:
-        match = re.search(pattern, filename, re.IGNORECASE)
+    for pattern, fmt in FILE_DATE_PATTERNS:
+        match = pattern.search(filename)
         if match:
             try:
                 date_str = match.group(1)
@@ -52,17 +68,28 @@ def extract_publish_date(filename):
 # ======================================
 # Парсинг даты по правилам
 # ======================================
-def parse_date(date_str):
+def has_day_month(date_str, day, month_abbr):
+    # "15 Jul": день и месяц сверяются с найденными, шаблон не собирается заново на каждую строку
+    return any(m.group(1) == str(day) and m.group(2).lower() == month_abbr.lower()
+               for m in DAY_MONTH_RE.finditer(date_str))
+
+
+def has_month_number(date_str, month_abbr):
+    # "Jul 15" или "Jul 2025"
+    return any(m.group(1).lower() == month_abbr.lower() for m in MONTH_DAY_RE.finditer(date_str))
+
+
+def parse_date(date_str, report_date=None):
     if not date_str:
         return ""
     date_str = str(date_str).strip()
     date_str_lower = date_str.lower()
 
     # Определяем день
-    day_match = re.search(r'\b(\d{1,2})\b', date_str)
-    if re.search(r'\bmid\b|\bme?i?d\b', date_str_lower):
+    day_match = DAY_RE.search(date_str)
+    if MID_RE.search(date_str_lower):
         day = 15
-    elif re.search(r'\bend\b|\ben?d\b', date_str_lower):
+    elif END_RE.search(date_str_lower):
         day = 30
     elif day_match:
         day = int(day_match.group(1))
@@ -70,11 +97,7 @@ def parse_date(date_str):
         day = 1
 
     # Определяем месяц
-    month_match = re.search(
-        r'\b(jan|january|feb|february|mar|march|apr|april|may|jun|june|'
-        r'jul|july|aug|august|sep|september|oct|october|nov|november|dec|december)\b',
-        date_str_lower
-    )
+    month_match = MONTH_RE.search(date_str_lower)
     if not month_match:
         return ""
 
@@ -82,19 +105,23 @@ def parse_date(date_str):
 
     try:
         # Проверяем, есть ли в строке год
-        year_match = re.search(r'\b(20\d{2})\b', date_str)
+        year_match = YEAR_RE.search(date_str)
         if year_match:
             year = int(year_match.group(1))
         else:
-            year = datetime.now().year
+            # Год выпуска (см. Argus_common.report_date_of), без него — текущий
+            if report_date is None:
+                report_date = datetime.now()
+            month_num = datetime.strptime(month_abbr, "%b").month
+            year = report_year(month_num, report_date.year, report_date.month)
 
         # Формат DD MMM → DD.MM
-        if re.search(rf'\b{day}\s+{month_abbr}\b', date_str, re.IGNORECASE):
+        if has_day_month(date_str, day, month_abbr):
             dt = datetime.strptime(f"{day} {month_abbr}", "%d %b")
             return dt.strftime("%d.%m")
 
         # Формат MMM DD или MMM YYYY → DD.MM.YYYY
-        elif re.search(rf'\b{month_abbr}\s+\d{{1,2}}|\b{month_abbr}\s+\d{{4}}', date_str, re.IGNORECASE):
+        elif has_month_number(date_str, month_abbr):
             dt = datetime.strptime(f"01 {month_abbr} {year}", "%d %b %Y")
             return dt.strftime("%d.%m.%Y")
 
@@ -117,15 +144,20 @@ def process_volume(vol_str):
     cleaned = str(vol_str).strip()
 
     # Проверяем, является ли строка диапазоном (например, "100-200", "150 - 250")
-    range_match = re.search(r'^\s*(\d+)\s*[-–]\s*(\d+)\s*$', cleaned)
+    range_match = VOLUME_RANGE_RE.search(cleaned)
     if range_match:
         low = int(range_match.group(1))
         high = int(range_match.group(2))
         avg = (low + high) / 2
         return str(int(avg * 1000))  # Умножаем на 1000 и округляем
 
+    # Выражение вида "2x25" или "30:2" считаем, а не склеиваем цифры
+    amount = expression_volume(cleaned)
+    if amount is not None:
+        return str(int(amount * 1000))
+
     # Убираем всё, кроме чисел и точки/запятой
-    cleaned = re.sub(r'[^\d.,]', '', cleaned).replace(',', '.')
+    cleaned = NON_NUMERIC_RE.sub('', cleaned).replace(',', '.')
 
     try:
         volume = float(cleaned)
@@ -135,44 +167,43 @@ def process_volume(vol_str):
 # ======================================
 # Парсинг Latest African NPK tender
 # ======================================
-def parse_latest_african_npk_tender(df, final_data, agency, product, publish_date, file_name_short):
-    start_parsing = False
+def parse_latest_african_npk_tender(grid, final_data, agency, product, publish_date, file_name_short, table_index=None):
+    report_date = report_date_of(publish_date)
     empty_count = 0
+    records_before = len(final_data)
     print("[INFO] Начинаем парсить Latest African NPK tender...")
 
-    for i, row in df.iterrows():
-        first_cell = str(row[0]).strip() if not pd.isna(row[0]) else ""
+    start_row = find_table(grid, "Latest African NPK tender", TABLE_ANCHORS, table_index)
+    if start_row == -1:
+        return
 
-        # Поиск начала таблицы с возможностью частичного совпадения текста
-        if re.search(r'.{0,5}latest.*african.*npk.*tender.{0,5}', first_cell, re.IGNORECASE):
-            start_parsing = True
-            continue
-
-        if not start_parsing:
-            continue
+    for i, row in grid.iter_rows(start_row + 1):
+        first_cell = row[0] or ""
 
         # После начала таблицы проверяем наличие заголовка "Country/Holder"
-        if re.search(r'country\s*/\s*holder', first_cell, re.IGNORECASE):
+        if COUNTRY_HOLDER_RE.search(first_cell):
+            note_skip("header")
             continue  # Пропуск строки с заголовком
 
         # Остановка при 3 пустых строках во втором столбце
-        second_cell = str(row[1]).strip() if len(row) > 1 and not pd.isna(row[1]) else ""
+        second_cell = row[1] or ""
         if not second_cell:
             empty_count += 1
             if empty_count >= 3:
                 print(f"[INFO] Обнаружено 3 пустых строки подряд → завершаем парсинг Latest African NPK tender")
                 break
+            note_skip("empty")
             continue
         else:
             empty_count = 0
 
         # Извлечение данных
-        country_holder = str(row[0]).strip() if not pd.isna(row[0]) else ""
-        product_val = str(row[1]).strip() if len(row) > 1 and not pd.isna(row[1]) else ""
-        volume_raw = str(row[2]).strip() if len(row) > 2 and not pd.isna(row[2]) else ""
-        issue_date = str(row[3]).strip() if len(row) > 3 and not pd.isna(row[3]) else ""
-        closing_date = str(row[4]).strip() if len(row) > 4 and not pd.isna(row[4]) else ""
-        status = str(row[5]).strip() if len(row) > 5 and not pd.isna(row[5]) else ""
+        country_holder = row[0] or ""
+        product_val = row[1] or ""
+        volume_raw = row[2] or ""
+        issue_date = row[3] or ""
+        closing_date = row[4] or ""
+        status = row[5] or ""
 
         # Разделение Country и Holder
         if '/' in country_holder:
@@ -193,13 +224,13 @@ def parse_latest_african_npk_tender(df, final_data, agency, product, publish_dat
             "Holder": holder.strip(),
             "Grade": product_val.strip(),
             "Volume": volume,
-            "Issue date": parse_date(issue_date),
-            "Closing date": parse_date(closing_date),
+            "Issue date": parse_date(issue_date, report_date),
+            "Closing date": parse_date(closing_date, report_date),
             "Status": status.strip(),
             "Shipment": ""
         })
 
-    print(f"[INFO] Завершили парсинг Latest African NPK tender, добавлено записей: {len(final_data)}")
+    print(f"[INFO] Завершили парсинг Latest African NPK tender, добавлено записей: {len(final_data) - records_before}")
   
 # ======================================
 # Парсинг Shipment по названию месяца
@@ -235,26 +266,20 @@ def parse_shipment_month(month_str):
 # ======================================
 # Парсинг Indian NPK, NPS tenders
 # ======================================
-def parse_indian_npk_nps_tenders(df, final_data, agency, product, publish_date, file_name_short):
-    start_parsing = False
-    skip_next_row = False  # Флаг для пропуска строки с заголовками
+def parse_indian_npk_nps_tenders(grid, final_data, agency, product, publish_date, file_name_short, table_index=None):
+    report_date = report_date_of(publish_date)
+    skip_next_row = True  # Строку сразу после названия таблицы (заголовки) пропускаем
     empty_count = 0
+    records_before = len(final_data)
     print("[INFO] Начинаем парсить Indian NPK, NPS tenders...")
     
-    for i, row in df.iterrows():
-        first_cell = str(row[0]).strip() if not pd.isna(row[0]) else ""
-        
-        # Поиск начала таблицы
-        if re.search(r'.{0,5}indian.*npk[\s,]+nps.*tenders?.{0,5}', first_cell, re.IGNORECASE):
-            start_parsing = True
-            skip_next_row = True  # Следующую строку будем пропускать
-            continue
-        
-        if not start_parsing:
-            continue
-        
+    start_row = find_table(grid, "Indian NPK, NPS tenders", TABLE_ANCHORS, table_index)
+    if start_row == -1:
+        return
+
+    for i, row in grid.iter_rows(start_row + 1):
         # Проверяем второй столбец (индекс 1)
-        second_cell = str(row[1]).strip() if len(row) > 1 and not pd.isna(row[1]) else ""
+        second_cell = row[1] or ""
         
         # Если второй столбец пуст, увеличиваем счетчик
         if not second_cell:
@@ -262,6 +287,7 @@ def parse_indian_npk_nps_tenders(df, final_data, agency, product, publish_date,
             if empty_count >= 3:
                 print(f"[INFO] Обнаружено 3 пустых строки подряд → завершаем парсинг Indian NPK, NPS tenders")
                 break
+            note_skip("empty")
             continue
         else:
             empty_count = 0  # Сброс счётчика при наличии данных
@@ -269,17 +295,18 @@ def parse_indian_npk_nps_tenders(df, final_data, agency, product, publish_date,
         # Пропускаем строку с заголовками (например, "Country/Holder", "Product", "Volume")
         if skip_next_row:
             skip_next_row = False
+            note_skip("header")
             continue
         
         # Извлечение данных по индексам
-        holder = str(row[0]).strip() if len(row) > 0 and not pd.isna(row[0]) else ""
+        holder = row[0] or ""
         product_val = product
-        volume_raw = str(row[2]).strip() if len(row) > 2 and not pd.isna(row[2]) else ""
-        issue_date = str(row[3]).strip() if len(row) > 3 and not pd.isna(row[3]) else ""
-        closing_date = str(row[4]).strip() if len(row) > 4 and not pd.isna(row[4]) else ""
-        shipment_raw = str(row[5]).strip() if len(row) > 5 and not pd.isna(row[5]) else ""
+        volume_raw = row[2] or ""
+        issue_date = row[3] or ""
+        closing_date = row[4] or ""
+        shipment_raw = row[5] or ""
         shipment = parse_shipment_month(shipment_raw)
-        status = str(row[6]).strip() if len(row) > 6 and not pd.isna(row[6]) else ""
+        status = row[6] or ""
         
         # Обработка Volume
         volume = process_volume(volume_raw)
@@ -293,13 +320,13 @@ def parse_indian_npk_nps_tenders(df, final_data, agency, product, publish_date,
             "Holder": holder,
             "Grade": product_val,
             "Volume": volume,
-            "Issue date": parse_date(issue_date),
-            "Closing date": parse_date(closing_date),
+            "Issue date": parse_date(issue_date, report_date),
+            "Closing date": parse_date(closing_date, report_date),
             "Status": status,
             "Shipment": shipment  # ← Новое поле
         })
     
-    print(f"[INFO] Завершили парсинг Indian NPK, NPS tenders, добавлено записей: {len(final_data)}")
+    print(f"[INFO] Завершили парсинг Indian NPK, NPS tenders, добавлено записей: {len(final_data) - records_before}")
 
 # ======================================
 # Парсинг Shipment с датами внутри текста
@@ -309,7 +336,7 @@ def parse_shipment_text(text):
         return ""
 
     # Ищем дату в строке (например, "31 July", "15 Aug", "Sep", "Aug")
-    date_match = re.search(r'(\d{1,2})?\s*(jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)\w*', text, re.IGNORECASE)
+    date_match = SHIPMENT_MONTH_RE.search(text)
     if date_match:
         day = date_match.group(1) if date_match.group(1) else '01'
         month_abbr = date_match.group(2).lower()[:3]
@@ -326,7 +353,7 @@ def parse_shipment_text(text):
             # Убираем найденную часть и заменяем на DD.MM
             replaced_month = f"{day}.{month_map[month_abbr]}"
             # Убираем оригинал месяца из строки
-            cleaned_text = re.sub(r'\s*(\d{1,2})?\s*(jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)\w*', '', text, flags=re.IGNORECASE)
+            cleaned_text = SHIPMENT_MONTH_STRIP_RE.sub('', text)
             # Возвращаем остаток строки + новый формат
             return f"{cleaned_text.strip()} {replaced_month}".strip()
     
@@ -334,26 +361,20 @@ def parse_shipment_text(text):
 # ======================================
 # Парсинг phosphate tenders (без привязки к заголовкам)
 # ======================================
-def parse_phosphate_tenders(df, final_data, agency, product, publish_date, file_name_short):
-    start_parsing = False
-    skip_next_row = False  # Пропустить заголовок
+def parse_phosphate_tenders(grid, final_data, agency, product, publish_date, file_name_short, table_index=None):
+    report_date = report_date_of(publish_date)
+    skip_next_row = True  # Пропустить следующую строку после названия (заголовок)
     empty_count = 0
+    records_before = len(final_data)
     print("[INFO] Начинаем парсить phosphate tenders...")
 
-    for i, row in df.iterrows():
-        first_cell = str(row[0]).strip() if not pd.isna(row[0]) else ""
-
-        # Поиск начала таблицы
-        if re.search(r'.{0,5}phosphate[\s_]+tenders?.{0,5}', first_cell, re.IGNORECASE):
-            start_parsing = True
-            skip_next_row = True  # Пропустить следующую строку (заголовок)
-            continue
-
-        if not start_parsing:
-            continue
+    start_row = find_table(grid, "phosphate tenders", TABLE_ANCHORS, table_index)
+    if start_row == -1:
+        return
 
+    for i, row in grid.iter_rows(start_row + 1):
         # Проверяем второй столбец (индекс 1)
-        second_cell = str(row[1]).strip() if len(row) > 1 and not pd.isna(row[1]) else ""
+        second_cell = row[1] or ""
 
         # Если второй столбец пуст, увеличиваем счетчик
         if not second_cell:
@@ -361,6 +382,7 @@ def parse_phosphate_tenders(df, final_data, agency, product, publish_date, file_
             if empty_count >= 3:
                 print(f"[INFO] Обнаружено 3 пустых строки подряд → завершаем парсинг phosphate tenders")
                 break
+            note_skip("empty")
             continue
         else:
             empty_count = 0  # Сброс счётчика при наличии данных
@@ -368,15 +390,16 @@ def parse_phosphate_tenders(df, final_data, agency, product, publish_date, file_
         # Пропускаем строку с заголовками
         if skip_next_row:
             skip_next_row = False
+            note_skip("header")
             continue
 
         # Извлечение данных по индексам
-        holder_country = str(row[0]).strip() if len(row) > 0 and not pd.isna(row[0]) else ""
-        product_val = str(row[1]).strip() if len(row) > 1 and not pd.isna(row[1]) else ""
-        volume_raw = str(row[2]).strip() if len(row) > 2 and not pd.isna(row[2]) else ""
-        closing_date = str(row[3]).strip() if len(row) > 3 and not pd.isna(row[3]) else ""
-        shipment_raw = str(row[4]).strip() if len(row) > 4 and not pd.isna(row[4]) else ""
-        status = str(row[5]).strip() if len(row) > 5 and not pd.isna(row[5]) else ""
+        holder_country = row[0] or ""
+        product_val = row[1] or ""
+        volume_raw = row[2] or ""
+        closing_date = row[3] or ""
+        shipment_raw = row[4] or ""
+        status = row[5] or ""
 
         # Разделение Holder / Country
         if '/' in holder_country:
@@ -401,20 +424,22 @@ def parse_phosphate_tenders(df, final_data, agency, product, publish_date, file_
             "Grade": product_val,
             "Volume": volume,
             "Issue date": "",  # Не заполняется
-            "Closing date": parse_date(closing_date),
+            "Closing date": parse_date(closing_date, report_date),
             "Status": status,
             "Shipment": shipment
         })
 
-    print(f"[INFO] Завершили парсинг phosphate tenders, добавлено записей: {len(final_data)}")
+    print(f"[INFO] Завершили парсинг phosphate tenders, добавлено записей: {len(final_data) - records_before}")
+OUTPUT_FILE = 'processed_output_Indian_NPK_NPS_Tenders.xlsx'
+# Типы колонок для csv/parquet/feather (xlsx пишется строками); даты тендеров бывают без года — остаются текстом
+OUTPUT_TYPES = {"Publish Date": "date", "Volume": "int"}
+PARSER_VERSION = "tender-4"  # версия для ключа кэша: менять при изменении парсеров
+STORE_DATASET = "tender"  # таблица исторического хранилища, см. Argus_store
+
 # ======================================
-# Основной цикл парсинга
+# Парсинг одного файла по уже загруженному листу
 # ======================================
-for file_info in FILES:
-    file_path = file_info["path"]
-    tables_to_parse = file_info["tables"]
-    print(f"[INFO] Загружаем файл: {file_path}")
-    df = pd.read_excel(file_path, header=None, engine='openpyxl')
+def process_file(grid, file_path, tables_to_parse, final_data, table_index=None):
     file_name = os.path.basename(file_path).replace('.xlsx', '')
     first_part = file_name.split('_')[0].strip()
     parts = first_part.split()
@@ -423,16 +448,78 @@ for file_info in FILES:
     publish_date = extract_publish_date(file_name)
     file_name_short = os.path.basename(file_path)
 
+    # Один проход по листу: строки-заголовки всех запрошенных таблиц
+    if table_index is None:
+        table_index = build_table_index(
+            grid, {name: TABLE_ANCHORS[name] for name in tables_to_parse if name in TABLE_ANCHORS}
+        )
+
     if "Latest African NPK tender" in tables_to_parse:
-        parse_latest_african_npk_tender(df, final_data, agency, product, publish_date, file_name_short)
+        with parser_call("Latest African NPK tender", file_path, grid, final_data) as table_grid:
+            parse_latest_african_npk_tender(table_grid, final_data, agency, product, publish_date, file_name_short, table_index)
     if "Indian NPK, NPS tenders" in tables_to_parse:
-        parse_indian_npk_nps_tenders(df, final_data, agency, product, publish_date, file_name_short)
+        with parser_call("Indian NPK, NPS tenders", file_path, grid, final_data) as table_grid:
+            parse_indian_npk_nps_tenders(table_grid, final_data, agency, product, publish_date, file_name_short, table_index)
     if "phosphate tenders" in tables_to_parse:
-        parse_phosphate_tenders(df, final_data, agency, product, publish_date, file_name_short)
+        with parser_call("phosphate tenders", file_path, grid, final_data) as table_grid:
+            parse_phosphate_tenders(table_grid, final_data, agency, product, publish_date, file_name_short, table_index)
+
+# ======================================
+# Парсинг одной книги: все листы с запрошенными таблицами
+# ======================================
+def parse_workbook(file_path, tables_to_parse):
+    file_data = RecordTable()
+    workbook = open_workbook(file_path)
+    anchors = requested_anchors(tables_to_parse, TABLE_ANCHORS)
+    report_missing = tables_to_parse != AUTO_TABLES
+    for grid, table_index in iter_sheet_grids(workbook, file_path, anchors, STREAMING, report_missing):
+        process_file(grid, file_path, list(table_index), file_data, table_index)
+    workbook.close()
+    return file_data
+
 # ======================================
 # Сохраняем результат в Excel
 # ======================================
-result_df = pd.DataFrame(final_data, columns=columns_order)
-output_file = 'processed_output_Indian_NPK_NPS_Tenders.xlsx'
-result_df.to_excel(output_file, index=False)
-print(f"✅ Файл успешно обработан и сохранён как '{output_file}'")
+def save_results(final_data, output_file=OUTPUT_FILE, formats=("xlsx",), store=None):
+    for output_format in formats:
+        saved_file = write_records(final_data, columns_order, output_file, output_format, OUTPUT_TYPES)
+        if saved_file:
+            print(f"✅ Файл успешно обработан и сохранён как '{saved_file}'")
+    if store:
+        save_to_store(store, STORE_DATASET, columns_order, final_data)
+
+# ======================================
+# Основной цикл парсинга
+# ======================================
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Парсинг таблиц тендеров из книг Argus")
+    arg_parser.add_argument("--no-cache", action="store_true",
+                            help="разобрать книги заново, не используя кэш результатов")
+    arg_parser.add_argument("--format", dest="formats", nargs="+", choices=OUTPUT_FORMATS, default=["xlsx"],
+                            help="форматы итогового файла (по умолчанию xlsx)")
+    arg_parser.add_argument("--store", nargs="?", const=STORE_FILE, default=None,
+                            help=f"дописать записи в историческое хранилище SQLite (по умолчанию {STORE_FILE})")
+    arg_parser.add_argument("--auto", action="store_true",
+                            help="искать все известные таблицы вместо списков из FILES")
+    arg_parser.add_argument("--stats", default=None,
+                            help="сохранить статистику парсеров (время, строки, пропуски) в файл")
+    arg_parser.add_argument("--stats-format", choices=STATS_FORMATS, default="json",
+                            help="формат статистики: json или prometheus (по умолчанию json)")
+    args = arg_parser.parse_args(argv)
+
+    for file_info in FILES:
+        file_path = file_info["path"]
+        tables = file_tables(file_info, args.auto)
+        print(f"[INFO] Загружаем файл: {file_path}")
+        final_data.extend(cached_parse(
+            file_path, PARSER_VERSION, tables,
+            lambda: parse_workbook(file_path, tables), not args.no_cache
+        ))
+
+    save_results(final_data, formats=args.formats, store=args.store)
+    if args.stats:
+        write_stats(args.stats, args.stats_format)
+
+
+if __name__ == "__main__":
+    main()
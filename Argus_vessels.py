@@ -0,0 +1,244 @@
+import argparse
+import re
+from datetime import datetime
+
+from Argus_common import SOURCE_FIELD, TABLE_FIELD, record_fields, set_record_field
+from Argus_store import STORE_FILE, open_store
+
+# ======================================
+# Индекс судов по выпускам line-up
+# ======================================
+# Одно и то же судно неделями появляется в India MOP vessel line-up и Brazil Potash line-up
+# со сдвигающимися ETA/ETB. Строки выпусков привязываются к рейсу — судно + порт разгрузки +
+# продукт после нормализации имён; каждое появление рейса в выпуске записывается, поэтому
+# история ETA рейса — один запрос по индексу, а не VLOOKUP по всем выпускам.
+VESSEL_TABLES = ("India MOP vessel line-up", "Brazil Potash line-up")
+VOYAGE_FIELD = "Voyage"
+# Тот же ключ и ETA дальше этого от последнего ETA рейса — уже следующий рейс судна
+VOYAGE_GAP_DAYS = 60
+DATE_FORMAT = "%d.%m.%Y"
+
+VESSEL_PREFIX_RE = re.compile(r'^(m\s*/\s*v|m\.\s*v\.?|mv|m/t|mt)\s+', re.IGNORECASE)
+NAME_NOISE_RE = re.compile(r'[^\w\s]')
+SPACES_RE = re.compile(r'\s+')
+
+
+def normalize_name(name):
+    # "M/V Gas-Phoenix " -> "GAS PHOENIX"
+    name = VESSEL_PREFIX_RE.sub('', str(name or '').strip())
+    return SPACES_RE.sub(' ', NAME_NOISE_RE.sub(' ', name)).strip().upper()
+
+
+def iso_date(value):
+    # "03.07.2025" -> "2025-07-03": в базе даты хранятся так, чтобы сортировались строкой
+    try:
+        return datetime.strptime(value, DATE_FORMAT).strftime("%Y-%m-%d")
+    except (TypeError, ValueError):
+        return ""
+
+
+def days_between(first, second):
+    return abs((datetime.fromisoformat(first) - datetime.fromisoformat(second)).days)
+
+# ======================================
+# Схема
+# ======================================
+def ensure_schema(connection):
+    connection.executescript("""
+        CREATE TABLE IF NOT EXISTS voyages (
+            id INTEGER PRIMARY KEY,
+            vessel_key TEXT NOT NULL, port_key TEXT NOT NULL, product_key TEXT NOT NULL,
+            vessel TEXT, port TEXT, product TEXT,
+            first_issue TEXT, last_issue TEXT, eta TEXT
+        );
+        CREATE INDEX IF NOT EXISTS voyages_key ON voyages (vessel_key, port_key, product_key, id);
+        CREATE TABLE IF NOT EXISTS voyage_sightings (
+            voyage_id INTEGER NOT NULL REFERENCES voyages (id),
+            publish_date TEXT, agency TEXT, source_table TEXT,
+            eta TEXT, etb TEXT, volume TEXT, buyer TEXT, source TEXT
+        );
+        CREATE INDEX IF NOT EXISTS voyage_sightings_voyage ON voyage_sightings (voyage_id, publish_date);
+        CREATE INDEX IF NOT EXISTS voyage_sightings_issue ON voyage_sightings (publish_date, agency, source_table);
+    """)
+    # Базы до появления source: колонка добавляется, старые появления остаются с NULL
+    columns = [row[1] for row in connection.execute("PRAGMA table_info(voyage_sightings)")]
+    if "source" not in columns:
+        connection.execute("ALTER TABLE voyage_sightings ADD COLUMN source TEXT")
+    connection.execute("CREATE INDEX IF NOT EXISTS voyage_sightings_source ON voyage_sightings (source, publish_date)")
+
+# ======================================
+# Привязка строк выпуска к рейсам
+# ======================================
+def load_candidates(connection, key):
+    # Все рейсы ключа: [id, eta, last_issue, buyer, volume], где buyer и volume — из последнего
+    # появления рейса; по индексам voyages_key и voyage_sightings_voyage
+    return [list(row) for row in connection.execute(
+        "SELECT id, eta, last_issue, "
+        "(SELECT buyer FROM voyage_sightings WHERE voyage_id = voyages.id ORDER BY publish_date DESC LIMIT 1), "
+        "(SELECT volume FROM voyage_sightings WHERE voyage_id = voyages.id ORDER BY publish_date DESC LIMIT 1) "
+        "FROM voyages WHERE vessel_key = ? AND port_key = ? AND product_key = ?", key
+    )]
+
+
+def match_voyage(candidates, eta, publish_date, taken, buyer="", volume=""):
+    # Рейс в пределах VOYAGE_GAP_DAYS (по ETA, без ETA — по выпуску). Рейс, к которому уже
+    # привязана строка этого выпуска, не подходит: две строки одного выпуска — два разных рейса.
+    # У разделённого груза (одно судно, порт и продукт, несколько получателей) ETA совпадают,
+    # поэтому сначала предпочитается рейс с тем же получателем, затем с тем же объёмом, что
+    # в его последнем появлении, затем ближайший; при равенстве — меньший номер рейса,
+    # чтобы от выпуска к выпуску строки не менялись рейсами.
+    buyer = normalize_name(buyer)
+    best, best_rank = None, None
+    for voyage_id, voyage_eta, last_issue, voyage_buyer, voyage_volume in candidates:
+        if voyage_id in taken:
+            continue
+        if eta and voyage_eta:
+            gap = days_between(eta, voyage_eta)
+        elif publish_date and last_issue:
+            gap = days_between(publish_date, last_issue)
+        else:
+            gap = 0
+        if gap > VOYAGE_GAP_DAYS:
+            continue
+        rank = (
+            not (buyer and buyer == normalize_name(voyage_buyer)),
+            not (volume and volume == voyage_volume),
+            gap,
+            voyage_id,
+        )
+        if best_rank is None or rank < best_rank:
+            best, best_rank = voyage_id, rank
+    return best
+
+
+def link_voyages(records, path=STORE_FILE):
+    # Строкам таблиц VESSEL_TABLES проставляется номер рейса в VOYAGE_FIELD. Повторная
+    # загрузка выпуска сначала удаляет его появления, поэтому рейсы не дублируются. Выпуск —
+    # тот же ключ, что в хранилище (книга-источник + дата выпуска, см. Argus_store), поэтому
+    # две книги одной даты не стирают появления друг друга.
+    fields = ("Publish Date", "Agency", "Product", TABLE_FIELD, "Vessel", "Discharge port",
+              "Date of arrival", "ETB", "Volume (t)", "Buyer", SOURCE_FIELD)
+    rows = list(record_fields(records, fields))
+    connection = open_store(path)
+    linked = created = 0
+    voyage_ids = []
+    try:
+        ensure_schema(connection)
+        with connection:
+            issues = {(source, iso_date(publish_date)) for publish_date, *_, source in rows}
+            legacy_keys = {(iso_date(row[0]), row[1], row[3]) for row in rows if row[3] in VESSEL_TABLES}
+            connection.executemany("DELETE FROM voyage_sightings WHERE source = ? AND publish_date = ?", issues)
+            # Появления из баз до появления source
+            connection.executemany(
+                "DELETE FROM voyage_sightings WHERE source IS NULL AND publish_date = ? AND agency = ? "
+                "AND source_table = ?", legacy_keys
+            )
+
+            candidates = {}  # ключ -> рейсы ключа: база читается один раз на ключ за загрузку
+            taken = {}  # (книга, выпуск, таблица) -> рейсы, уже привязанные в этом выпуске
+            for row in rows:
+                publish_date, agency, product, table, vessel, port, eta, etb, volume, buyer, source = row
+                if table not in VESSEL_TABLES or not normalize_name(vessel):
+                    voyage_ids.append("")
+                    continue
+                issue = iso_date(publish_date)
+                issue_key = (source, issue, table)
+
+                key = (normalize_name(vessel), normalize_name(port), normalize_name(product))
+                if key not in candidates:
+                    candidates[key] = load_candidates(connection, key)
+                eta_iso = iso_date(eta)
+                issue_taken = taken.setdefault(issue_key, set())
+                voyage_id = match_voyage(candidates[key], eta_iso, issue, issue_taken, buyer, volume)
+                if voyage_id is None:
+                    voyage_id = connection.execute(
+                        "INSERT INTO voyages (vessel_key, port_key, product_key, vessel, port, product, "
+                        "first_issue, last_issue, eta) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        key + (vessel, port, product, issue, issue, eta_iso)
+                    ).lastrowid
+                    candidates[key].append([voyage_id, eta_iso, issue, buyer, volume])
+                    created += 1
+                else:
+                    # ETA рейса — из самого свежего выпуска
+                    connection.execute(
+                        "UPDATE voyages SET last_issue = max(last_issue, ?), first_issue = min(first_issue, ?), "
+                        "eta = CASE WHEN ? >= last_issue AND ? != '' THEN ? ELSE eta END WHERE id = ?",
+                        (issue, issue, issue, eta_iso, eta_iso, voyage_id)
+                    )
+                    for candidate in candidates[key]:
+                        if candidate[0] == voyage_id and issue >= (candidate[2] or ""):
+                            candidate[1:] = [eta_iso or candidate[1], issue, buyer, volume]
+                issue_taken.add(voyage_id)
+                connection.execute(
+                    "INSERT INTO voyage_sightings (voyage_id, publish_date, agency, source_table, eta, etb, volume, buyer, "
+                    "source) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (voyage_id, issue, agency, table, eta_iso, iso_date(etb), volume, buyer, source)
+                )
+                voyage_ids.append(voyage_id)
+                linked += 1
+    finally:
+        connection.close()
+
+    set_record_field(records, VOYAGE_FIELD, voyage_ids)
+    if linked:
+        print(f"[INFO] Рейсы судов: привязано строк {linked}, новых рейсов {created}")
+    return linked
+
+# ======================================
+# История рейса
+# ======================================
+def find_voyages(path, vessel, port=None, product=None):
+    query = "SELECT id, vessel, port, product, first_issue, last_issue, eta FROM voyages WHERE vessel_key = ?"
+    params = [normalize_name(vessel)]
+    if port:
+        query += " AND port_key = ?"
+        params.append(normalize_name(port))
+    if product:
+        query += " AND product_key = ?"
+        params.append(normalize_name(product))
+    connection = open_store(path)
+    try:
+        return connection.execute(query + " ORDER BY id", params).fetchall()
+    finally:
+        connection.close()
+
+
+def voyage_history(path, voyage_id):
+    # Появления рейса по выпускам; revised — ETA изменился относительно предыдущего выпуска
+    connection = open_store(path)
+    try:
+        rows = connection.execute(
+            "SELECT publish_date, source_table, eta, etb, volume, buyer FROM voyage_sightings "
+            "WHERE voyage_id = ? ORDER BY publish_date", (voyage_id,)
+        ).fetchall()
+    finally:
+        connection.close()
+    history = []
+    previous_eta = None
+    for publish_date, table, eta, etb, volume, buyer in rows:
+        history.append({
+            "publish_date": publish_date, "table": table, "eta": eta, "etb": etb, "volume": volume,
+            "buyer": buyer, "revised": previous_eta is not None and eta != previous_eta,
+        })
+        previous_eta = eta
+    return history
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="История рейсов судна по выпускам line-up")
+    arg_parser.add_argument("vessel", help="название судна (регистр и префиксы MV, M/V не важны)")
+    arg_parser.add_argument("--port", default=None, help="порт разгрузки")
+    arg_parser.add_argument("--product", default=None, help="продукт")
+    arg_parser.add_argument("--store", default=STORE_FILE,
+                            help=f"историческое хранилище SQLite (по умолчанию {STORE_FILE})")
+    args = arg_parser.parse_args()
+
+    voyages = find_voyages(args.store, args.vessel, args.port, args.product)
+    if not voyages:
+        print(f"[INFO] Рейсов судна '{args.vessel}' в хранилище нет")
+    for voyage_id, vessel, port, product, first_issue, last_issue, eta in voyages:
+        print(f"Рейс {voyage_id}: {vessel} → {port} ({product}), выпуски {first_issue} – {last_issue}, ETA {eta or '-'}")
+        for sighting in voyage_history(args.store, voyage_id):
+            mark = " (ETA изменён)" if sighting["revised"] else ""
+            print(f"    {sighting['publish_date']}: ETA {sighting['eta'] or '-'}, ETB {sighting['etb'] or '-'}, "
+                  f"{sighting['volume'] or '-'} t{mark}")
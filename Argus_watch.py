@@ -0,0 +1,146 @@
+import argparse
+import os
+import time
+
+from Argus_common import AUTO_TABLES, OUTPUT_FORMATS, RecordTable, file_tables
+from Argus_store import STORE_FILE
+from Argus_lineup_date import extract_publish_date
+import Argus_runner
+
+# ======================================
+# Настройки путей и параметров
+# ======================================
+# Папка, куда падают новые выпуски Argus, и папка для результатов по каждой книге
+INBOX_DIR = 'inbox'
+OUTPUT_DIR = 'processed'
+POLL_INTERVAL = 2.0  # секунды между просмотрами папки
+
+# Таблицы по продукту из имени файла ("Argus Ammonia _ Russia version (...)" -> "Ammonia").
+# Списки берутся из FILES раннера, поэтому новая таблица добавляется в одном месте.
+# Для продукта, которого нет в FILES, таблицы определяются автоматически по якорям.
+TABLES_BY_PRODUCT = {}
+for _file_info in Argus_runner.FILES:
+    _first_part = os.path.basename(_file_info["path"]).split('_')[0].split()
+    if len(_first_part) >= 2:
+        TABLES_BY_PRODUCT[_first_part[1]] = _file_info.get("tables", AUTO_TABLES)
+
+# ======================================
+# Определение выпуска по имени файла
+# ======================================
+def describe_workbook(file_path):
+    # Тот же разбор имени, что в process_file: агентство, продукт, дата выпуска
+    file_name = os.path.basename(file_path).replace('.xlsx', '')
+    parts = file_name.split('_')[0].strip().split()
+    agency = parts[0] if len(parts) >= 1 else ''
+    product = parts[1] if len(parts) >= 2 else ''
+    return agency, product, extract_publish_date(file_name)
+
+
+def is_workbook(name):
+    # "~$..." — файл блокировки открытой в Excel книги
+    return name.lower().endswith('.xlsx') and not name.startswith('~$')
+
+# ======================================
+# Разбор одной новой книги
+# ======================================
+def parse_issue(file_path, use_cache=True, auto=False):
+    # Записи книги по семействам: {имя модуля: RecordTable}. Ключ — имя, а не модуль,
+    # чтобы результат можно было вернуть из процесса-воркера (см. Argus_backfill).
+    # None — книгу не удалось открыть
+    _, product, _ = describe_workbook(file_path)
+    tables = file_tables({"tables": TABLES_BY_PRODUCT.get(product, AUTO_TABLES)}, auto)
+    results = {module: RecordTable() for module in Argus_runner.PARSERS}
+    if not Argus_runner.process_workbook(file_path, tables, results, use_cache):
+        return None
+    return {module.__name__: records for module, records in results.items()}
+
+
+def save_issue(file_path, results, output_dir=OUTPUT_DIR, formats=("xlsx",), store=STORE_FILE):
+    # Результаты каждого семейства — в свой файл рядом с именем книги
+    os.makedirs(output_dir, exist_ok=True)
+    stem = os.path.splitext(os.path.basename(file_path))[0]
+    for module in Argus_runner.PARSERS:
+        records = results[module.__name__]
+        if records:
+            output_file = os.path.join(output_dir, f"{stem} - {module.OUTPUT_FILE}")
+            module.save_results(records, output_file, formats=formats, store=store)
+
+
+def ingest(file_path, output_dir=OUTPUT_DIR, formats=("xlsx",), store=STORE_FILE, use_cache=True, auto=False):
+    agency, product, publish_date = describe_workbook(file_path)
+    started = time.perf_counter()
+    results = parse_issue(file_path, use_cache, auto)
+    if results is None:
+        raise ValueError("книга не открывается")
+    save_issue(file_path, results, output_dir, formats, store)
+    print(f"[INFO] {agency} {product} {publish_date}: обработано за {time.perf_counter() - started:.1f} с")
+
+# ======================================
+# Наблюдение за папкой
+# ======================================
+def scan(inbox_dir):
+    # {путь: (размер, mtime)} для всех книг в папке
+    found = {}
+    for name in os.listdir(inbox_dir):
+        path = os.path.join(inbox_dir, name)
+        if is_workbook(name) and os.path.isfile(path):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue  # файл успели удалить или переименовать
+            found[path] = (stat.st_size, stat.st_mtime)
+    return found
+
+
+def watch(inbox_dir=INBOX_DIR, output_dir=OUTPUT_DIR, formats=("xlsx",), store=STORE_FILE,
+          use_cache=True, interval=POLL_INTERVAL, once=False, auto=False):
+    # Книга разбирается, когда её размер и mtime не менялись между двумя просмотрами
+    # (копирование закончено). Изменённая книга с тем же именем разбирается заново:
+    # хранилище заменит выпуск целиком.
+    os.makedirs(inbox_dir, exist_ok=True)
+    print(f"[INFO] Наблюдаем за папкой '{inbox_dir}' (Ctrl+C — остановка)")
+    pending = {}
+    done = {}
+    try:
+        while True:
+            current = scan(inbox_dir)
+            for path, signature in current.items():
+                if done.get(path) == signature:
+                    continue
+                if once or pending.get(path) == signature:
+                    try:
+                        ingest(path, output_dir, formats, store, use_cache, auto)
+                    except Exception as e:
+                        print(f"[ERROR] Ошибка при обработке {path}: {e}")
+                    done[path] = signature
+                    pending.pop(path, None)
+                else:
+                    pending[path] = signature
+            if once:
+                return
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        print("[INFO] Наблюдение остановлено")
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Разбор новых книг Argus по мере появления в папке")
+    arg_parser.add_argument("inbox", nargs="?", default=INBOX_DIR, help=f"папка с книгами (по умолчанию {INBOX_DIR})")
+    arg_parser.add_argument("--output-dir", default=OUTPUT_DIR,
+                            help=f"папка для результатов по каждой книге (по умолчанию {OUTPUT_DIR})")
+    arg_parser.add_argument("--format", dest="formats", nargs="+", choices=OUTPUT_FORMATS, default=["xlsx"],
+                            help="форматы итогового файла (по умолчанию xlsx)")
+    arg_parser.add_argument("--store", default=STORE_FILE,
+                            help=f"историческое хранилище SQLite (по умолчанию {STORE_FILE})")
+    arg_parser.add_argument("--interval", type=float, default=POLL_INTERVAL,
+                            help=f"пауза между просмотрами папки, с (по умолчанию {POLL_INTERVAL})")
+    arg_parser.add_argument("--once", action="store_true",
+                            help="обработать книги, которые уже лежат в папке, и выйти")
+    arg_parser.add_argument("--no-cache", action="store_true",
+                            help="разобрать книги заново, не используя кэш результатов")
+    arg_parser.add_argument("--auto", action="store_true",
+                            help="искать все известные таблицы вместо списков из FILES раннера")
+    args = arg_parser.parse_args()
+
+    watch(args.inbox, args.output_dir, args.formats, args.store, not args.no_cache, args.interval, args.once,
+          args.auto)